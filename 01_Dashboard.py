@@ -6,6 +6,8 @@ import html
 import time # For potential use with st.empty and messages
 import toml # Added for consistency, though not directly used for DB
 import shutil # For file operations
+import tempfile # Export snapshots
+import functools
 
 # 1. Page Config FIRST
 st.set_page_config(
@@ -24,6 +26,7 @@ import time # For potential use with st.empty and messages
 # 3. Define DB_PATH and other critical global-like variables from your modules.
 #    Handle imports carefully.
 DB_PATH = None # Initialize to None
+UPLOAD_CHUNK_BYTES = 1024 * 1024 # Uploaded databases are written to disk 1 MiB at a time
 scrape_phase = None
 clear_all_approved_jobs = None
 mark_job_as_applied = None
@@ -41,6 +44,12 @@ try:
     DB_PATH = UTILS_DB_PATH # Assign to the global DB_PATH
 
     from database import init_db # Import init_db
+    from database import BACKEND, DatabaseError # Storage backend chosen under [storage] in config.toml
+    from database import get_conn, backup_database, check_database_file, replace_database
+    from database import fetch_pending_approved_page, count_pending_approved, APPROVED_SORT_KEYS, DEFAULT_PAGE_SIZE
+    from query_cache import cached # Results shared across sessions until the database changes
+    fetch_pending_approved_page = cached(fetch_pending_approved_page)
+    count_pending_approved = cached(count_pending_approved)
     from database import clear_all_approved_jobs as db_clear_approved
     clear_all_approved_jobs = db_clear_approved
 
@@ -49,9 +58,20 @@ try:
 
     from database import delete_approved_job as db_delete_approved
     delete_approved_job = db_delete_approved
+
+    from database import mark_jobs_as_applied, delete_approved_jobs # Bulk actions on the selected jobs
     
-    from scrape import scrape_phase as sp_scrape_phase
-    scrape_phase = sp_scrape_phase
+    def scrape_phase(stop_signal):
+        """The scraper (requests, BeautifulSoup, the AI provider SDKs) is only imported when a scan starts."""
+        from scrape import scrape_phase as sp_scrape_phase
+        return sp_scrape_phase(stop_signal)
+
+    import reevaluate
+    from database import request_reevaluation_cancel, fetch_latest_reevaluation_run
+    fetch_latest_reevaluation_run = cached(fetch_latest_reevaluation_run)
+    import relevance
+    import retention
+    import export_jobs
 
     # ADDED: Fallbacks for new database functions
     try:
@@ -82,6 +102,32 @@ except ImportError as e:
     except ImportError:
         def set_stop_scan_flag(stop_val): st.error("set_stop_scan_flag (fallback) not loaded.")
         def should_stop_scan(): st.error("should_stop_scan (fallback) not loaded."); return False
+    if 'BACKEND' not in globals():
+        BACKEND = "sqlite"
+        DatabaseError = (sqlite3.Error,)
+    if 'get_conn' not in globals():
+        from contextlib import closing
+        def get_conn(): return closing(sqlite3.connect(DB_PATH))
+        def backup_database(path): shutil.copyfile(DB_PATH, path)
+        def check_database_file(path): return True, "ok"
+        def replace_database(path): shutil.copyfile(path, DB_PATH)
+    if 'mark_jobs_as_applied' not in globals():
+        def mark_jobs_as_applied(pks): return sum(bool(mark_job_as_applied(pk)) for pk in pks)
+        def delete_approved_jobs(pks): return sum(bool(delete_approved_job(pk)) for pk in pks)
+    if 'fetch_pending_approved_page' not in globals():
+        fetch_pending_approved_page = None
+        def count_pending_approved(search=None): return 0
+        APPROVED_SORT_KEYS = {"Newest": ""}
+        DEFAULT_PAGE_SIZE = 25
+    if 'relevance' not in globals():
+        relevance = None
+    if 'retention' not in globals():
+        retention = None
+    if 'export_jobs' not in globals():
+        export_jobs = None
+    if 'fetch_latest_reevaluation_run' not in globals():
+        def fetch_latest_reevaluation_run(): return None
+        def request_reevaluation_cancel(): st.error("request_reevaluation_cancel (fallback) not loaded."); return False
 
 # Call init_db() to ensure database and tables are created/updated
 if DB_PATH: # Ensure DB_PATH is set before calling
@@ -176,39 +222,25 @@ def is_valid_database_schema(db_file_path: Path) -> tuple[bool, str]:
 
 
 # 4. Now define functions that USE these global variables (like DB_PATH)
-def fetch_approved_jobs():
-    """Fetches all approved jobs, including their primary key and new date_applied status."""
+def fetch_approved_jobs(sort_by: str = "Newest", search: str = "", cursor=None, page_size: int = DEFAULT_PAGE_SIZE):
+    """Fetches one page of approved jobs, including their primary key and new date_applied status.
+    With *search*, only jobs whose title/description match, best match first.
+    Returns (DataFrame, cursor of the next page or None on the last page).
+    """
     if not DB_PATH: # Check if DB_PATH was successfully initialized
         st.error("DB_PATH is not configured. Cannot fetch jobs.")
-        return pd.DataFrame()
-    if not DB_PATH.exists():
+        return pd.DataFrame(), None
+    if BACKEND == "sqlite" and not DB_PATH.exists():
         st.error(f"Database file not found at: {DB_PATH}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
+    if fetch_pending_approved_page is None:
+        st.error("Approved jobs query (fallback) not loaded.")
+        return pd.DataFrame(), None
 
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        # Fetch aj.id AS approved_job_pk for button actions
-        # Fetch aj.date_applied for display and button logic
-        query = """
-        SELECT
-            aj.id AS approved_job_pk, 
-            dj.url,
-            dj.title,
-            dj.location,
-            dj.keyword,
-            aj.date_approved,
-            aj.reason,
-            aj.date_applied 
-        FROM
-            approved_jobs aj
-        JOIN
-            discovered_jobs dj ON aj.discovered_job_id = dj.id
-        WHERE aj.date_applied IS NULL  -- MODIFIED: Only fetch jobs not yet applied
-        ORDER BY
-            aj.date_approved DESC;
-        """
-        df = pd.read_sql_query(query, conn)
+        # Keyset page served by idx_approved_pending; only this page's rows are loaded
+        rows, next_cursor = fetch_pending_approved_page(sort_by, search, cursor, page_size)
+        df = pd.DataFrame([dict(row) for row in rows])
         
         if 'date_approved' in df.columns:
             try:
@@ -222,13 +254,16 @@ def fetch_approved_jobs():
         else:
             df['date_applied_str'] = None # Ensure column exists even if all values are None
 
-        return df
-    except sqlite3.Error as e:
-        st.error(f"SQLite error: {e}")
-        return pd.DataFrame()
-    finally:
-        if conn:
-            conn.close()
+        return df, next_cursor
+    except DatabaseError as e:
+        st.error(f"Database error: {e}")
+        return pd.DataFrame(), None
+
+def get_page_size() -> int:
+    try:
+        return max(1, int(load().get("display", {}).get("page_size", DEFAULT_PAGE_SIZE))) if load else DEFAULT_PAGE_SIZE
+    except Exception:
+        return DEFAULT_PAGE_SIZE
 
 # Explicit session state initialization at the top
 if 'scan_should_be_running' not in st.session_state:
@@ -247,9 +282,65 @@ if 'show_db_uploader' not in st.session_state: # ADDED
     st.session_state.show_db_uploader = False # ADDED
 if 'action_message' not in st.session_state: # ADDED
     st.session_state.action_message = None # ADDED
+if 'reeval_actively_processing' not in st.session_state:
+    st.session_state.reeval_actively_processing = False
+if 'reeval_stop_signal' not in st.session_state:
+    st.session_state.reeval_stop_signal = [False]
+if 'approved_page_cursors' not in st.session_state:
+    st.session_state.approved_page_cursors = [None] # Cursor of every page up to the current one; [None] = first page
 # Assuming other session states like db_import_export_message, show_db_uploader, action_message are initialized elsewhere or as needed.
 
 # --- Callback Functions for Sidebar Actions ---
+def reset_approved_pages():
+    st.session_state.approved_page_cursors = [None]
+    clear_approved_selection()
+
+def next_approved_page(cursor):
+    st.session_state.approved_page_cursors.append(cursor)
+    clear_approved_selection()
+
+def prev_approved_page():
+    if len(st.session_state.approved_page_cursors) > 1:
+        st.session_state.approved_page_cursors.pop()
+    clear_approved_selection()
+
+# --- Job Selection and Actions ---
+# Each job card has a checkbox keyed APPROVED_SELECT_PREFIX + approved_job_pk. Actions run as
+# on_click callbacks over a list of IDs: one database transaction, then the click's own rerun.
+APPROVED_SELECT_PREFIX = "select_approved_"
+
+def selected_approved_pks() -> list:
+    return [int(key[len(APPROVED_SELECT_PREFIX):]) for key, ticked in st.session_state.items()
+            if str(key).startswith(APPROVED_SELECT_PREFIX) and ticked]
+
+def select_approved_page(pks):
+    for pk in pks:
+        st.session_state[f"{APPROVED_SELECT_PREFIX}{pk}"] = True
+
+def clear_approved_selection():
+    for key in [key for key in st.session_state.keys() if str(key).startswith(APPROVED_SELECT_PREFIX)]:
+        del st.session_state[key]
+
+def mark_applied_action(pks, what=None):
+    try:
+        updated = mark_jobs_as_applied(pks)
+        if updated:
+            st.session_state.action_message = {"type": "success", "text": f"{what or f'{updated} jobs'} marked as applied."}
+    except Exception as e:
+        st.session_state.action_message = {"type": "error", "text": f"Error marking jobs as applied: {e}"}
+    clear_approved_selection()
+
+def delete_jobs_action(pks, what=None):
+    try:
+        deleted = delete_approved_jobs(pks)
+        if deleted:
+            st.session_state.action_message = {"type": "success", "text": f"{what or f'{deleted} jobs'} deleted from approved list."}
+        else:
+            st.session_state.action_message = {"type": "error", "text": f"{what or 'The selected jobs'} could not be deleted (not found)."}
+    except Exception as e:
+        st.session_state.action_message = {"type": "error", "text": f"Error deleting jobs: {e}"}
+    clear_approved_selection()
+
 def start_scan_action():
     if load: # Check if load function is available
         try:
@@ -291,6 +382,27 @@ def clear_jobs_action():
     else:
         st.session_state.scan_message = "ERROR: Clear jobs function not available."
 
+def apply_retention_action():
+    if retention is None:
+        st.session_state.db_import_export_message = {"type": "error", "text": "Retention module not available."}
+        return
+    try:
+        summary = retention.run()
+        st.session_state.db_import_export_message = {"type": "success", "text": retention.format_summary(summary)}
+    except Exception as e:
+        st.session_state.db_import_export_message = {"type": "error", "text": f"Error applying retention policies: {e}"}
+
+def start_reevaluation_action():
+    st.session_state.reeval_stop_signal = [False] # Fresh signal for this run
+    st.session_state.reeval_actively_processing = True
+    st.session_state.scan_message = "Re-evaluation initiated..."
+
+def cancel_reevaluation_action():
+    request_reevaluation_cancel() # Picked up by the running re-evaluation after its current chunk
+    st.session_state.reeval_stop_signal[0] = True
+    st.session_state.reeval_actively_processing = False
+    st.session_state.scan_message = "Re-evaluation cancel requested. Progress is kept; start it again to resume."
+
 # --- Global Actions (Sidebar) ---
 st.sidebar.header("Job Management")
 scan_status_placeholder = st.sidebar.empty()
@@ -336,6 +448,29 @@ st.sidebar.button("🗑️ Clear All Approved Jobs",
     on_click=clear_jobs_action
 )
 
+# --- Re-evaluation (Sidebar) ---
+st.sidebar.markdown("---")
+st.sidebar.subheader("Re-evaluation")
+latest_reeval_run = fetch_latest_reevaluation_run()
+if latest_reeval_run is not None:
+    st.sidebar.caption(
+        f"Last run: {latest_reeval_run['status']} – {latest_reeval_run['processed']}/{latest_reeval_run['total']} jobs "
+        f"(approved {latest_reeval_run['approved']}, revoked {latest_reeval_run['revoked']}, errors {latest_reeval_run['errors']})"
+    )
+resumable = latest_reeval_run is not None and latest_reeval_run["status"] in ("running", "cancel_requested", "cancelled")
+st.sidebar.button("♻️ Resume Re-evaluation" if resumable else "♻️ Re-evaluate Analyzed Jobs",
+    key="global_start_reeval",
+    use_container_width=True,
+    help="Re-score every analyzed job against the current resume and AI prompt using the stored descriptions (no scraping). Newest jobs first; approvals are updated in place. A run for changed criteria starts over.",
+    disabled=st.session_state.get('scan_should_be_running', False) or st.session_state.reeval_actively_processing,
+    on_click=start_reevaluation_action
+)
+st.sidebar.button("⏹️ Cancel Re-evaluation",
+    key="global_cancel_reeval",
+    use_container_width=True,
+    on_click=cancel_reevaluation_action
+)
+
 # --- Database Import/Export (Sidebar) ---
 st.sidebar.markdown("---")
 st.sidebar.subheader("Database Management")
@@ -352,20 +487,24 @@ if st.session_state.db_import_export_message:
         st.sidebar.info(msg_text)
     st.session_state.db_import_export_message = None # Clear after displaying
 
-# Export Database Button
-if DB_PATH and DB_PATH.exists():
-    try:
-        with open(DB_PATH, "rb") as fp:
-            st.sidebar.download_button(
-                label="📤 Export Database",
-                data=fp,
-                file_name="jobfinder_database.db",
-                mime="application/vnd.sqlite3", # Standard mime type for SQLite
-                use_container_width=True,
-                help="Download the current application database."
-            )
-    except Exception as e:
-        st.sidebar.error(f"Error preparing DB for export: {e}")
+# Export Database Button (the database file only exists with the sqlite storage backend)
+def export_database_snapshot() -> bytes:
+    """Runs only when the export button is clicked: copies the live database to a temporary
+    file with the backup API, in steps, so a scan can keep writing during the export."""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = Path(tmp) / "jobfinder_database.db"
+        backup_database(snapshot_path)
+        return snapshot_path.read_bytes()
+
+if BACKEND == "sqlite" and DB_PATH and DB_PATH.exists():
+    st.sidebar.download_button(
+        label="📤 Export Database",
+        data=export_database_snapshot, # Prepared on click, not on every rerun
+        file_name="jobfinder_database.db",
+        mime="application/vnd.sqlite3", # Standard mime type for SQLite
+        use_container_width=True,
+        help="Download a consistent copy of the current application database."
+    )
 else:
     st.sidebar.download_button(
         label="📤 Export Database",
@@ -373,12 +512,50 @@ else:
         file_name="jobfinder_database.db",
         mime="application/vnd.sqlite3",
         use_container_width=True,
-        help="Database file not found or DB_PATH not set.",
+        help="Database file not found or DB_PATH not set." if BACKEND == "sqlite" else f"Not available with the {BACKEND} storage backend; use its own backup tools.",
         disabled=True
     )
 
+# Export Jobs: the corpus as Parquet/CSV/JSONL, streamed from the database in chunks (export_jobs.py)
+JOB_EXPORT_MIME_TYPES = {"parquet": "application/vnd.apache.parquet", "csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+def export_jobs_file(fmt: str, since) -> bytes:
+    """Runs only when the export button is clicked."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / f"jobs_export.{fmt}"
+        export_jobs.export(out, fmt, since)
+        return out.read_bytes()
+
+if export_jobs is not None:
+    col_format, col_since = st.sidebar.columns(2)
+    job_export_format = col_format.selectbox("Jobs export format", export_jobs.FORMATS, key="job_export_format")
+    job_export_since = col_since.text_input("Changed since (UTC)", key="job_export_since", placeholder="YYYY-MM-DD",
+                                            help="Only jobs discovered, approved, applied to or evaluated since then. Leave empty for all jobs.")
+    try:
+        job_export_since = export_jobs.parse_since(job_export_since) if job_export_since.strip() else None
+        since_valid = True
+    except ValueError:
+        st.sidebar.error(f"Not a date or timestamp: {job_export_since}")
+        since_valid = False
+    st.sidebar.download_button(
+        label="📊 Export Jobs",
+        data=functools.partial(export_jobs_file, job_export_format, job_export_since if since_valid else None),
+        file_name=f"jobs_export.{job_export_format}",
+        mime=JOB_EXPORT_MIME_TYPES[job_export_format],
+        use_container_width=True,
+        disabled=not since_valid,
+        help="Download every discovered job with its approval and latest AI evaluation, for analysis in other tools."
+    )
+
+st.sidebar.button("🧹 Apply Retention Policies",
+                  on_click=apply_retention_action,
+                  disabled=st.session_state.get('scan_actively_processing_in_this_run', False),
+                  use_container_width=True,
+                  key="apply_retention_button",
+                  help="Drop descriptions of old rejected jobs and move old archived applications out of the active tables ([retention] in config.toml), then compact the database in small steps.")
+
 # Import Database Button
-if st.sidebar.button("📥 Import Database", use_container_width=True, key="show_db_uploader_button", help="Click to upload a database file. This will replace the current database if valid."):
+if st.sidebar.button("📥 Import Database", use_container_width=True, key="show_db_uploader_button", help="Click to upload a database file. This will replace the current database if valid.", disabled=BACKEND != "sqlite" or st.session_state.get('scan_actively_processing_in_this_run', False)):
     st.session_state.show_db_uploader = True
 
 if st.session_state.show_db_uploader:
@@ -396,20 +573,23 @@ if st.session_state.show_db_uploader:
 
         try:
             with open(temp_upload_path, "wb") as f:
-                f.write(uploaded_db_file.getvalue())
+                shutil.copyfileobj(uploaded_db_file, f, UPLOAD_CHUNK_BYTES) # Stream to disk in chunks
             
-            is_valid, message = is_valid_database_schema(temp_upload_path)
+            is_valid, message = check_database_file(temp_upload_path) # PRAGMA quick_check
+            if is_valid:
+                is_valid, message = is_valid_database_schema(temp_upload_path)
             
             if is_valid:
                 if DB_PATH:
-                    shutil.move(temp_upload_path, DB_PATH) # Replace current DB
+                    replace_database(temp_upload_path) # Swapped in one transaction; readers see the old DB until it commits
+                    init_db() # Add any tables/columns the imported file predates
                     st.session_state.db_import_export_message = {"type": "success", "text": "Database imported successfully!"}
                      # Clear relevant caches or trigger re-initialization if needed
                     # Potentially re-initialize parts of the app or just rerun
                 else:
                     st.session_state.db_import_export_message = {"type": "error", "text": "DB_PATH not configured. Cannot save imported database."}
             else:
-                st.session_state.db_import_export_message = {"type": "error", "text": f"Invalid DB schema: {message}"}
+                st.session_state.db_import_export_message = {"type": "error", "text": f"Invalid database: {message}"}
                 if temp_upload_path.exists(): temp_upload_path.unlink() # Clean up invalid file
 
         except Exception as e:
@@ -436,10 +616,15 @@ if st.session_state.get('scan_actively_processing_in_this_run', False):
 
         if scrape_phase and st.session_state.current_scan_stop_signal is not None:
             if not st.session_state.current_scan_stop_signal[0]: # If not already signaled to stop
-                new_jobs, links_examined = scrape_phase(st.session_state.current_scan_stop_signal)
-                if not st.session_state.current_scan_stop_signal[0]: # Check if scrape_phase was stopped by signal during its run
-                    scan_outcome_message = f"Scan complete. New jobs: {new_jobs}. Links examined: {links_examined}."
-                    natural_completion = True 
+                try:
+                    new_jobs, links_examined = scrape_phase(st.session_state.current_scan_stop_signal)
+                except ImportError as e:
+                    scan_outcome_message = f"Scan function not available ({e}). Scan aborted."
+                    natural_completion = True # Nothing to resume
+                else:
+                    if not st.session_state.current_scan_stop_signal[0]: # Check if scrape_phase was stopped by signal during its run
+                        scan_outcome_message = f"Scan complete. New jobs: {new_jobs}. Links examined: {links_examined}."
+                        natural_completion = True 
                 # If current_scan_stop_signal[0] is True here, stop_scan_action already set the message.
             else: # Signal was true before calling scrape_phase
                 scan_outcome_message = "Scan execution pre-empted by stop signal."
@@ -460,6 +645,24 @@ if st.session_state.get('scan_actively_processing_in_this_run', False):
     main_page_status_placeholder.empty() 
     st.rerun()
 
+# Conditional execution of a re-evaluation run, with a progress bar
+if st.session_state.get('reeval_actively_processing', False):
+    with main_page_status_placeholder.container(), st.spinner("♻️ Re-evaluating analyzed jobs..."):
+        reeval_progress_bar = st.progress(0.0, text="Re-evaluating...")
+        def _show_reeval_progress(done, total):
+            reeval_progress_bar.progress(min(done / total, 1.0) if total else 1.0, text=f"Re-evaluated {done}/{total} jobs")
+        try:
+            reeval_summary = reevaluate.run(st.session_state.reeval_stop_signal, progress=_show_reeval_progress)
+            st.session_state.scan_message = (
+                f"Re-evaluation {reeval_summary['status']}: {reeval_summary['processed']}/{reeval_summary['total']} jobs, "
+                f"{reeval_summary['approved']} approved, {reeval_summary['revoked']} revoked, {reeval_summary['errors']} errors."
+            )
+        except Exception as e:
+            st.session_state.scan_message = f"Error during re-evaluation: {e}"
+        st.session_state.reeval_actively_processing = False
+    main_page_status_placeholder.empty()
+    st.rerun()
+
 # --- Display Approved Jobs ---
 # Show jobs if not actively trying to scan in this run
 if not st.session_state.get('scan_actively_processing_in_this_run', False):
@@ -477,14 +680,58 @@ if not st.session_state.get('scan_actively_processing_in_this_run', False):
         # st.session_state.action_message = {}
 
 
-    approved_jobs_df = fetch_approved_jobs()
-
-    if approved_jobs_df.empty:
+    col_search, col_sort = st.columns([3, 2])
+    with col_search:
+        search_text = st.text_input("🔎 Search approved jobs", key="approved_search", on_change=reset_approved_pages,
+                                    placeholder='e.g. splunk "incident response"',
+                                    help='Full-text search over titles and descriptions. All words must match; use "quotes" for phrases, word* for prefixes and OR for alternatives.')
+    with col_sort:
+        sort_by = st.radio("Sort by", list(APPROVED_SORT_KEYS), horizontal=True, key="approved_sort_by", on_change=reset_approved_pages,
+                           help="Best match ranks jobs by local TF-IDF similarity to your resume. Search results are ranked by how well they match the search.")
+    if sort_by == "Best match" and relevance is not None:
+        try:
+            relevance.ensure_scores_current() # Full rescore only when the resume changed
+        except Exception as e:
+            st.error(f"Could not compute relevance scores: {e}")
+
+    page_size = get_page_size()
+    page_cursors = st.session_state.approved_page_cursors
+    approved_jobs_df, next_cursor = fetch_approved_jobs(sort_by, search_text, page_cursors[-1], page_size)
+    if approved_jobs_df.empty and len(page_cursors) > 1:
+        # Every job on this page was applied to or deleted: fall back to the previous page
+        prev_approved_page()
+        st.rerun()
+
+    if approved_jobs_df.empty and search_text.strip():
+        st.info(f"No approved jobs match '{search_text}'.")
+    elif approved_jobs_df.empty:
         st.warning("No approved jobs found in the database. Click Start New Job Scan to begin.")
     else:
-        st.metric(label="Total Approved Jobs", value=len(approved_jobs_df))
+        total_approved = count_pending_approved(search_text)
+        st.metric(label="Matching Approved Jobs" if search_text.strip() else "Total Approved Jobs", value=total_approved)
+        page_number = len(page_cursors)
+        first_shown = (page_number - 1) * page_size + 1
+        st.caption(f"Page {page_number} · showing {first_shown}–{first_shown + len(approved_jobs_df) - 1} of {total_approved}")
         # st.markdown("---") # Removed initial redundant separator here, separator will be after each card
 
+        # Bulk actions on the jobs ticked on this page
+        selected_pks = selected_approved_pks()
+        col_select, col_clear, col_bulk_applied, col_bulk_delete = st.columns(4)
+        with col_select:
+            st.button("☑️ Select Page", key="approved_select_page", on_click=select_approved_page,
+                      args=([int(pk) for pk in approved_jobs_df['approved_job_pk']],), use_container_width=True)
+        with col_clear:
+            st.button("Clear Selection", key="approved_clear_selection", on_click=clear_approved_selection,
+                      disabled=not selected_pks, use_container_width=True)
+        with col_bulk_applied:
+            st.button(f"Mark {len(selected_pks)} as Applied", key="approved_bulk_applied", on_click=mark_applied_action,
+                      args=(selected_pks,), disabled=not selected_pks, use_container_width=True,
+                      help="Mark every selected job as applied for.")
+        with col_bulk_delete:
+            st.button(f"Delete {len(selected_pks)} Jobs", key="approved_bulk_delete", on_click=delete_jobs_action,
+                      args=(selected_pks,), disabled=not selected_pks, use_container_width=True, type="primary",
+                      help="Remove every selected job from the approved list.")
+
         for index, row in approved_jobs_df.iterrows():
             with st.container(): # WRAP each job in a container
                 approved_job_pk = row['approved_job_pk']
@@ -494,6 +741,9 @@ if not st.session_state.get('scan_actively_processing_in_this_run', False):
                 location_val = row.get('location', 'N/A')
                 keyword_val = row.get('keyword', 'N/A')
                 reason_val = html.escape(str(row.get('reason', 'N/A')))
+                duplicate_count = int(row.get('duplicate_count', 0) or 0)
+                duplicate_urls = str(row.get('duplicate_urls') or '').split()
+                relevance_score = row.get('relevance_score')
 
                 # Use two columns: one for details, one for actions
                 col_details, col_actions = st.columns([5, 1.5]) # Adjusted column ratio
@@ -502,40 +752,47 @@ if not st.session_state.get('scan_actively_processing_in_this_run', False):
                     # Make title larger and a styled link
                     st.markdown(f"<h5><a href='{url}' target='_blank' style='text-decoration: none; color: inherit !important;'>{title}</a></h5>", unsafe_allow_html=True)
                     
-                    st.caption(f"📅 Approved: {date_approved_val} | 📍 Location: {location_val} | 🔑 Keyword: {keyword_val}")
+                    match_text = f" | 🎯 Match: {relevance_score:.2f}" if pd.notna(relevance_score) else ""
+                    st.caption(f"📅 Approved: {date_approved_val} | 📍 Location: {location_val} | 🔑 Keyword: {keyword_val}{match_text}")
                     
                     with st.expander("Reason for Approval"):
                         st.markdown(f"<div style='word-wrap: break-word; white-space: pre-wrap;'>{reason_val}</div>", unsafe_allow_html=True)
 
+                    # Near-duplicate postings are collapsed under their canonical job
+                    if duplicate_count:
+                        with st.expander(f"Also posted as {duplicate_count} other listing{'s' if duplicate_count != 1 else ''}"):
+                            for dup_url in duplicate_urls:
+                                st.markdown(f"- [{html.escape(dup_url)}]({dup_url})")
+
                 with col_actions:
-                    # ADDED: Attempt to add some vertical space to align buttons better
-                    st.markdown("<br>", unsafe_allow_html=True) # Adjust <br> count or use specific margin if needed
-                    # st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True) # Alternative spacing
+                    st.checkbox("Select", key=f"{APPROVED_SELECT_PREFIX}{approved_job_pk}")
 
                     applied_button_key = f"applied_{approved_job_pk}_{index}"
                     delete_button_key = f"delete_{approved_job_pk}_{index}"
 
-                    if st.button("Mark as Applied", key=applied_button_key, 
-                                  help="Mark this job as applied for.", 
-                                  use_container_width=True):
-                        if mark_job_as_applied(approved_job_pk):
-                            st.session_state.action_message = {"type": "success", "text": f"Job '{title[:30]}...' marked as applied."}
-                        st.rerun()
+                    st.button("Mark as Applied", key=applied_button_key, 
+                              help="Mark this job as applied for.", 
+                              use_container_width=True,
+                              on_click=mark_applied_action, args=([int(approved_job_pk)], f"Job '{title[:30]}...'"))
                     
                     # Add a little space between buttons if they are stacked vertically in the same column
                     st.markdown("<div style='margin-top: 8px;'></div>", unsafe_allow_html=True)
 
-                    if st.button("Delete Job", key=delete_button_key, 
-                                 help="Remove this job from the approved list.", 
-                                 use_container_width=True, type="primary"):
-                        if delete_approved_job(approved_job_pk):
-                            st.session_state.action_message = {"type": "success", "text": f"Job '{title[:30]}...' deleted from approved list."}
-                        else:
-                            st.session_state.action_message = {"type": "error", "text": f"Failed to delete job '{title[:30]}...' (DB error or not found)."}
-                        st.rerun()
+                    st.button("Delete Job", key=delete_button_key, 
+                              help="Remove this job from the approved list.", 
+                              use_container_width=True, type="primary",
+                              on_click=delete_jobs_action, args=([int(approved_job_pk)], f"Job '{title[:30]}...'"))
             
             st.markdown("---") # Separator after each job card
 
+        col_prev, col_next = st.columns(2)
+        with col_prev:
+            st.button("◀ Previous", key="approved_prev_page", on_click=prev_approved_page,
+                      disabled=page_number == 1, use_container_width=True)
+        with col_next:
+            st.button("Next ▶", key="approved_next_page", on_click=next_approved_page, args=(next_cursor,),
+                      disabled=next_cursor is None, use_container_width=True)
+
 # --------------------------- Config Reload Button ---------------------------------
 if st.button("🔄 Reload Configuration"):
     try:
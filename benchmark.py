@@ -0,0 +1,191 @@
+# benchmark.py
+# Offline throughput benchmark for the evaluation pipeline.
+#
+# Runs against the "mock" AI provider and a throw-away SQLite database, so it
+# needs no API keys and never touches database.db.  Example:
+#
+#   python benchmark.py --jobs 200 --concurrency 1,5,10,20 --latency-ms 800 --error-rate 0.02
+
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List
+
+import database
+import mock_llm
+import evaluate
+import scrape
+from utils import percentile
+
+MODES = ("analyze", "batch", "scrape")
+
+_VOCABULARY = (
+    "security analyst incident response siem splunk python cloud aws azure network firewall "
+    "triage alerts threat intelligence vulnerability management compliance soc linux windows "
+    "scripting automation detection engineering forensics endpoint identity access policy "
+    "monitoring reporting stakeholders documentation certification clearance hybrid onsite"
+).split()
+
+
+def synthetic_description(rng: random.Random, index: int) -> str:
+    """A posting with the usual sections; the word salad keeps postings distinct for the dedupe index."""
+    def words(n: int) -> str:
+        return " ".join(rng.choice(_VOCABULARY) for _ in range(n))
+    return (
+        f"About the job Posting {index}. {words(25).capitalize()}.\n"
+        f"Responsibilities: {words(40)}.\n"
+        f"• {words(12)}\n"
+        f"Requirements: {words(40)}.\n"
+        f"• {words(12)}\n"
+        f"Benefits: We offer 401(k) matching, dental and vision insurance and paid time off.\n"
+        f"We are an equal opportunity employer and consider applicants without regard to national origin."
+    )
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+        ok = True
+    except Exception as e:
+        result, ok = e, False
+    return result, ok, (time.perf_counter() - start) * 1000
+
+
+def run_analyze(descriptions: List[str], concurrency: int) -> Dict[str, Any]:
+    """analyze_job called from a thread pool, one job per task."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda d: _timed(evaluate.analyze_job, d, provider="mock"), descriptions))
+    return {
+        "elapsed": time.perf_counter() - start,
+        "latencies": [latency for _, _, latency in results],
+        "errors": sum(1 for _, ok, _ in results if not ok),
+        "approved": sum(1 for r, ok, _ in results if ok and r.get("eligible")),
+    }
+
+
+def run_batch(descriptions: List[str], concurrency: int) -> Dict[str, Any]:
+    """batch_analyse_jobs with max_workers; each analyze_job call it makes is timed, failures included."""
+    latencies: List[float] = []
+    analyze_job = evaluate.analyze_job
+
+    def timed_analyze_job(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return analyze_job(*args, **kwargs)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    evaluate.analyze_job = timed_analyze_job # batch_analyse_jobs looks it up per call
+    try:
+        start = time.perf_counter()
+        results = evaluate.batch_analyse_jobs(
+            descriptions, max_workers=concurrency, return_exceptions=True, provider="mock"
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        evaluate.analyze_job = analyze_job
+    return {
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "errors": sum(1 for r in results if isinstance(r, Exception)),
+        "approved": sum(1 for r in results if isinstance(r, dict) and r.get("eligible")),
+    }
+
+
+def run_scrape(descriptions: List[str], concurrency: int, id_offset: int) -> Dict[str, Any]:
+    """The scraper's evaluation path (dedupe, LLM, approve, mark analyzed) on stored stubs."""
+    jobs = []
+    for i, desc in enumerate(descriptions):
+        job_id = id_offset + i
+        url = f"https://www.linkedin.com/jobs/view/{job_id}/"
+        jobs.append((job_id, f"Benchmark Job {job_id}", desc, url))
+    database.insert_stubs([(job_id, url, "Benchmark", "benchmark") for job_id, _, _, url in jobs])
+    for job_id, title, desc, _ in jobs:
+        database.update_details(job_id, title, desc)
+
+    # _evaluate_and_record reports approvals/errors on stdout; keep the report readable
+    start = time.perf_counter()
+    database.start_writer() # As during a scan: worker writes are group-committed
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(
+                    lambda job: _timed(scrape._evaluate_and_record, *job, provider="mock"), jobs
+                ))
+    finally:
+        database.stop_writer()
+    elapsed = time.perf_counter() - start
+    outcomes = [r for r, ok, _ in results if ok]
+    return {
+        "elapsed": elapsed,
+        "latencies": [latency for _, _, latency in results],
+        "errors": sum(1 for r, ok, _ in results if not ok or r == "error"),
+        "approved": outcomes.count("approved"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark evaluation throughput with the mock AI provider.")
+    parser.add_argument("--jobs", type=int, default=100, help="Jobs evaluated per mode and concurrency level.")
+    parser.add_argument("--concurrency", default="1,5,10", help="Comma-separated worker counts.")
+    parser.add_argument("--mode", default=",".join(MODES), help=f"Comma-separated modes: {', '.join(MODES)}.")
+    parser.add_argument("--latency-ms", type=float, default=None, help="Median mock latency (default: [mock] config).")
+    parser.add_argument("--sigma", type=float, default=None, help="Log-normal latency shape.")
+    parser.add_argument("--error-rate", type=float, default=None, help="Fraction of mock calls that fail.")
+    parser.add_argument("--approve-rate", type=float, default=None, help="Fraction of jobs the mock approves.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic descriptions.")
+    args = parser.parse_args()
+
+    overrides = {
+        "latency_ms_median": args.latency_ms,
+        "latency_sigma": args.sigma,
+        "error_rate": args.error_rate,
+        "approve_rate": args.approve_rate,
+    }
+    mock_llm.set_overrides(**{k: v for k, v in overrides.items() if v is not None})
+
+    modes = [m.strip() for m in args.mode.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.use_backend("sqlite") # Whatever [storage] says, measure against a throw-away file
+        database.DB_PATH = Path(tmp) / "benchmark.db"
+        database.init_db()
+
+        settings = mock_llm.get_settings()
+        print("──────────────── Evaluation Throughput Benchmark ────────────────")
+        print(f"jobs/run={args.jobs}  mock latency median={settings['latency_ms_median']}ms "
+              f"sigma={settings['latency_sigma']}  error_rate={settings['error_rate']}")
+        print(f"{'mode':<8} {'workers':>7} {'jobs/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'approved':>9}")
+
+        id_offset = 1
+        for mode in modes:
+            for level in levels:
+                descriptions = [synthetic_description(rng, i) for i in range(args.jobs)]
+                if mode == "analyze":
+                    stats = run_analyze(descriptions, level)
+                elif mode == "batch":
+                    stats = run_batch(descriptions, level)
+                else:
+                    stats = run_scrape(descriptions, level, id_offset)
+                    id_offset += len(descriptions)
+                latencies = stats["latencies"]
+                print(f"{mode:<8} {level:>7} {len(descriptions) / stats['elapsed']:>8.2f} "
+                      f"{percentile(latencies, 50):>8.0f} {percentile(latencies, 95):>8.0f} "
+                      f"{percentile(latencies, 99):>8.0f} {stats['errors']:>7} {stats['approved']:>9}")
+        print("─────────────────────────────────────────────────────────────────")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# check_dedupe.py
+# Measures near-duplicate detection end to end (fingerprint, band lookup,
+# Hamming check) on a throw-away SQLite database, so it never touches
+# database.db.  Each canonical posting is reposted for another city with the
+# city named 1-3 times, which must be matched; postings that share a template
+# but differ in 30% of their words must not be.  Exits non-zero if recall
+# drops below MIN_RECALL or a distinct posting is matched.
+#
+#   python check_dedupe.py [--postings 100]
+
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+import database
+import dedupe
+
+MIN_RECALL = 0.85
+POSTING_WORDS = 350
+TEMPLATE_CHANGE = 0.3   # Share of words that differ between distinct postings
+CITIES = ["Austin", "Denver", "Boston", "Chicago", "Seattle", "Atlanta", "Phoenix", "Dallas",
+          "San Francisco", "New York"]
+TITLE = "Security Analyst"
+
+
+class Postings:
+    """Deterministic posting text: Zipf-distributed words, like real descriptions."""
+
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        self.vocab = ["".join(self.rng.choice(letters) for _ in range(self.rng.randint(2, 9))) for _ in range(3000)]
+        self.weights = [1 / (rank + 1) for rank in range(len(self.vocab))]
+
+    def words(self, count: int = POSTING_WORDS) -> List[str]:
+        return self.rng.choices(self.vocab, self.weights, k=count)
+
+    def with_city(self, words: List[str], city: str, mentions: int) -> str:
+        text = list(words)
+        step = len(text) // (mentions + 1)
+        for mention in range(mentions, 0, -1):
+            text.insert(mention * step, city)
+        return " ".join(text)
+
+    def variant(self, words: List[str]) -> List[str]:
+        changed = list(words)
+        for i in self.rng.sample(range(len(changed)), int(len(changed) * TEMPLATE_CHANGE)):
+            changed[i] = self.rng.choices(self.vocab, self.weights)[0]
+        return changed
+
+
+def add_posting(job_id: int, description: str, analyzed: bool) -> None:
+    database.insert_stub(job_id, f"https://www.linkedin.com/jobs/view/{job_id}/", "Remote", "analyst")
+    database.update_details(job_id, TITLE, description)
+    if analyzed:
+        dedupe.index_posting(job_id, TITLE, description)
+        database.mark_job_as_analyzed(job_id)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure near-duplicate recall for per-city reposts.")
+    parser.add_argument("--postings", type=int, default=100, help="Canonical postings to repost")
+    args = parser.parse_args()
+
+    postings = Postings()
+    all_ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        database.use_backend("sqlite")
+        database.DB_PATH = Path(tmp) / "check_dedupe.db"
+        database.init_db()
+
+        bases = []
+        for i in range(args.postings):
+            words = postings.words()
+            city, other_city = postings.rng.sample(CITIES, 2)
+            job_id = 600000 + i
+            add_posting(job_id, postings.with_city(words, city, 1), analyzed=True)
+            bases.append((job_id, words, other_city))
+
+        next_id = 700000
+        for mentions in (1, 2, 3):
+            found = 0
+            for job_id, words, other_city in bases:
+                description = postings.with_city(words, other_city, mentions)
+                add_posting(next_id, description, analyzed=False)
+                canonical = dedupe.find_canonical(next_id, TITLE, description)
+                found += canonical is not None and canonical["job_id"] == job_id
+                next_id += 1
+            recall = found / len(bases)
+            all_ok &= recall >= MIN_RECALL
+            print(f"[{'OK' if recall >= MIN_RECALL else 'LOW'}] city named {mentions}x: "
+                  f"{found}/{len(bases)} reposts matched ({recall:.0%})")
+
+        false_matches = 0
+        for job_id, words, other_city in bases:
+            description = postings.with_city(postings.variant(words), other_city, 1)
+            add_posting(next_id, description, analyzed=False)
+            false_matches += dedupe.find_canonical(next_id, TITLE, description) is not None
+            next_id += 1
+        all_ok &= false_matches == 0
+        print(f"[{'OK' if not false_matches else 'FALSE MATCH'}] distinct postings from one template: "
+              f"{false_matches}/{len(bases)} matched")
+        database.reset_connections()
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
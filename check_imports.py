@@ -0,0 +1,100 @@
+# check_imports.py
+# Import-time benchmark for the modules the pages and command-line tools load
+# at startup.  Each entry point is imported in a fresh interpreter with
+# `python -X importtime`; the report gives its total import time and slowest
+# imports, and fails (exit status 1) if it pulled in a module it should only
+# load on first use, such as the AI provider SDKs or the scraper.
+#
+#   python check_imports.py
+#   python check_imports.py --runs 5 --top 10 --max-ms 500
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Set, Tuple
+
+AI_SDKS = ("openai", "google.generativeai")
+SCRAPER = ("scrape", "requests", "bs4")
+PAGE_LIBRARIES = ("pandas", "altair", "pyarrow")
+
+# entry point -> (import statement, modules it must not load)
+ENTRY_POINTS = {
+    "database (setup.py, check_plans.py)": ("import database", AI_SDKS + SCRAPER + PAGE_LIBRARIES + ("evaluate", "numpy", "psycopg2")),
+    "dashboard modules": ("import database, query_cache, reevaluate, relevance, retention, export_jobs", AI_SDKS + SCRAPER + PAGE_LIBRARIES),
+    "page queries (Applied Jobs, Statistics)": ("import database, query_cache", AI_SDKS + SCRAPER + PAGE_LIBRARIES + ("evaluate",)),
+    "retention.py": ("import retention", AI_SDKS + SCRAPER + PAGE_LIBRARIES),
+    "export_jobs.py": ("import export_jobs", AI_SDKS + SCRAPER + PAGE_LIBRARIES),
+    "reevaluate.py": ("import reevaluate", AI_SDKS + SCRAPER + PAGE_LIBRARIES),
+    "evaluation_queue.py": ("import evaluation_queue", AI_SDKS + SCRAPER + PAGE_LIBRARIES),
+    "search_planner.py": ("import search_planner", AI_SDKS + SCRAPER + PAGE_LIBRARIES),
+    "scrape.py": ("import scrape", AI_SDKS + PAGE_LIBRARIES),
+}
+
+# "import time: self [us] | cumulative | imported package", nested imports indented
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def measure(statement: str) -> List[Tuple[str, int, int]]:
+    """(module, nesting depth, cumulative us) for every module *statement* imports, in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=Path(__file__).resolve().parent, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    imports = []
+    for line in result.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            imports.append((m.group(4), len(m.group(3)) // 2, int(m.group(2))))
+    return imports
+
+
+def check(statement: str, forbidden: Tuple[str, ...], runs: int, startup: Set[str]) -> Dict[str, Any]:
+    """Best-of-*runs* total import time, the slowest direct imports of the entry point and any forbidden
+    modules loaded.  Modules in *startup* are imported by the interpreter itself and not counted.
+    """
+    best = None
+    for _ in range(runs):
+        imports = [item for item in measure(statement) if item[0] not in startup]
+        total_us = sum(cumulative for _, depth, cumulative in imports if depth == 0)
+        if best is None or total_us < best[0]:
+            best = (total_us, imports)
+    total_us, imports = best
+    loaded = {module for module, _, _ in imports}
+    return {
+        "total_ms": total_us / 1000,
+        "slowest": sorted(((module, cumulative / 1000) for module, depth, cumulative in imports if depth == 1),
+                          key=lambda item: -item[1]),
+        "forbidden": sorted(module for module in forbidden if module in loaded),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure and check the import time of JobFinder's entry points.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per entry point; the fastest counts (default: 3).")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports listed per entry point (default: 5).")
+    parser.add_argument("--max-ms", type=float, default=0, help="Also fail an entry point slower than this (default: no limit).")
+    args = parser.parse_args()
+
+    startup = {module for module, _, _ in measure("pass")}
+    all_ok = True
+    for name, (statement, forbidden) in ENTRY_POINTS.items():
+        report = check(statement, forbidden, max(1, args.runs), startup)
+        too_slow = args.max_ms > 0 and report["total_ms"] > args.max_ms
+        ok = not report["forbidden"] and not too_slow
+        all_ok &= ok
+        print(f"[{'OK' if ok else 'FAIL'}] {name}: {report['total_ms']:.0f} ms")
+        if report["forbidden"]:
+            print(f"    loads at import: {', '.join(report['forbidden'])}")
+        if too_slow:
+            print(f"    slower than --max-ms {args.max_ms:.0f}")
+        for module, ms in report["slowest"][:args.top]:
+            print(f"    {ms:8.1f} ms  {module}")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# check_plans.py
+# Verifies that the Dashboard, Applied Jobs and unapproved-jobs queries are
+# served by their indexes (EXPLAIN QUERY PLAN).  Exits non-zero if one is not.
+#
+#   python check_plans.py
+
+import sys
+
+import database
+
+
+def main() -> int:
+    all_ok = True
+    for name, (ok, plan) in database.check_query_plans().items():
+        all_ok &= ok
+        print(f"[{'OK' if ok else 'MISSING INDEX'}] {name} (expects {database.EXPECTED_QUERY_INDEXES[name][1]})")
+        for line in plan:
+            print(f"    {line}")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
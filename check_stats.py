@@ -0,0 +1,91 @@
+# check_stats.py
+# Verifies that the trigger-maintained job_stats agree with a full rebuild
+# (SQL_REBUILD_JOB_STATS) after the writes that move counts around: approvals,
+# applications, archiving by retention.py, keyword, location and date edits,
+# and deletes.  Runs on a throw-away SQLite database, so it never touches
+# database.db; exits non-zero if a dimension disagrees.
+#
+#   python check_stats.py
+
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple, Callable, List
+
+import database
+
+DIMENSIONS = ("keyword", "location", "day")
+JOBS = 60
+
+
+def snapshot() -> Dict[str, object]:
+    """The funnel and every per-dimension row, as the Statistics page reads them."""
+    stats: Dict[str, object] = {"total": database.fetch_job_funnel()}
+    for dimension in DIMENSIONS:
+        stats[dimension] = sorted(tuple(row) for row in database.fetch_job_stats(dimension))
+    return stats
+
+
+def execute(sql: str, params: tuple = ()) -> None:
+    with database.get_conn() as conn:
+        conn.execute(sql, params)
+
+
+def populate() -> None:
+    """Discovers, analyzes, approves and applies to JOBS jobs over three keywords and locations."""
+    for i in range(JOBS):
+        job_id = 500000 + i
+        database.insert_stub(job_id, f"https://www.linkedin.com/jobs/view/{job_id}/",
+                             ["Remote", "Berlin", "Austin"][i % 3], ["analyst", "engineer", "architect"][i // 3 % 3])
+        database.update_details(job_id, f"Security Analyst {job_id}", f"Monitor alerts for job {job_id}.")
+        database.mark_job_as_analyzed(job_id)
+        if i % 2 == 0:
+            database.approve_job(job_id, "Stats check approval")
+    with database.get_conn() as conn:
+        pks = [row["id"] for row in conn.execute("SELECT id FROM approved_jobs ORDER BY id;")]
+    for pk in pks[::2]:
+        database.mark_job_as_applied(pk)
+
+
+def archive() -> None:
+    """Archives the applications and lets retention move them to approved_jobs_archive."""
+    database.archive_all_applied_jobs()
+    execute("UPDATE approved_jobs SET date_applied = datetime(date_applied, '-400 days') WHERE is_archived = TRUE;")
+    database.archive_applied_jobs(365, JOBS)
+
+
+STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("approvals and applications", populate),
+    ("archiving applied jobs", archive),
+    ("keyword edits", lambda: execute("UPDATE discovered_jobs SET keyword = 'renamed' WHERE job_id % 3 = 0;")),
+    ("location edits", lambda: execute("UPDATE discovered_jobs SET location = 'Denver' WHERE job_id % 5 = 0;")),
+    ("date edits", lambda: execute("UPDATE discovered_jobs SET date_discovered = '2024-01-01 00:00:00' WHERE job_id % 7 = 0;")),
+    ("revoking approvals", lambda: execute("DELETE FROM approved_jobs WHERE id % 3 = 0;")),
+    ("deleting jobs", lambda: execute("DELETE FROM discovered_jobs WHERE job_id % 4 = 0;")),
+]
+
+
+def main() -> int:
+    all_ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        database.use_backend("sqlite")
+        database.DB_PATH = Path(tmp) / "check_stats.db"
+        database.init_db()
+        for name, step in STEPS:
+            step()
+            stored = snapshot()
+            database.rebuild_job_stats()
+            rebuilt = snapshot()
+            wrong = [dimension for dimension in stored if stored[dimension] != rebuilt[dimension]]
+            all_ok &= not wrong
+            print(f"[{'OK' if not wrong else 'MISMATCH'}] after {name}"
+                  + (f": {', '.join(wrong)} differ from a rebuild" if wrong else ""))
+            for dimension in wrong:
+                print(f"    stored:  {stored[dimension]}")
+                print(f"    rebuilt: {rebuilt[dimension]}")
+        database.reset_connections()
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
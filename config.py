@@ -33,7 +33,8 @@ FLEXIBLE Criteria (job should ideally meet these, but can be flexible):
 Do NOT reject the job solely for:
 - Asking for 1-2 years of experience
 - Requiring specific tools experience
-- Listing certifications as requirements (unless explicitly marked as "must have before starting")"""
+- Listing certifications as requirements (unless explicitly marked as "must have before starting")""",
+        "token_budget": 0 # Estimated tokens per evaluation prompt; 0 sends full descriptions (no trimming)
     },
     "api_keys": { # New section for API keys
         "google_api_key": "YOUR_GOOGLE_API_KEY_HERE",
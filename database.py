@@ -1,29 +1,332 @@
 # database.py
 
 from pathlib import Path
+import json
+import re
+import zlib
+import functools
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
-from typing import Iterable, Dict, Any, Optional, Tuple, List
-from scrape import _JOB_ID_RE
+from typing import Iterable, Iterator, Dict, Any, Optional, Tuple, List, Callable
 from utils import DB_PATH
 
 # -- DB location -------------------------------------------------------------
 
+# LinkedIn job ID in a /jobs/view/ URL path; shared with scrape.py
+_JOB_ID_RE = re.compile(r"/jobs/view/(?:[^/?]*-)?(\d+)(?:[/?]|$)")
 
 # -- connection helpers ------------------------------------------------------
+# Each thread keeps one connection per database file and reuses it across
+# helpers; WAL lets the Streamlit pages read while a scan is writing.
+BUSY_TIMEOUT_MS = 5000
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};",
+    "PRAGMA synchronous = NORMAL;",       # Safe with WAL; fsync only at checkpoints
+    "PRAGMA mmap_size = 268435456;",      # 256 MiB memory-mapped reads
+    "PRAGMA cache_size = -65536;",        # 64 MiB page cache per connection
+)
+
+DESCRIPTION_COMPRESSION_LEVEL = 6
+
+_local = threading.local()
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    return zlib.compress(text.encode("utf-8"), DESCRIPTION_COMPRESSION_LEVEL) if text is not None else None
+
+
+def decompress_text(blob: Optional[bytes]) -> Optional[str]:
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else None
+
+
+def _open_connection(path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row       # fetch rows as dict‑like objects
+    # Descriptions are stored compressed (job_descriptions); queries decode them with these. The schema
+    # (views, triggers) must not call them, so that any SQLite client can read and write the file.
+    conn.create_function("compress_text", 1, compress_text, deterministic=True)
+    conn.create_function("decompress_text", 1, decompress_text, deterministic=True)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _thread_connection() -> sqlite3.Connection:
+    """This thread's connection, reopened if DB_PATH changed or reset_connections() was called."""
+    key = (str(DB_PATH), _generation)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.key != key and _local.depth == 0:
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = _open_connection(DB_PATH)
+        _local.conn, _local.key, _local.depth = conn, key, 0
+    return conn
+
+
+def close_connection() -> None:
+    """Closes the calling thread's cached connection, if any."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.depth == 0:
+        conn.close()
+        _local.conn = None
+
+
+def reset_connections() -> None:
+    """Makes every thread reconnect on its next get_conn() (e.g. after the database file was replaced)."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    close_connection()
+
+
 @contextmanager
 def get_conn():
-    """Context‑managed connection that commits on success and rolls back on error."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row       # fetch rows as dict‑like objects
+    """Context‑managed connection that commits on success and rolls back on error.
+    Reuses the calling thread's connection; nested blocks share the outermost transaction.
+    """
+    conn = _thread_connection()
+    _local.depth += 1
     try:
         yield conn
-        conn.commit()
+        if _local.depth == 1:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if _local.depth == 1:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        _local.depth -= 1
+
+
+_version_conn: Optional[Tuple[Tuple[str, int], sqlite3.Connection]] = None
+_version_lock = threading.Lock()
+
+
+def data_version() -> Tuple[str, int, int]:
+    """A token that changes whenever any connection or process commits to the database (query_cache.py).
+    PRAGMA data_version only moves for commits made by *other* connections, so it is read on
+    a connection of its own that never writes.
+    """
+    global _version_conn
+    key = (str(DB_PATH), _generation)
+    with _version_lock:
+        if _version_conn is None or _version_conn[0] != key:
+            if _version_conn is not None:
+                _version_conn[1].close()
+            _version_conn = (key, sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False))
+        return key + (_version_conn[1].execute("PRAGMA data_version;").fetchone()[0],)
+
+
+def checkpoint() -> None:
+    """Copies the WAL into the main database file so the file alone is a complete copy."""
+    with get_conn() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+
+# Export and import copy with the online backup API in steps of BACKUP_PAGES_PER_STEP
+# pages, file to file, so memory use does not grow with the database.
+BACKUP_PAGES_PER_STEP = 256   # 1 MiB per step at the default 4 KiB page size
+BACKUP_MAX_RESTARTS = 3       # Copy restarts (a write landed mid-copy) before finishing in one step
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def _backup_progress(progress: Optional[Callable[[int, int], None]], max_restarts: Optional[int]):
+    """Progress callback for Connection.backup: reports (pages copied, total pages) and
+    aborts the copy once it has been restarted more than *max_restarts* times."""
+    state = {"copied": 0, "restarts": 0}
+
+    def step(status, remaining, total):
+        copied = total - remaining
+        if max_restarts is not None and copied <= state["copied"] and remaining:
+            state["restarts"] += 1
+            if state["restarts"] > max_restarts:
+                raise _BackupRestarted()
+        state["copied"] = copied
+        if progress:
+            progress(copied, total)
+
+    return step
+
+
+def backup_database(dest_path, pages: int = BACKUP_PAGES_PER_STEP, progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """Writes a consistent copy of the live database to *dest_path* while scans keep writing.
+    Each step is a short read on a connection of its own, so neither writers nor checkpoints
+    wait on the copy.  A write committed by another connection restarts it; after
+    BACKUP_MAX_RESTARTS restarts the rest is copied in one step from a single WAL snapshot.
+    *progress* is called with (pages copied, total pages) after each step.
+    """
+    source = _open_connection(DB_PATH)
+    dest = sqlite3.connect(dest_path)
+    try:
+        try:
+            source.backup(dest, pages=pages, progress=_backup_progress(progress, BACKUP_MAX_RESTARTS))
+        except _BackupRestarted:
+            source.backup(dest, progress=_backup_progress(progress, None))
+    finally:
+        dest.close()
+        source.close()
+
+
+def check_database_file(path) -> Tuple[bool, str]:
+    """Opens *path* read-only and runs PRAGMA quick_check. Returns (ok, first problem or "ok")."""
+    try:
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            result = conn.execute("PRAGMA quick_check;").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return False, str(e)
+    return result == "ok", result
+
+
+def replace_database(source_path, pages: int = BACKUP_PAGES_PER_STEP, progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """Overwrites the live database with the contents of another SQLite file.
+    Uses the backup API, so open connections stay valid (unlike replacing the file under WAL).
+    The file is checked first; the copy then holds one write transaction from the first
+    step to the last, so readers see the old database until it commits the whole new one.
+    Raises ValueError if the file fails PRAGMA quick_check.
+    """
+    ok, problem = check_database_file(source_path)
+    if not ok:
+        raise ValueError(f"{source_path} is not an intact SQLite database: {problem}")
+    source = sqlite3.connect(source_path)
+    try:
+        with get_conn() as conn:
+            source.backup(conn, pages=pages, progress=_backup_progress(progress, None))
+    finally:
+        source.close()
+    _migrated_paths.discard(str(DB_PATH))
+    reset_connections()
+
+
+# -- writer thread -----------------------------------------------------------
+# While a scan runs, writes made through @_write_op helpers are queued to one
+# writer thread that commits them in groups: everything queued while the
+# previous group was committing, up to WRITER_BATCH_SIZE operations.  Groups
+# of fire-and-forget writes also wait up to WRITER_WINDOW_MS for company.  A
+# group costs one commit/fsync and the workers never contend for the write lock.  Each operation
+# runs in its own SAVEPOINT: a failing operation is rolled back alone and its
+# caller gets the exception.  Operations are committed in queue order, so once
+# a waited-for write returns, every write queued before it is committed too.
+WRITER_BATCH_SIZE = 200
+WRITER_WINDOW_MS = 10
+
+
+class _Writer:
+    def __init__(self, batch_size: int, window_ms: float):
+        self.batch_size = batch_size
+        self.window_s = window_ms / 1000
+        self.queue: "queue.Queue" = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+
+    def submit(self, fn: Callable, args: tuple, kwargs: dict, wait: bool) -> Future:
+        future: Future = Future()
+        self.queue.put((fn, args, kwargs, future, wait))
+        return future
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window_s
+            # Take what is already queued (it piled up during the previous commit); only
+            # linger for more when nothing waits on this batch
+            while len(batch) < self.batch_size:
+                try:
+                    if any(queued[4] for queued in batch):
+                        item = self.queue.get_nowait()
+                    else:
+                        item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+        close_connection()
+
+    def _commit(self, batch: list) -> None:
+        outcomes = []
+        try:
+            with get_conn() as conn:
+                conn.execute("BEGIN IMMEDIATE;")
+                for fn, args, kwargs, future, wait in batch:
+                    conn.execute("SAVEPOINT write_op;")
+                    try:
+                        outcomes.append((future, fn(*args, **kwargs), None))
+                        conn.execute("RELEASE write_op;")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_op;")
+                        conn.execute("RELEASE write_op;")
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            outcomes = [(future, None, e) for _, _, _, future, _ in batch]
+
+        for (future, result, error), (fn, _, _, _, wait) in zip(outcomes, batch):
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+                if not wait:
+                    print(f"Notice: queued database write {fn.__name__} failed: {error}")
+
+
+_writer: Optional[_Writer] = None
+_writer_lock = threading.Lock()
+
+
+def start_writer(batch_size: int = WRITER_BATCH_SIZE, window_ms: float = WRITER_WINDOW_MS) -> bool:
+    """Routes @_write_op writes through the group-commit writer thread. Returns False if it was already running."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            return False
+        _writer = _Writer(batch_size, window_ms)
+        _writer.thread.start()
+        return True
+
+
+def stop_writer() -> None:
+    """Commits everything still queued and stops the writer thread; writes run inline again."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.queue.put(None)
+        writer.thread.join()
+
+
+def _write_op(wait: bool = True):
+    """Marks a helper as a write. With the writer running, the call is queued to it; if *wait*
+    the caller blocks until the group is committed and gets the return value, otherwise it
+    returns None immediately. Without the writer the helper runs inline as before.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            writer = _writer
+            if writer is None or threading.current_thread() is writer.thread:
+                return fn(*args, **kwargs)
+            future = writer.submit(fn, args, kwargs, wait)
+            return future.result() if wait else None
+        return wrapper
+    return decorator
 
 
 # -- schema ------------------------------------------------------------------
@@ -37,7 +340,8 @@ CREATE TABLE IF NOT EXISTS discovered_jobs (
     location        TEXT,
     keyword         TEXT,
     date_discovered TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    analyzed        BOOLEAN DEFAULT FALSE
+    analyzed        BOOLEAN DEFAULT FALSE,
+    duplicate_of    INTEGER NULL -- discovered_jobs.id of the canonical posting, if a near-duplicate
 );
 """
 
@@ -49,6 +353,7 @@ CREATE TABLE IF NOT EXISTS approved_jobs (
     reason            TEXT,
     date_applied      TIMESTAMP NULL, -- Added new column, allow NULL
     is_archived       BOOLEAN DEFAULT FALSE, -- Added for archiving
+    relevance_score   REAL NULL, -- cosine similarity to the resume (relevance.py)
     FOREIGN KEY (discovered_job_id)
         REFERENCES discovered_jobs(id) ON DELETE CASCADE
 );
@@ -61,33 +366,796 @@ CREATE TABLE IF NOT EXISTS scan_control (
 );
 """
 
+DDL_FINGERPRINTS = """
+CREATE TABLE IF NOT EXISTS job_fingerprints (
+    discovered_job_id INTEGER PRIMARY KEY,
+    simhash           INTEGER NOT NULL, -- 64-bit SimHash, stored signed
+    band0             INTEGER NOT NULL, -- LSH bands of the hash; band4-band7 and the
+    band1             INTEGER NOT NULL, -- 8-bit layout come from DDL_FINGERPRINT_BANDS
+    band2             INTEGER NOT NULL,
+    band3             INTEGER NOT NULL,
+    FOREIGN KEY (discovered_job_id)
+        REFERENCES discovered_jobs(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band0 ON job_fingerprints(band0);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band1 ON job_fingerprints(band1);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band2 ON job_fingerprints(band2);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band3 ON job_fingerprints(band3);
+"""
+
+DDL_PROMPT_METRICS = """
+CREATE TABLE IF NOT EXISTS prompt_metrics (
+    id                        INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at                TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    token_budget              INTEGER,  -- 0 when trimming was disabled
+    original_tokens           INTEGER,  -- estimated prompt size with the full description
+    prompt_tokens             INTEGER,  -- estimated prompt size actually sent
+    description_tokens_before INTEGER,
+    description_tokens_after  INTEGER,
+    sections_total            INTEGER,
+    sections_kept             INTEGER,
+    latency_ms                REAL,
+    eligible                  BOOLEAN NULL
+);
+"""
+
+DDL_EVALUATIONS = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+    discovered_job_id       INTEGER NULL,
+    created_at              TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    provider                TEXT,
+    model                   TEXT,
+    eligible                BOOLEAN NULL,  -- NULL when the call failed
+    reasoning               TEXT,
+    missing_requirements    TEXT,          -- JSON list
+    latency_ms              REAL,
+    prompt_tokens           INTEGER,       -- as reported by the provider
+    completion_tokens       INTEGER,
+    total_tokens            INTEGER,
+    estimated_prompt_tokens INTEGER,       -- offline estimate from prompt_builder
+    error                   TEXT NULL,
+    FOREIGN KEY (discovered_job_id)
+        REFERENCES discovered_jobs(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_created_at ON evaluations(created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_provider_model ON evaluations(provider, model, created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_job ON evaluations(discovered_job_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_latency ON evaluations(latency_ms);
+"""
+
+DDL_REEVALUATION_RUNS = """
+CREATE TABLE IF NOT EXISTS reevaluation_runs (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at        TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at       TIMESTAMP NULL,
+    criteria_hash     TEXT NOT NULL, -- hash of the resume + evaluation prompt being applied
+    status            TEXT NOT NULL DEFAULT 'running', -- running | cancel_requested | cancelled | completed | superseded
+    cursor_discovered TIMESTAMP NULL, -- keyset position: last processed (date_discovered, id)
+    cursor_id         INTEGER NULL,
+    total             INTEGER DEFAULT 0,
+    processed         INTEGER DEFAULT 0,
+    approved          INTEGER DEFAULT 0,
+    revoked           INTEGER DEFAULT 0,
+    errors            INTEGER DEFAULT 0
+);
+"""
+
+DDL_RELEVANCE = """
+CREATE TABLE IF NOT EXISTS job_vectors (
+    discovered_job_id INTEGER PRIMARY KEY,
+    indices           BLOB NOT NULL, -- sorted uint32 hashed-term buckets
+    weights           BLOB NOT NULL, -- float32 sublinear term frequencies, parallel to indices
+    FOREIGN KEY (discovered_job_id)
+        REFERENCES discovered_jobs(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS relevance_df (
+    bucket INTEGER PRIMARY KEY,
+    df     INTEGER NOT NULL DEFAULT 0 -- number of job_vectors containing the bucket
+);
+CREATE TABLE IF NOT EXISTS relevance_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Indexes for the list queries below; check_query_plans() verifies they are used
+DDL_QUERY_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_approved_pending
+    ON approved_jobs(date_approved DESC, discovered_job_id) WHERE date_applied IS NULL;
+CREATE INDEX IF NOT EXISTS idx_approved_applied
+    ON approved_jobs(date_applied DESC, is_archived, discovered_job_id) WHERE date_applied IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_discovered_date ON discovered_jobs(date_discovered DESC, id);
+CREATE INDEX IF NOT EXISTS idx_discovered_analyzed ON discovered_jobs(analyzed, date_discovered DESC, id);
+"""
+
+# Replaces the approved_jobs indexes above for the keyset-paginated lists. Pages order by
+# (date, id), and single-column partial indexes keep rowid as the tie-breaker
+DDL_PAGE_INDEXES = """
+DROP INDEX IF EXISTS idx_approved_pending;
+DROP INDEX IF EXISTS idx_approved_applied;
+CREATE INDEX IF NOT EXISTS idx_approved_pending ON approved_jobs(date_approved) WHERE date_applied IS NULL;
+CREATE INDEX IF NOT EXISTS idx_approved_applied ON approved_jobs(date_applied) WHERE date_applied IS NOT NULL;
+"""
+
+# Full-text index over discovered_jobs (external content: text is not stored twice)
+DDL_JOBS_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, description,
+    content='discovered_jobs', content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_insert AFTER INSERT ON discovered_jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_delete AFTER DELETE ON discovered_jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_update AFTER UPDATE OF title, description ON discovered_jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+"""
+
+# Descriptions live out of row, zlib-compressed, so discovered_jobs rows stay narrow.
+# discovered_jobs.description is kept (always NULL) for older tools and imports.
+DDL_JOB_DESCRIPTIONS = """
+CREATE TABLE IF NOT EXISTS job_descriptions (
+    discovered_job_id INTEGER PRIMARY KEY,
+    body              BLOB NOT NULL, -- zlib-compressed UTF-8 text (compress_text)
+    FOREIGN KEY (discovered_job_id)
+        REFERENCES discovered_jobs(id) ON DELETE CASCADE
+);
+CREATE VIEW IF NOT EXISTS discovered_jobs_text AS
+    SELECT d.id, d.title, decompress_text(jd.body) AS description
+      FROM discovered_jobs d
+      LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id;
+"""
+
+# jobs_fts over the decompressed text; triggers on both tables keep it in sync
+DDL_JOBS_FTS_COMPRESSED = """
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, description,
+    content='discovered_jobs_text', content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_insert AFTER INSERT ON discovered_jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, description)
+    VALUES (new.id, new.title, (SELECT decompress_text(body) FROM job_descriptions WHERE discovered_job_id = new.id));
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_delete AFTER DELETE ON discovered_jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, (SELECT decompress_text(body) FROM job_descriptions WHERE discovered_job_id = old.id));
+    DELETE FROM job_descriptions WHERE discovered_job_id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_update AFTER UPDATE OF title ON discovered_jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, (SELECT decompress_text(body) FROM job_descriptions WHERE discovered_job_id = old.id));
+    INSERT INTO jobs_fts(rowid, title, description)
+    VALUES (new.id, new.title, (SELECT decompress_text(body) FROM job_descriptions WHERE discovered_job_id = new.id));
+END;
+CREATE TRIGGER IF NOT EXISTS job_descriptions_fts_insert AFTER INSERT ON job_descriptions
+WHEN EXISTS (SELECT 1 FROM discovered_jobs WHERE id = new.discovered_job_id) BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description)
+    SELECT 'delete', id, title, NULL FROM discovered_jobs WHERE id = new.discovered_job_id;
+    INSERT INTO jobs_fts(rowid, title, description)
+    SELECT id, title, decompress_text(new.body) FROM discovered_jobs WHERE id = new.discovered_job_id;
+END;
+CREATE TRIGGER IF NOT EXISTS job_descriptions_fts_update AFTER UPDATE OF body ON job_descriptions
+WHEN EXISTS (SELECT 1 FROM discovered_jobs WHERE id = new.discovered_job_id) BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description)
+    SELECT 'delete', id, title, decompress_text(old.body) FROM discovered_jobs WHERE id = old.discovered_job_id;
+    INSERT INTO jobs_fts(rowid, title, description)
+    SELECT id, title, decompress_text(new.body) FROM discovered_jobs WHERE id = new.discovered_job_id;
+END;
+CREATE TRIGGER IF NOT EXISTS job_descriptions_fts_delete AFTER DELETE ON job_descriptions
+WHEN EXISTS (SELECT 1 FROM discovered_jobs WHERE id = old.discovered_job_id) BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description)
+    SELECT 'delete', id, title, decompress_text(old.body) FROM discovered_jobs WHERE id = old.discovered_job_id;
+    INSERT INTO jobs_fts(rowid, title, description)
+    SELECT id, title, NULL FROM discovered_jobs WHERE id = old.discovered_job_id;
+END;
+"""
+
+# jobs_fts holds no copy of the text (content=''), so the decompressed descriptions are not stored
+# twice, and no trigger calls decompress_text. database.py keeps it in sync from Python
+# (_reindex_search_text): one FTS row per job with a title or description, holding those values.
+# New rows are indexed by title here, since they cannot have a description yet. Rows deleted
+# outside database.py leave their FTS entry behind. This is harmless: searches join on
+# discovered_jobs, and AUTOINCREMENT never reuses an id.
+DDL_JOBS_FTS_CONTENTLESS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, description,
+    content='',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_fts_insert AFTER INSERT ON discovered_jobs
+WHEN new.title IS NOT NULL BEGIN
+    INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, NULL);
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_descriptions_delete AFTER DELETE ON discovered_jobs BEGIN
+    DELETE FROM job_descriptions WHERE discovered_job_id = old.id;
+END;
+"""
+
+# Statistics page aggregates. Every discovered/approved row adds its counts to the 'total'
+# row and to its keyword, location and day rows; triggers subtract a row's old contribution
+# and add its new one, so the table is always current whichever code path writes.
+# Day rows count discoveries by date_discovered, approvals by date_approved and
+# applications by date_applied.
+DDL_JOB_STATS = """
+CREATE TABLE IF NOT EXISTS job_stats (
+    dimension  TEXT NOT NULL, -- 'total', 'keyword', 'location' or 'day'
+    value      TEXT NOT NULL, -- '' for 'total', YYYY-MM-DD for 'day'
+    discovered INTEGER NOT NULL DEFAULT 0,
+    analyzed   INTEGER NOT NULL DEFAULT 0,
+    approved   INTEGER NOT NULL DEFAULT 0,
+    applied    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_stats_insert AFTER INSERT ON discovered_jobs BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 1, COALESCE(new.analyzed, 0) != 0, 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(new.date_discovered), ''), 1, COALESCE(new.analyzed, 0) != 0, 0, 0
+    UNION ALL SELECT 'keyword', COALESCE(new.keyword, ''), 1, COALESCE(new.analyzed, 0) != 0, 0, 0
+    UNION ALL SELECT 'location', COALESCE(new.location, ''), 1, COALESCE(new.analyzed, 0) != 0, 0, 0
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_stats_delete AFTER DELETE ON discovered_jobs BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', -1, -(COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_discovered), ''), -1, -(COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'keyword', COALESCE(old.keyword, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM approved_jobs WHERE discovered_job_id = old.id
+    UNION ALL SELECT 'location', COALESCE(old.location, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM approved_jobs WHERE discovered_job_id = old.id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_stats_update AFTER UPDATE OF analyzed, keyword, location, date_discovered ON discovered_jobs
+WHEN old.analyzed IS NOT new.analyzed OR old.keyword IS NOT new.keyword OR old.location IS NOT new.location
+     OR old.date_discovered IS NOT new.date_discovered BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, (COALESCE(new.analyzed, 0) != 0) - (COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_discovered), ''), -1, -(COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(new.date_discovered), ''), 1, COALESCE(new.analyzed, 0) != 0, 0, 0
+    UNION ALL SELECT 'keyword', COALESCE(old.keyword, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM approved_jobs WHERE discovered_job_id = old.id
+    UNION ALL SELECT 'keyword', COALESCE(new.keyword, ''), 1, COALESCE(new.analyzed, 0) != 0,
+                     COUNT(*), COUNT(date_applied) FROM approved_jobs WHERE discovered_job_id = new.id
+    UNION ALL SELECT 'location', COALESCE(old.location, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM approved_jobs WHERE discovered_job_id = old.id
+    UNION ALL SELECT 'location', COALESCE(new.location, ''), 1, COALESCE(new.analyzed, 0) != 0,
+                     COUNT(*), COUNT(date_applied) FROM approved_jobs WHERE discovered_job_id = new.id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS approved_jobs_stats_insert AFTER INSERT ON approved_jobs BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, 0, 1, new.date_applied IS NOT NULL
+    UNION ALL SELECT 'day', COALESCE(date(new.date_approved), ''), 0, 0, 1, 0
+    UNION ALL SELECT 'day', COALESCE(date(new.date_applied), ''), 0, 0, 0, 1 WHERE new.date_applied IS NOT NULL
+    UNION ALL SELECT 'keyword', COALESCE(keyword, ''), 0, 0, 1, new.date_applied IS NOT NULL
+                FROM discovered_jobs WHERE id = new.discovered_job_id
+    UNION ALL SELECT 'location', COALESCE(location, ''), 0, 0, 1, new.date_applied IS NOT NULL
+                FROM discovered_jobs WHERE id = new.discovered_job_id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS approved_jobs_stats_delete AFTER DELETE ON approved_jobs BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, 0, -1, -(old.date_applied IS NOT NULL)
+    UNION ALL SELECT 'day', COALESCE(date(old.date_approved), ''), 0, 0, -1, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_applied), ''), 0, 0, 0, -1 WHERE old.date_applied IS NOT NULL
+    UNION ALL SELECT 'keyword', COALESCE(keyword, ''), 0, 0, -1, -(old.date_applied IS NOT NULL)
+                FROM discovered_jobs WHERE id = old.discovered_job_id
+    UNION ALL SELECT 'location', COALESCE(location, ''), 0, 0, -1, -(old.date_applied IS NOT NULL)
+                FROM discovered_jobs WHERE id = old.discovered_job_id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS approved_jobs_stats_update AFTER UPDATE OF date_approved, date_applied ON approved_jobs
+WHEN old.date_approved IS NOT new.date_approved OR old.date_applied IS NOT new.date_applied BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, 0, 0, (new.date_applied IS NOT NULL) - (old.date_applied IS NOT NULL)
+    UNION ALL SELECT 'day', COALESCE(date(old.date_approved), ''), 0, 0, -1, 0
+    UNION ALL SELECT 'day', COALESCE(date(new.date_approved), ''), 0, 0, 1, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_applied), ''), 0, 0, 0, -1 WHERE old.date_applied IS NOT NULL
+    UNION ALL SELECT 'day', COALESCE(date(new.date_applied), ''), 0, 0, 0, 1 WHERE new.date_applied IS NOT NULL
+    UNION ALL SELECT 'keyword', COALESCE(keyword, ''), 0, 0, 0, (new.date_applied IS NOT NULL) - (old.date_applied IS NOT NULL)
+                FROM discovered_jobs WHERE id = new.discovered_job_id
+    UNION ALL SELECT 'location', COALESCE(location, ''), 0, 0, 0, (new.date_applied IS NOT NULL) - (old.date_applied IS NOT NULL)
+                FROM discovered_jobs WHERE id = new.discovered_job_id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+"""
+
+# Recomputes job_stats from scratch (existing databases, repairs), matching the triggers above.
+# Approvals moved to approved_jobs_archive by retention.py still count.
+SQL_REBUILD_JOB_STATS = """
+WITH approvals AS (
+    SELECT discovered_job_id, date_approved, date_applied FROM approved_jobs
+    UNION ALL
+    SELECT discovered_job_id, date_approved, date_applied FROM approved_jobs_archive
+)
+INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+SELECT 'total', '', COUNT(*), COALESCE(SUM(COALESCE(analyzed, 0) != 0), 0), 0, 0 FROM discovered_jobs
+UNION ALL
+SELECT 'day', COALESCE(date(date_discovered), ''), COUNT(*), SUM(COALESCE(analyzed, 0) != 0), 0, 0
+  FROM discovered_jobs GROUP BY 1, 2
+UNION ALL
+SELECT 'total', '', 0, 0, COUNT(*), COUNT(date_applied) FROM approvals
+UNION ALL
+SELECT 'day', COALESCE(date(date_approved), ''), 0, 0, COUNT(*), 0 FROM approvals GROUP BY 1, 2
+UNION ALL
+SELECT 'day', COALESCE(date(date_applied), ''), 0, 0, 0, COUNT(*) FROM approvals
+ WHERE date_applied IS NOT NULL GROUP BY 1, 2
+UNION ALL
+SELECT 'keyword', COALESCE(d.keyword, ''), COUNT(*), SUM(COALESCE(d.analyzed, 0) != 0), COUNT(a.discovered_job_id), COUNT(a.date_applied)
+  FROM discovered_jobs d LEFT JOIN approvals a ON a.discovered_job_id = d.id GROUP BY 1, 2
+UNION ALL
+SELECT 'location', COALESCE(d.location, ''), COUNT(*), SUM(COALESCE(d.analyzed, 0) != 0), COUNT(a.discovered_job_id), COUNT(a.date_applied)
+  FROM discovered_jobs d LEFT JOIN approvals a ON a.discovered_job_id = d.id GROUP BY 1, 2
+ON CONFLICT(dimension, value) DO UPDATE SET
+    discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+    approved = approved + excluded.approved, applied = applied + excluded.applied;
+"""
+
+# The rebuild as migration 6 ran it, before approved_jobs_archive existed
+SQL_REBUILD_JOB_STATS_V6 = """
+INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+SELECT 'total', '', COUNT(*), COALESCE(SUM(COALESCE(analyzed, 0) != 0), 0), 0, 0 FROM discovered_jobs
+UNION ALL
+SELECT 'day', COALESCE(date(date_discovered), ''), COUNT(*), SUM(COALESCE(analyzed, 0) != 0), 0, 0
+  FROM discovered_jobs GROUP BY 1, 2
+UNION ALL
+SELECT 'total', '', 0, 0, COUNT(*), COUNT(date_applied) FROM approved_jobs
+UNION ALL
+SELECT 'day', COALESCE(date(date_approved), ''), 0, 0, COUNT(*), 0 FROM approved_jobs GROUP BY 1, 2
+UNION ALL
+SELECT 'day', COALESCE(date(date_applied), ''), 0, 0, 0, COUNT(*) FROM approved_jobs
+ WHERE date_applied IS NOT NULL GROUP BY 1, 2
+UNION ALL
+SELECT 'keyword', COALESCE(d.keyword, ''), COUNT(*), SUM(COALESCE(d.analyzed, 0) != 0), COUNT(a.id), COUNT(a.date_applied)
+  FROM discovered_jobs d LEFT JOIN approved_jobs a ON a.discovered_job_id = d.id GROUP BY 1, 2
+UNION ALL
+SELECT 'location', COALESCE(d.location, ''), COUNT(*), SUM(COALESCE(d.analyzed, 0) != 0), COUNT(a.id), COUNT(a.date_applied)
+  FROM discovered_jobs d LEFT JOIN approved_jobs a ON a.discovered_job_id = d.id GROUP BY 1, 2
+ON CONFLICT(dimension, value) DO UPDATE SET
+    discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+    approved = approved + excluded.approved, applied = applied + excluded.applied;
+"""
+
+# Archived applications moved out of approved_jobs by retention.py. Moving a row is a
+# delete from approved_jobs plus an insert here, so these triggers add its counts back.
+DDL_APPROVED_ARCHIVE = """
+CREATE TABLE IF NOT EXISTS approved_jobs_archive (
+    id                INTEGER PRIMARY KEY, -- approved_jobs.id the row had
+    discovered_job_id INTEGER NOT NULL,
+    date_approved     TIMESTAMP,
+    reason            TEXT,
+    date_applied      TIMESTAMP NULL,
+    relevance_score   REAL NULL,
+    date_archived     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_approved_archive_job ON approved_jobs_archive(discovered_job_id);
+CREATE TRIGGER IF NOT EXISTS approved_jobs_archive_stats_insert AFTER INSERT ON approved_jobs_archive BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, 0, 1, new.date_applied IS NOT NULL
+    UNION ALL SELECT 'day', COALESCE(date(new.date_approved), ''), 0, 0, 1, 0
+    UNION ALL SELECT 'day', COALESCE(date(new.date_applied), ''), 0, 0, 0, 1 WHERE new.date_applied IS NOT NULL
+    UNION ALL SELECT 'keyword', COALESCE(keyword, ''), 0, 0, 1, new.date_applied IS NOT NULL
+                FROM discovered_jobs WHERE id = new.discovered_job_id
+    UNION ALL SELECT 'location', COALESCE(location, ''), 0, 0, 1, new.date_applied IS NOT NULL
+                FROM discovered_jobs WHERE id = new.discovered_job_id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS approved_jobs_archive_stats_delete AFTER DELETE ON approved_jobs_archive BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, 0, -1, -(old.date_applied IS NOT NULL)
+    UNION ALL SELECT 'day', COALESCE(date(old.date_approved), ''), 0, 0, -1, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_applied), ''), 0, 0, 0, -1 WHERE old.date_applied IS NOT NULL
+    UNION ALL SELECT 'keyword', COALESCE(keyword, ''), 0, 0, -1, -(old.date_applied IS NOT NULL)
+                FROM discovered_jobs WHERE id = old.discovered_job_id
+    UNION ALL SELECT 'location', COALESCE(location, ''), 0, 0, -1, -(old.date_applied IS NOT NULL)
+                FROM discovered_jobs WHERE id = old.discovered_job_id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+"""
+
+# Replaces the discovered_jobs delete and update triggers of DDL_JOB_STATS, which only
+# counted the approvals still in approved_jobs: deleting a job or changing its keyword or
+# location also moves the counts of its archived approvals.
+DDL_JOB_STATS_ARCHIVED = """
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_stats_delete AFTER DELETE ON discovered_jobs BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', -1, -(COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_discovered), ''), -1, -(COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'keyword', COALESCE(old.keyword, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM (SELECT discovered_job_id, date_applied FROM approved_jobs
+                           UNION ALL SELECT discovered_job_id, date_applied FROM approved_jobs_archive)
+                     WHERE discovered_job_id = old.id
+    UNION ALL SELECT 'location', COALESCE(old.location, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM (SELECT discovered_job_id, date_applied FROM approved_jobs
+                           UNION ALL SELECT discovered_job_id, date_applied FROM approved_jobs_archive)
+                     WHERE discovered_job_id = old.id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+CREATE TRIGGER IF NOT EXISTS discovered_jobs_stats_update AFTER UPDATE OF analyzed, keyword, location, date_discovered ON discovered_jobs
+WHEN old.analyzed IS NOT new.analyzed OR old.keyword IS NOT new.keyword OR old.location IS NOT new.location
+     OR old.date_discovered IS NOT new.date_discovered BEGIN
+    INSERT INTO job_stats (dimension, value, discovered, analyzed, approved, applied)
+    SELECT 'total', '', 0, (COALESCE(new.analyzed, 0) != 0) - (COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(old.date_discovered), ''), -1, -(COALESCE(old.analyzed, 0) != 0), 0, 0
+    UNION ALL SELECT 'day', COALESCE(date(new.date_discovered), ''), 1, COALESCE(new.analyzed, 0) != 0, 0, 0
+    UNION ALL SELECT 'keyword', COALESCE(old.keyword, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM (SELECT discovered_job_id, date_applied FROM approved_jobs
+                           UNION ALL SELECT discovered_job_id, date_applied FROM approved_jobs_archive)
+                     WHERE discovered_job_id = old.id
+    UNION ALL SELECT 'keyword', COALESCE(new.keyword, ''), 1, COALESCE(new.analyzed, 0) != 0,
+                     COUNT(*), COUNT(date_applied) FROM (SELECT discovered_job_id, date_applied FROM approved_jobs
+                           UNION ALL SELECT discovered_job_id, date_applied FROM approved_jobs_archive)
+                     WHERE discovered_job_id = new.id
+    UNION ALL SELECT 'location', COALESCE(old.location, ''), -1, -(COALESCE(old.analyzed, 0) != 0),
+                     -COUNT(*), -COUNT(date_applied) FROM (SELECT discovered_job_id, date_applied FROM approved_jobs
+                           UNION ALL SELECT discovered_job_id, date_applied FROM approved_jobs_archive)
+                     WHERE discovered_job_id = old.id
+    UNION ALL SELECT 'location', COALESCE(new.location, ''), 1, COALESCE(new.analyzed, 0) != 0,
+                     COUNT(*), COUNT(date_applied) FROM (SELECT discovered_job_id, date_applied FROM approved_jobs
+                           UNION ALL SELECT discovered_job_id, date_applied FROM approved_jobs_archive)
+                     WHERE discovered_job_id = new.id
+    ON CONFLICT(dimension, value) DO UPDATE SET
+        discovered = discovered + excluded.discovered, analyzed = analyzed + excluded.analyzed,
+        approved = approved + excluded.approved, applied = applied + excluded.applied;
+END;
+"""
+
+DDL_SCAN_METRICS = """
+CREATE TABLE IF NOT EXISTS scan_runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at  TIMESTAMP NULL,
+    status       TEXT NOT NULL DEFAULT 'running', -- running | completed | stopped | interrupted
+    max_workers  INTEGER,
+    duration_s   REAL,
+    searches     INTEGER DEFAULT 0, -- search result pages processed
+    links        INTEGER DEFAULT 0, -- job links examined
+    cache_hits   INTEGER DEFAULT 0, -- links already stored with details: no fetch, no AI call
+    new_jobs     INTEGER DEFAULT 0,
+    requests     INTEGER DEFAULT 0, -- HTTP requests, retries included
+    rate_limited INTEGER DEFAULT 0, -- requests answered with 429
+    llm_calls    INTEGER DEFAULT 0,
+    duplicates   INTEGER DEFAULT 0, -- evaluations reused from a near-duplicate
+    approved     INTEGER DEFAULT 0,
+    errors       INTEGER DEFAULT 0  -- failed AI evaluations
+);
+CREATE TABLE IF NOT EXISTS scan_stage_metrics (
+    scan_id  INTEGER NOT NULL,
+    stage    TEXT NOT NULL, -- search_page | job_page | guest_api | fetch (all three) | llm
+    calls    INTEGER NOT NULL,
+    errors   INTEGER NOT NULL,
+    total_ms REAL NOT NULL, -- summed over the concurrent workers
+    p50_ms   REAL,
+    p95_ms   REAL,
+    p99_ms   REAL,
+    max_ms   REAL,
+    PRIMARY KEY (scan_id, stage),
+    FOREIGN KEY (scan_id) REFERENCES scan_runs(id) ON DELETE CASCADE
+);
+"""
+
+DDL_SEARCH_YIELD = """
+CREATE TABLE IF NOT EXISTS search_yield (
+    keyword        TEXT NOT NULL,
+    location       TEXT NOT NULL,
+    workplace      TEXT NOT NULL,              -- LinkedIn f_WT filter: 1 on-site, 2 remote, 3 hybrid
+    runs           INTEGER NOT NULL DEFAULT 0, -- scans that ran this search
+    skipped        INTEGER NOT NULL DEFAULT 0, -- scans since it last ran
+    links          INTEGER NOT NULL DEFAULT 0, -- totals over every run
+    new_jobs       INTEGER NOT NULL DEFAULT 0,
+    approved       INTEGER NOT NULL DEFAULT 0,
+    requests       INTEGER NOT NULL DEFAULT 0,
+    expected_value REAL NOT NULL DEFAULT 0,    -- decayed average of (new jobs + weighted approvals) per request
+    last_run_at    TIMESTAMP NULL,
+    PRIMARY KEY (keyword, location, workplace)
+);
+"""
+
+# Which jobs each configured location's searches return; search_planner.py measures
+# how far the radii of nearby locations overlap from it
+DDL_SEARCH_RESULTS = """
+CREATE TABLE IF NOT EXISTS search_results (
+    location  TEXT NOT NULL,
+    job_id    INTEGER NOT NULL, -- LinkedIn job id
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (location, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_results_last_seen ON search_results(last_seen);
+"""
+
+DDL_EVALUATION_QUEUE = """
+CREATE TABLE IF NOT EXISTS evaluation_queue (
+    discovered_job_id INTEGER PRIMARY KEY,
+    enqueued_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    posted_at         TIMESTAMP NULL, -- datePosted of the job page, if it had one
+    relevance         REAL NULL,      -- local similarity to the resume when enqueued
+    base_priority     REAL NOT NULL,  -- recency, keyword and relevance terms; waiting time is added when claiming
+    claimed_at        TIMESTAMP NULL, -- set while a worker evaluates the job
+    FOREIGN KEY (discovered_job_id)
+        REFERENCES discovered_jobs(id) ON DELETE CASCADE
+);
+"""
+
+# The search (search_yield key) whose results queued the job, so its approval is credited
+# to that search whenever the evaluation completes
+DDL_EVALUATION_QUEUE_SEARCH = """
+ALTER TABLE evaluation_queue ADD COLUMN search_keyword TEXT NULL;
+ALTER TABLE evaluation_queue ADD COLUMN search_location TEXT NULL;
+ALTER TABLE evaluation_queue ADD COLUMN search_workplace TEXT NULL;
+"""
+
+DDL_FINGERPRINT_BANDS = """
+ALTER TABLE job_fingerprints ADD COLUMN band4 INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE job_fingerprints ADD COLUMN band5 INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE job_fingerprints ADD COLUMN band6 INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE job_fingerprints ADD COLUMN band7 INTEGER NOT NULL DEFAULT 0;
+UPDATE job_fingerprints SET
+    band0 = simhash & 255,         band1 = (simhash >> 8) & 255,
+    band2 = (simhash >> 16) & 255, band3 = (simhash >> 24) & 255,
+    band4 = (simhash >> 32) & 255, band5 = (simhash >> 40) & 255,
+    band6 = (simhash >> 48) & 255, band7 = (simhash >> 56) & 255;
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band4 ON job_fingerprints(band4);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band5 ON job_fingerprints(band5);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band6 ON job_fingerprints(band6);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band7 ON job_fingerprints(band7);
+"""
+
+# Dashboard "Best match" order: the index holds the sort key expression itself
+DDL_RELEVANCE_PAGE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_approved_pending_relevance
+    ON approved_jobs(COALESCE(relevance_score, -1.0)) WHERE date_applied IS NULL;
+"""
+
 SQL_INIT_SCAN_CONTROL = """
 INSERT OR IGNORE INTO scan_control (id, stop_requested) VALUES (1, FALSE);
 """
 
 
-def init_db() -> None:
-    """Create the database file and tables if they do not exist.
+# -- migrations --------------------------------------------------------------
+# PRAGMA user_version holds the last applied migration.  Migrations must be
+# idempotent: databases created before versioning start at 0 but already have
+# part of the schema.
+def _migrate_base_schema(conn: sqlite3.Connection) -> None:
+    """Create the tables if they do not exist.
     Also attempts to add new columns to existing tables if they are missing.
     """
-    with get_conn() as conn:
-        conn.executescript(DDL_DISCOVERED) # Create discovered_jobs first
-        conn.executescript(DDL_APPROVED)   # Create approved_jobs
-        conn.executescript(DDL_SCAN_CONTROL) # Create scan_control table
-        conn.execute(SQL_INIT_SCAN_CONTROL)  # Ensure the control row exists
+    conn.executescript(DDL_DISCOVERED) # Create discovered_jobs first
+    conn.executescript(DDL_APPROVED)   # Create approved_jobs
+    conn.executescript(DDL_SCAN_CONTROL) # Create scan_control table
+    conn.execute(SQL_INIT_SCAN_CONTROL)  # Ensure the control row exists
+    conn.executescript(DDL_FINGERPRINTS) # Near-duplicate index
+    conn.executescript(DDL_PROMPT_METRICS) # Prompt-size samples
+    conn.executescript(DDL_EVALUATIONS) # Full evaluation records
+    conn.executescript(DDL_REEVALUATION_RUNS) # Bulk re-evaluation progress
+    conn.executescript(DDL_RELEVANCE) # Local relevance vectors
+
+    # Attempt to add the date_applied column to approved_jobs if it doesn't exist
+    try:
+        cursor = conn.execute("PRAGMA table_info(approved_jobs);")
+        columns = [row['name'] for row in cursor.fetchall()]
+        if 'date_applied' not in columns:
+            conn.execute("ALTER TABLE approved_jobs ADD COLUMN date_applied TIMESTAMP NULL;")
+            print("Added 'date_applied' column to 'approved_jobs' table.")
+        if 'is_archived' not in columns: # Check and add is_archived
+            conn.execute("ALTER TABLE approved_jobs ADD COLUMN is_archived BOOLEAN DEFAULT FALSE;")
+            print("Added 'is_archived' column to 'approved_jobs' table.")
+        if 'relevance_score' not in columns:
+            conn.execute("ALTER TABLE approved_jobs ADD COLUMN relevance_score REAL NULL;")
+            print("Added 'relevance_score' column to 'approved_jobs' table.")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_approved_jobs_relevance ON approved_jobs(relevance_score);")
+    except sqlite3.Error as e:
+        print(f"Notice: Could not add new columns to 'approved_jobs' (may already exist or other issue): {e}")
+
+    # Attempt to add the duplicate_of column to discovered_jobs if it doesn't exist
+    try:
+        cursor = conn.execute("PRAGMA table_info(discovered_jobs);")
+        columns = [row['name'] for row in cursor.fetchall()]
+        if 'duplicate_of' not in columns:
+            conn.execute("ALTER TABLE discovered_jobs ADD COLUMN duplicate_of INTEGER NULL;")
+            print("Added 'duplicate_of' column to 'discovered_jobs' table.")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_discovered_jobs_duplicate_of ON discovered_jobs(duplicate_of);")
+    except sqlite3.Error as e:
+        print(f"Notice: Could not add new columns to 'discovered_jobs' (may already exist or other issue): {e}")
+
+
+def _migrate_query_indexes(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_QUERY_INDEXES)
+
+
+def _migrate_jobs_fts(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_JOBS_FTS)
+    conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild');") # Index existing rows
+
+
+def _migrate_page_indexes(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_PAGE_INDEXES)
+
+
+def _rebuild_job_stats(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM job_stats;")
+    conn.execute(SQL_REBUILD_JOB_STATS)
+
+
+def _migrate_job_stats(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_JOB_STATS)
+    conn.execute("DELETE FROM job_stats;")
+    conn.execute(SQL_REBUILD_JOB_STATS_V6)
+
+
+def _migrate_retention(conn: sqlite3.Connection) -> None:
+    conn.execute("DROP TRIGGER IF EXISTS discovered_jobs_stats_update;") # Now also follows date_discovered
+    conn.executescript(DDL_JOB_STATS)
+    conn.executescript(DDL_APPROVED_ARCHIVE)
+    _rebuild_job_stats(conn)
+    if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+        # Lets retention.py hand freed pages back in small steps (PRAGMA incremental_vacuum)
+        # instead of a full VACUUM; changing the mode takes one VACUUM now
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        conn.commit()
+        conn.execute("VACUUM;")
+
+
+def _migrate_compress_descriptions(conn: sqlite3.Connection) -> None:
+    for trigger in ("discovered_jobs_fts_insert", "discovered_jobs_fts_delete", "discovered_jobs_fts_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+    conn.execute("DROP TABLE IF EXISTS jobs_fts;")
+    conn.executescript(DDL_JOB_DESCRIPTIONS)
+    moved = conn.execute("""
+        INSERT OR IGNORE INTO job_descriptions (discovered_job_id, body)
+        SELECT id, compress_text(description) FROM discovered_jobs
+         WHERE description IS NOT NULL AND description != '';
+    """).rowcount
+    conn.execute("UPDATE discovered_jobs SET description = NULL WHERE description IS NOT NULL;")
+    conn.executescript(DDL_JOBS_FTS_COMPRESSED)
+    conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild');")
+    if moved:
+        # Give the space of the inline text back to the filesystem
+        conn.commit()
+        conn.execute("VACUUM;")
+        print(f"Compressed {moved} job descriptions into job_descriptions.")
+
+
+def _migrate_scan_metrics(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_SCAN_METRICS)
+
+
+def _migrate_search_yield(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_SEARCH_YIELD)
+
+
+def _migrate_evaluation_queue(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_EVALUATION_QUEUE)
+    # Jobs whose details were stored but whose evaluation never ran (a scan stopped in between)
+    conn.execute("""
+        INSERT OR IGNORE INTO evaluation_queue (discovered_job_id, enqueued_at, base_priority)
+        SELECT d.id, d.date_discovered, 0 FROM discovered_jobs d
+         WHERE d.analyzed = FALSE
+           AND EXISTS (SELECT 1 FROM job_descriptions jd WHERE jd.discovered_job_id = d.id);
+    """)
+
+
+def _migrate_search_results(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_SEARCH_RESULTS)
+
+
+def _migrate_contentless_fts(conn: sqlite3.Connection) -> None:
+    for trigger in ("discovered_jobs_fts_insert", "discovered_jobs_fts_delete", "discovered_jobs_fts_update",
+                    "job_descriptions_fts_insert", "job_descriptions_fts_update", "job_descriptions_fts_delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+    conn.execute("DROP TABLE IF EXISTS jobs_fts;")
+    conn.execute("DROP VIEW IF EXISTS discovered_jobs_text;")
+    conn.executescript(DDL_JOBS_FTS_CONTENTLESS)
+    rows = conn.execute("""
+        SELECT d.id, d.title, jd.body FROM discovered_jobs d
+          LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id
+         WHERE d.title IS NOT NULL OR jd.body IS NOT NULL;
+    """)
+    conn.executemany(
+        "INSERT INTO jobs_fts(rowid, title, description) VALUES (?, ?, ?);",
+        ((row["id"], row["title"], decompress_text(row["body"])) for row in rows),
+    )
 
-        # Attempt to add the date_applied column to approved_jobs if it doesn't exist
-        try:
-            cursor = conn.execute("PRAGMA table_info(approved_jobs);")
-            columns = [row['name'] for row in cursor.fetchall()]
-            if 'date_applied' not in columns:
-                conn.execute("ALTER TABLE approved_jobs ADD COLUMN date_applied TIMESTAMP NULL;")
-                print("Added 'date_applied' column to 'approved_jobs' table.")
-            if 'is_archived' not in columns: # Check and add is_archived
-                conn.execute("ALTER TABLE approved_jobs ADD COLUMN is_archived BOOLEAN DEFAULT FALSE;")
-                print("Added 'is_archived' column to 'approved_jobs' table.")
-        except sqlite3.Error as e:
-            print(f"Notice: Could not add new columns to 'approved_jobs' (may already exist or other issue): {e}")
+
+def _migrate_archived_job_stats(conn: sqlite3.Connection) -> None:
+    conn.execute("DROP TRIGGER IF EXISTS discovered_jobs_stats_delete;")
+    conn.execute("DROP TRIGGER IF EXISTS discovered_jobs_stats_update;")
+    conn.executescript(DDL_JOB_STATS_ARCHIVED)
+    _rebuild_job_stats(conn)
+
+
+def _migrate_queue_backfill_dates(conn: sqlite3.Connection) -> None:
+    # Migration 10 queued its backlog as enqueued at date_discovered, so with the per-hour age
+    # bonus old jobs jumped the queue; they start waiting from now instead
+    conn.execute("""
+        UPDATE evaluation_queue SET enqueued_at = CURRENT_TIMESTAMP
+         WHERE base_priority = 0
+           AND enqueued_at = (SELECT date_discovered FROM discovered_jobs d WHERE d.id = evaluation_queue.discovered_job_id);
+    """)
+
+
+def _migrate_queue_search(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_EVALUATION_QUEUE_SEARCH)
+
+
+def _migrate_fingerprint_bands(conn: sqlite3.Connection) -> None:
+    # Eight 8-bit bands instead of four 16-bit ones, re-derived from the stored hashes
+    conn.executescript(DDL_FINGERPRINT_BANDS)
+
+
+def _migrate_relevance_page_index(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL_RELEVANCE_PAGE_INDEX)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "Base schema", _migrate_base_schema),
+    (2, "Indexes for the Dashboard, Applied Jobs and unapproved-jobs queries", _migrate_query_indexes),
+    (3, "Full-text search index over job titles and descriptions", _migrate_jobs_fts),
+    (4, "Compressed out-of-row job descriptions", _migrate_compress_descriptions),
+    (5, "Indexes for keyset-paginated job lists", _migrate_page_indexes),
+    (6, "Trigger-maintained statistics aggregates", _migrate_job_stats),
+    (7, "Approved-jobs archive and incremental auto-vacuum for retention", _migrate_retention),
+    (8, "Per-scan and per-stage performance metrics", _migrate_scan_metrics),
+    (9, "Per-search yield for scan scheduling", _migrate_search_yield),
+    (10, "Persistent priority queue of pending evaluations", _migrate_evaluation_queue),
+    (11, "Per-location search results for the search planner", _migrate_search_results),
+    (12, "Full-text index maintained without app-defined SQL functions", _migrate_contentless_fts),
+    (13, "Statistics triggers that count archived approvals", _migrate_archived_job_stats),
+    (14, "Evaluation queue backlog re-dated to when it was queued", _migrate_queue_backfill_dates),
+    (15, "Search that queued each pending evaluation", _migrate_queue_search),
+    (16, "Eight near-duplicate bands so per-city reposts are matched", _migrate_fingerprint_bands),
+    (17, "Index for the Dashboard's best-match order", _migrate_relevance_page_index),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+
+
+def init_db() -> None:
+    """Create the database file and bring its schema up to SCHEMA_VERSION.
+    Migrations are checked once per process and database file, so repeated calls are free.
+    """
+    path = str(DB_PATH)
+    if path in _migrated_paths:
+        return
+    with _migrate_lock:
+        if path in _migrated_paths:
+            return
+        with get_conn() as conn:
+            current = conn.execute("PRAGMA user_version;").fetchone()[0]
+            for version, description, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                migrate(conn)
+                conn.execute(f"PRAGMA user_version = {version};")
+                conn.commit()
+                if current:
+                    print(f"Applied database migration {version}: {description}.")
+        _migrated_paths.add(path)
 
 
 # -- CRUD helpers ------------------------------------------------------------
@@ -95,16 +1163,21 @@ def upsert_discovered(job: Dict[str, Any]) -> None:
     """Insert a job if it is new; ignore duplicates (thanks to UNIQUE on url)."""
     sql = """
     INSERT INTO discovered_jobs
-        (job_id, url, title, description, location, keyword, analyzed)
+        (job_id, url, title, location, keyword, analyzed)
     VALUES
-        (:job_id, :url, :title, :description, :location, :keyword, :analyzed)
+        (:job_id, :url, :title, :location, :keyword, :analyzed)
     ON CONFLICT(job_id) DO NOTHING;
     """
     job["job_id"] = int(_JOB_ID_RE.search(job["url"]).group(1))
     with get_conn() as conn:
-        conn.execute(sql, job)
+        if conn.execute(sql, job).rowcount == 1 and job.get("description"):
+            discovered_id = conn.execute("SELECT id FROM discovered_jobs WHERE job_id = ?;", (job["job_id"],)).fetchone()["id"]
+            indexed = _indexed_text(conn, discovered_id)
+            _store_description(conn, job["job_id"], job["description"])
+            _reindex_search_text(conn, discovered_id, indexed)
 
 
+@_write_op()
 def approve_job(linkedin_job_id: int, reason: str) -> bool:
     """Mark a job as approved by its LinkedIn job_id.
     Inserts into approved_jobs if the job is found in discovered_jobs and not already approved.
@@ -131,19 +1204,224 @@ def approve_job(linkedin_job_id: int, reason: str) -> bool:
         return cur_insert.rowcount == 1
 
 
-def fetch_unapproved() -> Iterable[sqlite3.Row]:
-    """Iterate over jobs that have not yet been approved."""
-    sql = """
-    SELECT d.*
-    FROM discovered_jobs AS d
-    LEFT JOIN approved_jobs AS a
-      ON d.id = a.discovered_job_id
-    WHERE a.id IS NULL
-    ORDER BY date_discovered DESC;
+# --- List Queries (shared with the pages; see check_query_plans) ---
+
+DEFAULT_PAGE_SIZE = 25
+
+# Dashboard: approved jobs not yet applied to
+SQL_PENDING_APPROVED_COLUMNS = """
+    aj.id AS approved_job_pk,
+    dj.url,
+    dj.title,
+    dj.location,
+    dj.keyword,
+    aj.date_approved,
+    aj.reason,
+    aj.date_applied,
+    aj.relevance_score,
+    (SELECT COUNT(*) FROM discovered_jobs dup WHERE dup.duplicate_of = dj.id) AS duplicate_count,
+    (SELECT GROUP_CONCAT(dup.url, ' ') FROM discovered_jobs dup WHERE dup.duplicate_of = dj.id) AS duplicate_urls
+"""
+SQL_PENDING_APPROVED_FROM = """
+FROM
+    approved_jobs aj
+JOIN
+    discovered_jobs dj ON aj.discovered_job_id = dj.id
+{search_join}
+WHERE aj.date_applied IS NULL
+{search_filter}
+"""
+
+# Sort name -> key expression. Lists are ordered by (key DESC, aj.id DESC) and paged on that pair.
+APPROVED_SORT_KEYS = {
+    "Newest": "aj.date_approved",
+    "Best match": "COALESCE(aj.relevance_score, -1.0)",
+}
+
+# Applied Jobs page: applied and not archived, most recently applied first
+SQL_APPLIED_COLUMNS = """
+    aj.id AS approved_job_pk,
+    dj.url,
+    dj.title,
+    dj.location,
+    dj.keyword,
+    aj.date_approved,
+    aj.reason,
+    aj.date_applied
+"""
+SQL_APPLIED_FROM = """
+FROM
+    approved_jobs aj
+JOIN
+    discovered_jobs dj ON aj.discovered_job_id = dj.id
+{search_join}
+WHERE
+    aj.date_applied IS NOT NULL AND (aj.is_archived = FALSE OR aj.is_archived IS NULL)
+{search_filter}
+"""
+APPLIED_SORT_KEY = "aj.date_applied"
+
+# Search results are ranked by bm25; title matches weigh more than description matches
+SQL_SEARCH_JOIN = "JOIN jobs_fts ON jobs_fts.rowid = dj.id"
+SQL_SEARCH_FILTER = "AND jobs_fts MATCH ?"
+SQL_SEARCH_SORT_KEY = "-bm25(jobs_fts, 10.0, 1.0)"
+
+_FTS_TERM_RE = re.compile(r'"([^"]+)"|(\w+\*?)')
+
+
+def to_fts_query(text: str) -> Optional[str]:
+    """Turns a search box entry into a safe FTS5 query: "quoted phrases" and words must all
+    match (word* matches a prefix, OR between terms allows either). None if nothing to search.
+    """
+    terms = []
+    for phrase, word in _FTS_TERM_RE.findall(text or ""):
+        if word == "OR":
+            if terms and terms[-1] != "OR":
+                terms.append("OR")
+        elif phrase:
+            terms.append('"' + phrase.replace('"', "") + '"')
+        elif word.endswith("*"):
+            terms.append(f'"{word[:-1]}"*')
+        else:
+            terms.append(f'"{word}"')
+    while terms and terms[-1] == "OR":
+        terms.pop()
+    return " ".join(terms) or None
+
+
+def _from_clause(from_sql: str, search: Optional[str]) -> Tuple[str, list]:
+    match = to_fts_query(search) if search else None
+    if match is None:
+        return from_sql.format(search_join="", search_filter=""), []
+    return from_sql.format(search_join=SQL_SEARCH_JOIN, search_filter=SQL_SEARCH_FILTER), [match]
+
+
+def _page_query(
+    columns: str,
+    from_sql: str,
+    sort_key: str,
+    search: Optional[str],
+    cursor: Optional[Tuple[Any, int]],
+    limit: Optional[int],
+) -> Tuple[str, tuple]:
+    """(SQL, params) for one keyset page: rows after *cursor* = (sort_key, approved_job_pk)
+    of the previous page's last row, ordered by sort key then id, both descending.
     """
+    from_clause, params = _from_clause(from_sql, search)
+    limit_clause = "LIMIT ?" if limit else ""
+    if params:
+        # bm25() cannot be filtered on in WHERE, so rank the matches first and page over those
+        sql = f"""
+        WITH ranked AS MATERIALIZED (
+            SELECT {SQL_SEARCH_SORT_KEY} AS sort_key, {columns} {from_clause}
+        )
+        SELECT * FROM ranked
+        {"WHERE (sort_key, approved_job_pk) < (?, ?)" if cursor else ""}
+        ORDER BY sort_key DESC, approved_job_pk DESC
+        {limit_clause};
+        """
+    else:
+        # The plain bound is implied by the row value; it lets SQLite seek an expression index
+        sql = f"""
+        SELECT {sort_key} AS sort_key, {columns} {from_clause}
+        {f"AND {sort_key} <= ? AND ({sort_key}, aj.id) < (?, ?)" if cursor else ""}
+        ORDER BY {sort_key} DESC, aj.id DESC
+        {limit_clause};
+        """
+        if cursor:
+            params.append(cursor[0])
+    if cursor:
+        params += list(cursor)
+    if limit:
+        params.append(limit)
+    return sql, tuple(params)
+
+
+def _fetch_page(sql: str, params: tuple, limit: int) -> Tuple[List[sqlite3.Row], Optional[Tuple[Any, int]]]:
+    with get_conn() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], (last["sort_key"], last["approved_job_pk"])
+
+
+def pending_approved_jobs_query(
+    sort_by: str = "Newest",
+    search: Optional[str] = None,
+    cursor: Optional[Tuple[Any, int]] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, tuple]:
+    """(SQL, params) for the Dashboard list; with *search*, only matching jobs ranked by bm25."""
+    sort_key = APPROVED_SORT_KEYS.get(sort_by, APPROVED_SORT_KEYS["Newest"])
+    return _page_query(SQL_PENDING_APPROVED_COLUMNS, SQL_PENDING_APPROVED_FROM, sort_key, search, cursor, limit)
+
+
+def fetch_pending_approved_page(
+    sort_by: str = "Newest",
+    search: Optional[str] = None,
+    cursor: Optional[Tuple[Any, int]] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[sqlite3.Row], Optional[Tuple[Any, int]]]:
+    """One page of the Dashboard list. Returns (rows, cursor of the next page or None on the last page)."""
+    sql, params = pending_approved_jobs_query(sort_by, search, cursor, limit + 1)
+    return _fetch_page(sql, params, limit)
+
+
+def count_pending_approved(search: Optional[str] = None) -> int:
+    from_clause, params = _from_clause(SQL_PENDING_APPROVED_FROM, search)
     with get_conn() as conn:
-        yield from conn.execute(sql)
+        return conn.execute("SELECT COUNT(*) " + from_clause, params).fetchone()[0]
 
+
+def applied_jobs_query(
+    search: Optional[str] = None,
+    cursor: Optional[Tuple[Any, int]] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, tuple]:
+    """(SQL, params) for the Applied Jobs list; with *search*, only matching jobs ranked by bm25."""
+    return _page_query(SQL_APPLIED_COLUMNS, SQL_APPLIED_FROM, APPLIED_SORT_KEY, search, cursor, limit)
+
+
+def fetch_applied_page(
+    search: Optional[str] = None,
+    cursor: Optional[Tuple[Any, int]] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[sqlite3.Row], Optional[Tuple[Any, int]]]:
+    """One page of the Applied Jobs list. Returns (rows, cursor of the next page or None on the last page)."""
+    sql, params = applied_jobs_query(search, cursor, limit + 1)
+    return _fetch_page(sql, params, limit)
+
+
+def count_applied(search: Optional[str] = None) -> int:
+    from_clause, params = _from_clause(SQL_APPLIED_FROM, search)
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) " + from_clause, params).fetchone()[0]
+
+
+SQL_UNAPPROVED_JOBS = """
+SELECT d.id, d.job_id, d.url, d.title, decompress_text(jd.body) AS description,
+       d.location, d.keyword, d.date_discovered, d.analyzed, d.duplicate_of
+FROM discovered_jobs AS d
+LEFT JOIN approved_jobs AS a
+  ON d.id = a.discovered_job_id
+LEFT JOIN job_descriptions AS jd
+  ON jd.discovered_job_id = d.id
+WHERE a.id IS NULL
+ORDER BY d.date_discovered DESC;
+"""
+
+def fetch_unapproved() -> List[sqlite3.Row]:
+    """Jobs that have not yet been approved."""
+    # Fetched eagerly: a suspended generator would hold this thread's shared connection open
+    with get_conn() as conn:
+        return conn.execute(SQL_UNAPPROVED_JOBS).fetchall()
+
+def count_discovered_jobs() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM discovered_jobs;").fetchone()[0]
+
+@_write_op()
 def insert_stub(job_id: int, url: str, location: str, keyword: str) -> bool:
     """
     Try to create a row with just the identifiers.
@@ -158,12 +1436,21 @@ def insert_stub(job_id: int, url: str, location: str, keyword: str) -> bool:
         cur = conn.execute(sql, (job_id, url, location, keyword, False))
         return cur.rowcount == 1        # 1 == new row, 0 == duplicate
 
+@_write_op()
+def insert_stubs(stubs: List[Tuple[int, str, str, str]]) -> List[bool]:
+    """insert_stub for a whole search page of (job_id, url, location, keyword) in one write.
+    Returns, per stub, True if a new row was inserted.
+    """
+    with get_conn(): # One transaction when called without the writer thread
+        return [insert_stub(*stub) for stub in stubs]
+
 def row_missing_details(job_id: int) -> bool:
     sql = """
     SELECT 1
       FROM discovered_jobs
      WHERE job_id = ?
-       AND (title IS NULL OR title = '' OR description IS NULL OR description = '')
+       AND (title IS NULL OR title = ''
+            OR NOT EXISTS (SELECT 1 FROM job_descriptions jd WHERE jd.discovered_job_id = discovered_jobs.id))
        AND analyzed = FALSE
      LIMIT 1;
     """
@@ -171,18 +1458,73 @@ def row_missing_details(job_id: int) -> bool:
         return conn.execute(sql, (job_id,)).fetchone() is not None
 
 
+@_write_op(wait=False)
 def update_details(job_id: int, title: Optional[str], desc: Optional[str]) -> None:
+    """Sets the title and/or description; None leaves a field unchanged."""
     sql = """
     UPDATE discovered_jobs
-       SET title       = COALESCE(?, title),
-           description = COALESCE(?, description)
+       SET title = COALESCE(?, title)
      WHERE job_id = ?;
     """
     with get_conn() as conn:
-        conn.execute(sql, (title, desc, job_id))
+        row = conn.execute("SELECT id FROM discovered_jobs WHERE job_id = ?;", (job_id,)).fetchone()
+        if row is None:
+            return
+        indexed = _indexed_text(conn, row["id"])
+        conn.execute(sql, (title, job_id))
+        if desc is not None:
+            _store_description(conn, job_id, desc)
+        _reindex_search_text(conn, row["id"], indexed)
+
+def _indexed_text(conn: sqlite3.Connection, discovered_id: int) -> Tuple[Optional[str], Optional[str]]:
+    """(title, description) of a job as jobs_fts holds them; read it before changing either."""
+    row = conn.execute("""
+        SELECT d.title, jd.body FROM discovered_jobs d
+          LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id
+         WHERE d.id = ?;
+    """, (discovered_id,)).fetchone()
+    return (row["title"], decompress_text(row["body"])) if row else (None, None)
+
+def _reindex_search_text(conn: sqlite3.Connection, discovered_id: int, indexed: Tuple[Optional[str], Optional[str]]) -> None:
+    """Replaces a job's jobs_fts entry, *indexed* as returned by _indexed_text before the change,
+    with its current title and description. A contentless FTS5 delete needs the old values.
+    """
+    current = _indexed_text(conn, discovered_id)
+    if current == indexed:
+        return
+    if indexed != (None, None):
+        conn.execute("INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', ?, ?, ?);",
+                     (discovered_id, *indexed))
+    if current != (None, None):
+        conn.execute("INSERT INTO jobs_fts(rowid, title, description) VALUES (?, ?, ?);", (discovered_id, *current))
+
+def _store_description(conn: sqlite3.Connection, job_id: int, desc: str) -> None:
+    """Writes a compressed description (an empty one is removed)."""
+    if desc:
+        conn.execute("""
+            INSERT INTO job_descriptions (discovered_job_id, body)
+            SELECT id, ? FROM discovered_jobs WHERE job_id = ?
+            ON CONFLICT(discovered_job_id) DO UPDATE SET body = excluded.body;
+        """, (compress_text(desc), job_id))
+    else:
+        conn.execute(
+            "DELETE FROM job_descriptions WHERE discovered_job_id = (SELECT id FROM discovered_jobs WHERE job_id = ?);",
+            (job_id,),
+        )
+
+def get_description(linkedin_job_id: int) -> Optional[str]:
+    """A job's description text (None if it has none)."""
+    with get_conn() as conn:
+        row = conn.execute("""
+            SELECT jd.body FROM job_descriptions jd
+              JOIN discovered_jobs d ON d.id = jd.discovered_job_id
+             WHERE d.job_id = ?;
+        """, (linkedin_job_id,)).fetchone()
+    return decompress_text(row["body"]) if row else None
 
+@_write_op(wait=False)
 def mark_job_as_analyzed(job_id: int) -> None:
-    """Mark a job as analyzed in the discovered_jobs table."""
+    """Mark a job as analyzed in the discovered_jobs table and take it off the evaluation queue."""
     sql = """
     UPDATE discovered_jobs
        SET analyzed = TRUE
@@ -190,6 +1532,391 @@ def mark_job_as_analyzed(job_id: int) -> None:
     """
     with get_conn() as conn:
         conn.execute(sql, (job_id,))
+        conn.execute(
+            "DELETE FROM evaluation_queue WHERE discovered_job_id = (SELECT id FROM discovered_jobs WHERE job_id = ?);",
+            (job_id,),
+        )
+
+# --- Near-Duplicate Functions ---
+
+@_write_op(wait=False)
+def save_fingerprint(linkedin_job_id: int, simhash: int, bands: Tuple[int, ...]) -> None:
+    """Stores (or replaces) the SimHash fingerprint of a discovered job."""
+    sql = """
+    INSERT OR REPLACE INTO job_fingerprints
+        (discovered_job_id, simhash, band0, band1, band2, band3, band4, band5, band6, band7)
+    SELECT id, ?, ?, ?, ?, ?, ?, ?, ?, ?
+      FROM discovered_jobs
+     WHERE job_id = ?;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (simhash, *bands, linkedin_job_id))
+
+def fetch_fingerprint_candidates(linkedin_job_id: int, bands: Tuple[int, ...]) -> List[sqlite3.Row]:
+    """Returns analyzed canonical postings sharing at least one LSH band with *bands*.
+    Each row carries the canonical's simhash and its approval reason (NULL if rejected).
+    """
+    sql = """
+    SELECT d.id, d.job_id, d.url, d.title, f.simhash, a.reason AS approved_reason
+      FROM job_fingerprints AS f
+      JOIN discovered_jobs AS d ON d.id = f.discovered_job_id
+      LEFT JOIN approved_jobs AS a ON a.discovered_job_id = d.id
+     WHERE (f.band0 = ? OR f.band1 = ? OR f.band2 = ? OR f.band3 = ?
+            OR f.band4 = ? OR f.band5 = ? OR f.band6 = ? OR f.band7 = ?)
+       AND d.job_id != ?
+       AND d.duplicate_of IS NULL
+       AND d.analyzed = TRUE;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (*bands, linkedin_job_id)).fetchall()
+
+def fetch_unfingerprinted_jobs() -> List[sqlite3.Row]:
+    """Returns stored postings with a description but no fingerprint yet."""
+    sql = """
+    SELECT d.job_id, d.title, decompress_text(jd.body) AS description
+      FROM discovered_jobs AS d
+      JOIN job_descriptions AS jd ON jd.discovered_job_id = d.id
+      LEFT JOIN job_fingerprints AS f ON f.discovered_job_id = d.id
+     WHERE f.discovered_job_id IS NULL;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql).fetchall()
+
+@_write_op(wait=False)
+def link_duplicate(linkedin_job_id: int, canonical_discovered_id: int) -> None:
+    """Marks a discovered job as a near-duplicate of another discovered job (by PK)."""
+    sql = "UPDATE discovered_jobs SET duplicate_of = ? WHERE job_id = ?;"
+    with get_conn() as conn:
+        conn.execute(sql, (canonical_discovered_id, linkedin_job_id))
+
+# --- Prompt Metrics Functions ---
+
+@_write_op(wait=False)
+def insert_prompt_metrics(stats: Dict[str, Any]) -> None:
+    """Records the size (and call latency) of one evaluation prompt."""
+    sql = """
+    INSERT INTO prompt_metrics
+        (token_budget, original_tokens, prompt_tokens, description_tokens_before,
+         description_tokens_after, sections_total, sections_kept, latency_ms, eligible)
+    VALUES
+        (:token_budget, :original_tokens, :prompt_tokens, :description_tokens_before,
+         :description_tokens_after, :sections_total, :sections_kept, :latency_ms, :eligible);
+    """
+    with get_conn() as conn:
+        conn.execute(sql, stats)
+
+def fetch_prompt_metrics(since: Optional[str] = None) -> List[sqlite3.Row]:
+    """Returns recorded prompt-size samples, optionally only those created at/after *since*."""
+    sql = "SELECT * FROM prompt_metrics WHERE (? IS NULL OR created_at >= ?) ORDER BY created_at, id;"
+    with get_conn() as conn:
+        return conn.execute(sql, (since, since)).fetchall()
+
+# --- Evaluation Record Functions ---
+
+@_write_op(wait=False)
+def insert_evaluation(
+    linkedin_job_id: Optional[int],
+    verdict: Optional[Dict[str, Any]],
+    metadata: Dict[str, Any],
+    error: Optional[str] = None,
+) -> None:
+    """Records one AI evaluation (verdict, timing and usage) for a discovered job.
+    *verdict* is the model's JSON answer, or None if the call failed with *error*.
+    """
+    verdict = verdict or {}
+    missing = verdict.get("missing_requirements")
+    sql = """
+    INSERT INTO evaluations
+        (discovered_job_id, provider, model, eligible, reasoning, missing_requirements,
+         latency_ms, prompt_tokens, completion_tokens, total_tokens, estimated_prompt_tokens, error)
+    VALUES
+        ((SELECT id FROM discovered_jobs WHERE job_id = ?), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+    """
+    params = (
+        linkedin_job_id,
+        metadata.get("provider"),
+        metadata.get("model"),
+        bool(verdict["eligible"]) if "eligible" in verdict else None,
+        verdict.get("reasoning"),
+        json.dumps(missing) if missing is not None else None,
+        metadata.get("latency_ms"),
+        metadata.get("prompt_tokens"),
+        metadata.get("completion_tokens"),
+        metadata.get("total_tokens"),
+        metadata.get("estimated_prompt_tokens"),
+        error,
+    )
+    with get_conn() as conn:
+        conn.execute(sql, params)
+
+def fetch_evaluation_summary(since: Optional[str] = None, until: Optional[str] = None) -> List[sqlite3.Row]:
+    """Per-day, per-provider/model evaluation counts, approvals, errors, latency and token totals.
+    Uses idx_evaluations_created_at for the time range.
+    """
+    sql = """
+    SELECT date(created_at)            AS day,
+           provider,
+           model,
+           COUNT(*)                    AS evaluations,
+           SUM(eligible = TRUE)        AS approved,
+           SUM(error IS NOT NULL)      AS errors,
+           AVG(latency_ms)             AS avg_latency_ms,
+           MAX(latency_ms)             AS max_latency_ms,
+           SUM(prompt_tokens)          AS prompt_tokens,
+           SUM(completion_tokens)      AS completion_tokens,
+           SUM(total_tokens)           AS total_tokens
+      FROM evaluations
+     WHERE created_at >= COALESCE(?, '0000-01-01')
+       AND created_at <  COALESCE(?, '9999-12-31')
+     GROUP BY day, provider, model
+     ORDER BY day, provider, model;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (since, until)).fetchall()
+
+def fetch_evaluation_latencies(provider: str, model: Optional[str] = None, since: Optional[str] = None) -> List[float]:
+    """Latencies of successful evaluations for one provider (and model), for percentile charts.
+    Uses idx_evaluations_provider_model.
+    """
+    sql = """
+    SELECT latency_ms
+      FROM evaluations
+     WHERE provider = ?
+       AND (? IS NULL OR model = ?)
+       AND created_at >= COALESCE(?, '0000-01-01')
+       AND error IS NULL
+     ORDER BY created_at;
+    """
+    with get_conn() as conn:
+        return [row["latency_ms"] for row in conn.execute(sql, (provider, model, model, since))]
+
+def fetch_slowest_evaluations(limit: int = 20, since: Optional[str] = None) -> List[sqlite3.Row]:
+    """The slowest evaluations with their job and prompt size, to find slow prompts."""
+    sql = """
+    SELECT e.id, e.created_at, e.provider, e.model, e.latency_ms, e.prompt_tokens,
+           e.estimated_prompt_tokens, e.total_tokens, e.error, d.job_id, d.title
+      FROM evaluations AS e
+      LEFT JOIN discovered_jobs AS d ON d.id = e.discovered_job_id
+     WHERE e.created_at >= COALESCE(?, '0000-01-01')
+     ORDER BY e.latency_ms DESC
+     LIMIT ?;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (since, limit)).fetchall()
+
+def fetch_job_evaluations(linkedin_job_id: int) -> List[sqlite3.Row]:
+    """All evaluations of one job, newest first."""
+    sql = """
+    SELECT e.*
+      FROM evaluations AS e
+      JOIN discovered_jobs AS d ON d.id = e.discovered_job_id
+     WHERE d.job_id = ?
+     ORDER BY e.created_at DESC, e.id DESC;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (linkedin_job_id,)).fetchall()
+
+# --- Re-evaluation Functions ---
+
+SQL_REEVALUATION_CANDIDATES = """
+    FROM discovered_jobs
+    JOIN job_descriptions jd ON jd.discovered_job_id = discovered_jobs.id
+   WHERE analyzed = TRUE
+     AND duplicate_of IS NULL
+     AND NOT EXISTS (SELECT 1 FROM approved_jobs_archive ar WHERE ar.discovered_job_id = discovered_jobs.id)
+"""
+
+def count_reevaluation_candidates() -> int:
+    """Number of analyzed, canonical jobs with a stored description."""
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) " + SQL_REEVALUATION_CANDIDATES + ";").fetchone()[0]
+
+def fetch_reevaluation_chunk(cursor_discovered: Optional[str], cursor_id: Optional[int], limit: int) -> List[sqlite3.Row]:
+    """Next *limit* re-evaluation candidates, newest first, strictly after the keyset cursor."""
+    sql = (
+        "SELECT id, job_id, url, title, decompress_text(jd.body) AS description, date_discovered "
+        + SQL_REEVALUATION_CANDIDATES
+        + """
+       AND (? IS NULL OR (date_discovered, id) < (?, ?))
+     ORDER BY date_discovered DESC, id DESC
+     LIMIT ?;
+    """)
+    with get_conn() as conn:
+        return conn.execute(sql, (cursor_discovered, cursor_discovered, cursor_id, limit)).fetchall()
+
+def create_reevaluation_run(criteria_hash: str, total: int) -> int:
+    """Starts a new re-evaluation run, superseding unfinished runs for other criteria."""
+    with get_conn() as conn:
+        conn.execute(
+            "UPDATE reevaluation_runs SET status = 'superseded', finished_at = CURRENT_TIMESTAMP "
+            "WHERE status IN ('running', 'cancel_requested', 'cancelled');"
+        )
+        cur = conn.execute(
+            "INSERT INTO reevaluation_runs (criteria_hash, total) VALUES (?, ?);",
+            (criteria_hash, total),
+        )
+        return cur.lastrowid
+
+def fetch_resumable_reevaluation_run(criteria_hash: str) -> Optional[sqlite3.Row]:
+    """The latest unfinished run for the same criteria, if any."""
+    sql = """
+    SELECT * FROM reevaluation_runs
+     WHERE criteria_hash = ? AND status IN ('running', 'cancel_requested', 'cancelled')
+     ORDER BY id DESC LIMIT 1;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (criteria_hash,)).fetchone()
+
+def fetch_reevaluation_run(run_id: int) -> Optional[sqlite3.Row]:
+    with get_conn() as conn:
+        return conn.execute("SELECT * FROM reevaluation_runs WHERE id = ?;", (run_id,)).fetchone()
+
+def fetch_latest_reevaluation_run() -> Optional[sqlite3.Row]:
+    with get_conn() as conn:
+        return conn.execute("SELECT * FROM reevaluation_runs ORDER BY id DESC LIMIT 1;").fetchone()
+
+def update_reevaluation_progress(
+    run_id: int, cursor_discovered: str, cursor_id: int,
+    processed: int, approved: int, revoked: int, errors: int,
+) -> None:
+    """Advances a run's keyset cursor and adds the chunk's counters."""
+    sql = """
+    UPDATE reevaluation_runs
+       SET cursor_discovered = ?, cursor_id = ?,
+           processed = processed + ?, approved = approved + ?,
+           revoked = revoked + ?, errors = errors + ?
+     WHERE id = ?;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (cursor_discovered, cursor_id, processed, approved, revoked, errors, run_id))
+
+def set_reevaluation_status(run_id: int, status: str) -> None:
+    sql = """
+    UPDATE reevaluation_runs
+       SET status = ?,
+           finished_at = CASE WHEN ? IN ('cancelled', 'completed') THEN CURRENT_TIMESTAMP ELSE finished_at END
+     WHERE id = ?;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (status, status, run_id))
+
+def request_reevaluation_cancel() -> bool:
+    """Asks the running re-evaluation (if any) to stop after its current chunk."""
+    sql = "UPDATE reevaluation_runs SET status = 'cancel_requested' WHERE status = 'running';"
+    with get_conn() as conn:
+        return conn.execute(sql).rowcount > 0
+
+def reevaluation_cancel_requested(run_id: int) -> bool:
+    with get_conn() as conn:
+        row = conn.execute("SELECT status FROM reevaluation_runs WHERE id = ?;", (run_id,)).fetchone()
+        return row is not None and row["status"] == "cancel_requested"
+
+def upsert_approval(linkedin_job_id: int, reason: str) -> bool:
+    """Approves a job or refreshes the reason of an existing approval in place
+    (date_approved, date_applied and is_archived are kept).
+    Returns True if the job was not approved before.
+    """
+    sql = """
+    INSERT INTO approved_jobs (discovered_job_id, reason)
+    SELECT id, ? FROM discovered_jobs WHERE job_id = ?
+    ON CONFLICT(discovered_job_id) DO UPDATE SET reason = excluded.reason;
+    """
+    with get_conn() as conn:
+        existed = conn.execute(
+            "SELECT 1 FROM approved_jobs a JOIN discovered_jobs d ON d.id = a.discovered_job_id WHERE d.job_id = ?;",
+            (linkedin_job_id,),
+        ).fetchone() is not None
+        conn.execute(sql, (reason, linkedin_job_id))
+        return not existed
+
+def revoke_approval(linkedin_job_id: int) -> bool:
+    """Removes a job's approval unless it has already been applied to.
+    Returns True if an approval was removed.
+    """
+    sql = """
+    DELETE FROM approved_jobs
+     WHERE discovered_job_id = (SELECT id FROM discovered_jobs WHERE job_id = ?)
+       AND date_applied IS NULL;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (linkedin_job_id,)).rowcount > 0
+
+# --- Relevance Functions ---
+
+def fetch_job_text(linkedin_job_id: int) -> Optional[sqlite3.Row]:
+    with get_conn() as conn:
+        return conn.execute(
+            "SELECT d.id, d.title, decompress_text(jd.body) AS description FROM discovered_jobs d "
+            "LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id WHERE d.job_id = ?;",
+            (linkedin_job_id,),
+        ).fetchone()
+
+@_write_op()
+def save_job_vector(discovered_job_id: int, indices: bytes, weights: bytes, buckets: List[int]) -> bool:
+    """Stores a job's sparse vector; document frequencies are incremented only the first time.
+    Returns True if the vector is new.
+    """
+    with get_conn() as conn:
+        cur = conn.execute(
+            "INSERT INTO job_vectors (discovered_job_id, indices, weights) VALUES (?, ?, ?) "
+            "ON CONFLICT(discovered_job_id) DO NOTHING;",
+            (discovered_job_id, indices, weights),
+        )
+        if cur.rowcount != 1:
+            return False
+        conn.executemany(
+            "INSERT INTO relevance_df (bucket, df) VALUES (?, 1) ON CONFLICT(bucket) DO UPDATE SET df = df + 1;",
+            [(bucket,) for bucket in buckets],
+        )
+        return True
+
+def fetch_relevance_df() -> Tuple[List[int], List[int]]:
+    with get_conn() as conn:
+        rows = conn.execute("SELECT bucket, df FROM relevance_df;").fetchall()
+    return [row["bucket"] for row in rows], [row["df"] for row in rows]
+
+def count_job_vectors() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM job_vectors;").fetchone()[0]
+
+def fetch_unvectorized_approved_jobs() -> List[sqlite3.Row]:
+    sql = """
+    SELECT d.id, d.title, decompress_text(jd.body) AS description
+      FROM approved_jobs a
+      JOIN discovered_jobs d ON d.id = a.discovered_job_id
+      LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id
+      LEFT JOIN job_vectors v ON v.discovered_job_id = d.id
+     WHERE v.discovered_job_id IS NULL;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql).fetchall()
+
+def fetch_approved_job_vectors() -> List[sqlite3.Row]:
+    sql = """
+    SELECT v.discovered_job_id, v.indices, v.weights
+      FROM approved_jobs a
+      JOIN job_vectors v ON v.discovered_job_id = a.discovered_job_id;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql).fetchall()
+
+@_write_op(wait=False)
+def update_relevance_scores(scores: List[Tuple[float, int]]) -> None:
+    """Sets approved_jobs.relevance_score from (score, discovered_job_id) pairs."""
+    with get_conn() as conn:
+        conn.executemany("UPDATE approved_jobs SET relevance_score = ? WHERE discovered_job_id = ?;", scores)
+
+def get_relevance_state(key: str) -> Optional[str]:
+    with get_conn() as conn:
+        row = conn.execute("SELECT value FROM relevance_state WHERE key = ?;", (key,)).fetchone()
+        return row["value"] if row else None
+
+def set_relevance_state(key: str, value: str) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO relevance_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value;",
+            (key, value),
+        )
 
 def clear_all_approved_jobs() -> int:
     """Deletes all records from the approved_jobs table.
@@ -238,6 +1965,382 @@ def archive_all_applied_jobs() -> int:
         cur = conn.execute(sql)
         return cur.rowcount
 
+# Bulk actions: one statement over the whole selection, so a page action is one transaction.
+# The IDs are bound as a single JSON array, which keeps clear of SQLite's parameter limit.
+SQL_SELECTED_IDS = "id IN (SELECT value FROM json_each(?))"
+
+
+def mark_jobs_as_applied(approved_job_pks: Iterable[int]) -> int:
+    """Marks the given approved_jobs rows as applied (rows already applied are left alone).
+    Returns the number of rows updated.
+    """
+    sql = f"UPDATE approved_jobs SET date_applied = CURRENT_TIMESTAMP WHERE {SQL_SELECTED_IDS} AND date_applied IS NULL;"
+    with get_conn() as conn:
+        return conn.execute(sql, (json.dumps([int(pk) for pk in approved_job_pks]),)).rowcount
+
+def archive_applied_jobs_by_id(approved_job_pks: Iterable[int]) -> int:
+    """Marks the given applied jobs as archived. Returns the number of rows updated."""
+    sql = f"""
+    UPDATE approved_jobs
+    SET is_archived = TRUE
+    WHERE {SQL_SELECTED_IDS} AND date_applied IS NOT NULL AND (is_archived = FALSE OR is_archived IS NULL);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (json.dumps([int(pk) for pk in approved_job_pks]),)).rowcount
+
+def delete_approved_jobs(approved_job_pks: Iterable[int]) -> int:
+    """Deletes the given rows from approved_jobs. Returns the number of rows deleted."""
+    with get_conn() as conn:
+        return conn.execute(f"DELETE FROM approved_jobs WHERE {SQL_SELECTED_IDS};",
+                            (json.dumps([int(pk) for pk in approved_job_pks]),)).rowcount
+
+# --- Statistics Functions ---
+# job_stats is kept current by triggers; these reads cost the same however many jobs there are
+
+def fetch_job_funnel() -> Dict[str, int]:
+    """Discovered, analyzed, approved and applied totals."""
+    with get_conn() as conn:
+        row = conn.execute(
+            "SELECT discovered, analyzed, approved, applied FROM job_stats WHERE dimension = 'total' AND value = '';"
+        ).fetchone()
+    return dict(row) if row else {"discovered": 0, "analyzed": 0, "approved": 0, "applied": 0}
+
+def fetch_job_stats(dimension: str) -> List[sqlite3.Row]:
+    """Per-keyword, per-location or per-day counts (dimension 'keyword', 'location' or 'day');
+    days oldest first, otherwise most approvals first.
+    """
+    order_by = "value" if dimension == "day" else "approved DESC, discovered DESC, value"
+    sql = f"""
+    SELECT value, discovered, analyzed, approved, applied FROM job_stats
+     WHERE dimension = ? AND (discovered != 0 OR approved != 0 OR applied != 0)
+     ORDER BY {order_by};
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (dimension,)).fetchall()
+
+def rebuild_job_stats() -> None:
+    """Recompute job_stats from discovered_jobs and approved_jobs."""
+    with get_conn() as conn:
+        _rebuild_job_stats(conn)
+
+# --- Retention Functions ---
+# Each call is one short write transaction so a running scan only ever waits for one batch
+
+def purge_rejected_descriptions(older_than_days: int, after_id: int, limit: int) -> Tuple[int, Optional[int]]:
+    """Drops the stored descriptions of rejected jobs discovered more than *older_than_days* ago.
+    Examines up to *limit* stored descriptions with discovered_jobs.id > *after_id*.
+    Returns (descriptions dropped, id to continue after, or None when all were examined).
+    """
+    sql = """
+    SELECT jd.discovered_job_id AS id,
+           d.analyzed = TRUE
+           AND d.date_discovered < datetime('now', ?)
+           AND NOT EXISTS (SELECT 1 FROM approved_jobs a WHERE a.discovered_job_id = d.id)
+           AND NOT EXISTS (SELECT 1 FROM approved_jobs_archive ar WHERE ar.discovered_job_id = d.id) AS rejected
+      FROM job_descriptions jd
+      JOIN discovered_jobs d ON d.id = jd.discovered_job_id
+     WHERE jd.discovered_job_id > ?
+     ORDER BY jd.discovered_job_id
+     LIMIT ?;
+    """
+    with get_conn() as conn:
+        rows = conn.execute(sql, (f"-{int(older_than_days)} days", after_id, limit)).fetchall()
+        purge = [(row["id"],) for row in rows if row["rejected"]]
+        # Re-indexed by title alone; row_missing_details skips analyzed jobs, so no re-fetch
+        for (discovered_id,) in purge:
+            indexed = _indexed_text(conn, discovered_id)
+            conn.execute("DELETE FROM job_descriptions WHERE discovered_job_id = ?;", (discovered_id,))
+            _reindex_search_text(conn, discovered_id, indexed)
+    return len(purge), (rows[-1]["id"] if len(rows) == limit else None)
+
+def archive_applied_jobs(older_than_days: int, limit: int) -> int:
+    """Moves up to *limit* archived approvals applied to more than *older_than_days* ago
+    from approved_jobs to approved_jobs_archive. Returns the number moved.
+    """
+    select_sql = """
+    SELECT id FROM approved_jobs
+     WHERE is_archived = TRUE AND date_applied < datetime('now', ?)
+     ORDER BY id
+     LIMIT ?;
+    """
+    with get_conn() as conn:
+        ids = [(row["id"],) for row in conn.execute(select_sql, (f"-{int(older_than_days)} days", limit))]
+        conn.executemany("""
+            INSERT OR REPLACE INTO approved_jobs_archive
+                (id, discovered_job_id, date_approved, reason, date_applied, relevance_score)
+            SELECT id, discovered_job_id, date_approved, reason, date_applied, relevance_score
+              FROM approved_jobs WHERE id = ?;
+        """, ids)
+        conn.executemany("DELETE FROM approved_jobs WHERE id = ?;", ids)
+    return len(ids)
+
+def prune_evaluations(older_than_days: int, limit: int) -> int:
+    """Deletes up to *limit* evaluation records and prompt metrics older than *older_than_days*.
+    Returns the number of rows deleted.
+    """
+    cutoff = f"-{int(older_than_days)} days"
+    deleted = 0
+    with get_conn() as conn:
+        for table in ("evaluations", "prompt_metrics"):
+            deleted += conn.execute(f"""
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table} WHERE created_at < datetime('now', ?) ORDER BY created_at LIMIT ?
+                );
+            """, (cutoff, limit)).rowcount
+    return deleted
+
+def incremental_vacuum(pages: Optional[int] = None) -> int:
+    """Returns up to *pages* free pages (all if None) to the filesystem. Returns bytes released."""
+    with get_conn() as conn:
+        page_size = conn.execute("PRAGMA page_size;").fetchone()[0]
+        before = conn.execute("PRAGMA page_count;").fetchone()[0]
+        # Frees one page per step; executescript steps it to completion, execute() would stop after one
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages) if pages else 0});")
+        after = conn.execute("PRAGMA page_count;").fetchone()[0]
+    return (before - after) * page_size
+
+def merge_search_index(pages: int) -> None:
+    """Merges up to *pages* pages of jobs_fts segments, so space held by entries of
+    dropped descriptions is freed a little at a time instead of by one large 'optimize'.
+    A negative page count makes FTS5 merge even levels below the automerge threshold.
+    """
+    with get_conn() as conn:
+        conn.execute("INSERT INTO jobs_fts(jobs_fts, rank) VALUES ('merge', ?);", (-int(pages),))
+
+def database_size() -> Dict[str, int]:
+    """Size of the database in bytes and how much of it is free pages."""
+    with get_conn() as conn:
+        page_size = conn.execute("PRAGMA page_size;").fetchone()[0]
+        return {
+            "bytes": conn.execute("PRAGMA page_count;").fetchone()[0] * page_size,
+            "free_bytes": conn.execute("PRAGMA freelist_count;").fetchone()[0] * page_size,
+        }
+
+# --- Corpus Export Functions ---
+# One row per discovered job with its approval and latest evaluation, for export_jobs.py.
+
+EXPORT_CHUNK_SIZE = 1000
+
+SQL_JOB_EXPORT = """
+SELECT dj.id AS discovered_job_id, dj.job_id, dj.url, dj.title, decompress_text(jd.body) AS description,
+       dj.location, dj.keyword, dj.date_discovered, dj.analyzed, dj.duplicate_of,
+       aj.id IS NOT NULL AS approved, aj.date_approved, aj.reason AS approval_reason,
+       aj.date_applied, aj.is_archived, aj.relevance_score,
+       (SELECT COUNT(*) FROM evaluations AS e WHERE e.discovered_job_id = dj.id) AS evaluation_count,
+       ev.created_at AS last_evaluated_at, ev.provider AS last_provider, ev.model AS last_model,
+       ev.eligible AS last_eligible, ev.reasoning AS last_reasoning,
+       ev.missing_requirements AS last_missing_requirements, ev.latency_ms AS last_latency_ms,
+       ev.total_tokens AS last_total_tokens, ev.error AS last_error
+  FROM discovered_jobs AS dj
+  LEFT JOIN job_descriptions AS jd ON jd.discovered_job_id = dj.id
+  LEFT JOIN (
+        SELECT id, discovered_job_id, date_approved, reason, date_applied, is_archived, relevance_score
+          FROM approved_jobs
+        UNION ALL -- Applications moved out by retention.py stay in the export
+        SELECT id, discovered_job_id, date_approved, reason, date_applied, TRUE, relevance_score
+          FROM approved_jobs_archive) AS aj ON aj.discovered_job_id = dj.id
+  LEFT JOIN evaluations AS ev ON ev.id = (
+        SELECT e.id FROM evaluations AS e
+         WHERE e.discovered_job_id = dj.id
+         ORDER BY e.created_at DESC, e.id DESC
+         LIMIT 1)
+{where}
+ ORDER BY dj.id;
+"""
+
+# Jobs discovered, approved, applied to or evaluated at or after :since
+SQL_JOB_EXPORT_SINCE = """
+ WHERE dj.id IN (
+       SELECT id FROM discovered_jobs WHERE date_discovered >= :since
+       UNION SELECT discovered_job_id FROM approved_jobs WHERE date_approved >= :since OR date_applied >= :since
+       UNION SELECT discovered_job_id FROM approved_jobs_archive WHERE date_approved >= :since OR date_applied >= :since
+       UNION SELECT discovered_job_id FROM evaluations WHERE created_at >= :since)
+"""
+
+
+def iter_job_export(since: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yields the export rows as lists of up to *chunk_size* dicts, in discovered_jobs order.
+    With *since* ('YYYY-MM-DD HH:MM:SS', UTC) only jobs that changed since then are included.
+    The rows come from one statement stepped chunk by chunk on a connection of its own:
+    a single snapshot that writers do not wait on, with at most one chunk in memory.
+    """
+    conn = _open_connection(DB_PATH)
+    try:
+        cur = conn.execute(SQL_JOB_EXPORT.format(where=SQL_JOB_EXPORT_SINCE if since else ""), {"since": since})
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+# --- Scan Metrics Functions ---
+
+# scan_runs counters written by finish_scan_run
+SCAN_TOTALS = ("searches", "links", "cache_hits", "new_jobs", "requests", "rate_limited", "llm_calls", "duplicates", "approved", "errors")
+
+def create_scan_run(max_workers: int) -> int:
+    """Records the start of a scan; returns its id for finish_scan_run."""
+    with get_conn() as conn:
+        return conn.execute("INSERT INTO scan_runs (max_workers) VALUES (?);", (max_workers,)).lastrowid
+
+def finish_scan_run(
+    scan_id: int, status: str, duration_s: float, totals: Dict[str, int], stages: List[Dict[str, Any]],
+) -> None:
+    """Stores a finished scan's totals (SCAN_TOTALS) and per-stage latency summaries in one transaction."""
+    assignments = ", ".join(f"{name} = :{name}" for name in SCAN_TOTALS)
+    sql = f"""
+    UPDATE scan_runs
+       SET finished_at = CURRENT_TIMESTAMP, status = :status, duration_s = :duration_s, {assignments}
+     WHERE id = :id;
+    """
+    params = {name: totals.get(name, 0) for name in SCAN_TOTALS}
+    params.update(id=scan_id, status=status, duration_s=duration_s)
+    with get_conn() as conn:
+        conn.execute(sql, params)
+        conn.executemany("""
+            INSERT OR REPLACE INTO scan_stage_metrics
+                (scan_id, stage, calls, errors, total_ms, p50_ms, p95_ms, p99_ms, max_ms)
+            VALUES (:scan_id, :stage, :calls, :errors, :total_ms, :p50_ms, :p95_ms, :p99_ms, :max_ms);
+        """, [dict(stage, scan_id=scan_id) for stage in stages])
+
+def fetch_scan_runs(limit: int = 100) -> List[sqlite3.Row]:
+    """The latest *limit* scans, oldest first."""
+    sql = "SELECT * FROM (SELECT * FROM scan_runs ORDER BY id DESC LIMIT ?) ORDER BY id;"
+    with get_conn() as conn:
+        return conn.execute(sql, (limit,)).fetchall()
+
+def fetch_scan_stage_metrics(limit: int = 100) -> List[sqlite3.Row]:
+    """Per-stage summaries of the latest *limit* scans, oldest scan first."""
+    sql = """
+    SELECT m.*, r.started_at FROM scan_stage_metrics m
+      JOIN (SELECT id, started_at FROM scan_runs ORDER BY id DESC LIMIT ?) r ON r.id = m.scan_id
+     ORDER BY m.scan_id, m.stage;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (limit,)).fetchall()
+
+# --- Search Yield Functions ---
+
+SEARCH_YIELD_COLUMNS = (
+    "keyword", "location", "workplace", "runs", "skipped", "links", "new_jobs", "approved", "requests",
+    "expected_value", "last_run_at",
+)
+
+def fetch_search_yields() -> List[sqlite3.Row]:
+    """Every search's yield record, most valuable first."""
+    with get_conn() as conn:
+        return conn.execute("SELECT * FROM search_yield ORDER BY expected_value DESC, keyword, location, workplace;").fetchall()
+
+def save_search_yields(rows: List[Dict[str, Any]]) -> None:
+    """Inserts or replaces search yield records (SEARCH_YIELD_COLUMNS) in one transaction."""
+    columns = ", ".join(SEARCH_YIELD_COLUMNS)
+    values = ", ".join(f":{name}" for name in SEARCH_YIELD_COLUMNS)
+    with get_conn() as conn:
+        conn.executemany(f"INSERT OR REPLACE INTO search_yield ({columns}) VALUES ({values});", rows)
+
+# --- Search Result Functions ---
+
+@_write_op(wait=False)
+def record_search_results(location: str, job_ids: List[int]) -> None:
+    """Notes that a search for *location* returned these LinkedIn job ids."""
+    sql = """
+    INSERT INTO search_results (location, job_id) VALUES (?, ?)
+    ON CONFLICT(location, job_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP;
+    """
+    with get_conn() as conn:
+        conn.executemany(sql, [(location, job_id) for job_id in job_ids])
+
+def fetch_search_results(since_days: float) -> List[sqlite3.Row]:
+    """(location, job_id) pairs seen in the last *since_days* days."""
+    sql = "SELECT location, job_id FROM search_results WHERE last_seen >= datetime('now', ?);"
+    with get_conn() as conn:
+        return conn.execute(sql, (f"-{float(since_days)} days",)).fetchall()
+
+def prune_search_results(older_than_days: float) -> int:
+    """Deletes results not seen for *older_than_days* days; returns the number deleted."""
+    with get_conn() as conn:
+        return conn.execute(
+            "DELETE FROM search_results WHERE last_seen < datetime('now', ?);", (f"-{float(older_than_days)} days",)
+        ).rowcount
+
+# --- Evaluation Queue Functions ---
+# Jobs with stored details wait here for their AI evaluation; mark_job_as_analyzed removes them
+
+@_write_op(wait=False)
+def enqueue_evaluation(
+    linkedin_job_id: int, base_priority: float, posted_at: Optional[str], relevance: Optional[float],
+    search: Optional[Tuple[str, str, str]] = None,
+) -> None:
+    """Queues a job for evaluation, or updates its priority if it is already queued.
+    *search* is the (keyword, location, workplace) of the search whose results listed the job.
+    """
+    sql = """
+    INSERT INTO evaluation_queue (discovered_job_id, posted_at, relevance, base_priority,
+                                  search_keyword, search_location, search_workplace)
+    SELECT id, ?, ?, ?, ?, ?, ? FROM discovered_jobs WHERE job_id = ?
+    ON CONFLICT(discovered_job_id) DO UPDATE SET
+        posted_at = excluded.posted_at, relevance = excluded.relevance, base_priority = excluded.base_priority,
+        search_keyword = excluded.search_keyword, search_location = excluded.search_location,
+        search_workplace = excluded.search_workplace;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (posted_at, relevance, base_priority, *(search or (None, None, None)), linkedin_job_id))
+
+@_write_op()
+def claim_evaluations(limit: int, age_weight: float, max_age_bonus: float) -> List[sqlite3.Row]:
+    """Claims the *limit* unclaimed jobs with the highest priority (base_priority plus *age_weight*
+    per hour in the queue, at most *max_age_bonus*), highest first, with their job_id, url, title,
+    description and the search that queued them (search_keyword, search_location, search_workplace).
+    """
+    sql = """
+    SELECT q.discovered_job_id, d.job_id, d.url, d.title, decompress_text(jd.body) AS description,
+           q.search_keyword, q.search_location, q.search_workplace,
+           q.base_priority + MIN(?, ? * (julianday('now') - julianday(q.enqueued_at)) * 24) AS priority
+      FROM evaluation_queue q
+      JOIN discovered_jobs d ON d.id = q.discovered_job_id
+      LEFT JOIN job_descriptions jd ON jd.discovered_job_id = q.discovered_job_id
+     WHERE q.claimed_at IS NULL
+     ORDER BY priority DESC
+     LIMIT ?;
+    """
+    with get_conn() as conn:
+        rows = conn.execute(sql, (max_age_bonus, age_weight, limit)).fetchall()
+        conn.executemany(
+            "UPDATE evaluation_queue SET claimed_at = CURRENT_TIMESTAMP WHERE discovered_job_id = ?;",
+            [(row["discovered_job_id"],) for row in rows],
+        )
+    return rows
+
+@_write_op()
+def release_evaluation_claims(older_than_minutes: float) -> int:
+    """Returns jobs claimed longer ago than this (by a process that died mid-evaluation) to the queue."""
+    sql = """
+    UPDATE evaluation_queue SET claimed_at = NULL
+     WHERE claimed_at IS NOT NULL AND claimed_at <= datetime('now', ?);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (f"-{float(older_than_minutes)} minutes",)).rowcount
+
+def count_evaluation_queue() -> int:
+    """Jobs waiting for (or in) evaluation."""
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM evaluation_queue;").fetchone()[0]
+
+def fetch_evaluation_queue(limit: int, age_weight: float, max_age_bonus: float) -> List[sqlite3.Row]:
+    """The *limit* highest-priority queued jobs, as claim_evaluations would order them."""
+    sql = """
+    SELECT d.job_id, d.title, d.keyword, q.enqueued_at, q.posted_at, q.relevance, q.base_priority, q.claimed_at,
+           q.base_priority + MIN(?, ? * (julianday('now') - julianday(q.enqueued_at)) * 24) AS priority
+      FROM evaluation_queue q
+      JOIN discovered_jobs d ON d.id = q.discovered_job_id
+     ORDER BY priority DESC
+     LIMIT ?;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (max_age_bonus, age_weight, limit)).fetchall()
+
 # --- Scan Control Functions ---
 
 def set_stop_scan_flag(stop: bool) -> None:
@@ -256,4 +2359,65 @@ def should_stop_scan() -> bool:
         row = cur.fetchone()
         if row:
             return bool(row["stop_requested"])
-        return False # Default to false if row somehow doesn't exist or flag is null
\ No newline at end of file
+        return False # Default to false if row somehow doesn't exist or flag is null
+
+
+# --- Query Plan Check ---
+
+# query name -> ((SQL, params), index the plan must use)
+EXPECTED_QUERY_INDEXES = {
+    "dashboard page": (pending_approved_jobs_query(cursor=("2024-01-01 00:00:00", 1), limit=26), "idx_approved_pending"),
+    "dashboard best match": (pending_approved_jobs_query("Best match", cursor=(0.5, 1), limit=26),
+                             "idx_approved_pending_relevance"),
+    "applied page": (applied_jobs_query(cursor=("2024-01-01 00:00:00", 1), limit=26), "idx_approved_applied"),
+    "unapproved": ((SQL_UNAPPROVED_JOBS, ()), "idx_discovered_date"),
+    "dashboard search": (pending_approved_jobs_query(search="splunk", limit=26), "VIRTUAL TABLE INDEX"),
+    "applied search": (applied_jobs_query(search="splunk", limit=26), "VIRTUAL TABLE INDEX"),
+}
+
+def explain_query_plan(sql: str, params: tuple = ()) -> List[str]:
+    with get_conn() as conn:
+        return [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def check_query_plans() -> Dict[str, Tuple[bool, List[str]]]:
+    """Runs EXPLAIN QUERY PLAN on the page queries.
+    Returns {name: (uses the expected index, plan lines)}.
+    """
+    init_db()
+    results = {}
+    for name, ((sql, params), index) in EXPECTED_QUERY_INDEXES.items():
+        plan = explain_query_plan(sql, params)
+        results[name] = (any(index in line for line in plan), plan)
+    return results
+
+
+# --- Storage Backend ---
+# The functions above are the SQLite implementation of storage.OPERATIONS.
+# use_backend() rebinds those names to another implementation, so callers
+# keep calling database.<operation> whatever [storage] backend is configured.
+import storage
+
+_SQLITE_BINDINGS = {name: globals()[name] for name in storage.OPERATIONS + storage.ATTRIBUTES}
+BACKEND = "sqlite"
+DatabaseError: Tuple[type, ...] = (sqlite3.Error,) # What the pages catch around storage calls
+
+
+def use_backend(name: str) -> None:
+    """Binds the storage operations of this module to the "sqlite" or "postgres" implementation."""
+    global BACKEND, DatabaseError
+    if name == "sqlite":
+        bindings, errors = _SQLITE_BINDINGS, (sqlite3.Error,)
+    elif name == "postgres":
+        import pg_database
+        missing = storage.missing_operations(pg_database)
+        if missing:
+            raise RuntimeError(f"pg_database does not implement: {', '.join(missing)}")
+        bindings = {op: getattr(pg_database, op) for op in storage.OPERATIONS + storage.ATTRIBUTES}
+        errors = (sqlite3.Error, pg_database.psycopg2.Error)
+    else:
+        raise ValueError(f"Unknown storage backend {name!r}; expected one of {', '.join(storage.BACKENDS)}")
+    globals().update(bindings)
+    BACKEND, DatabaseError = name, errors
+
+
+use_backend(storage.get_settings()["backend"])
@@ -0,0 +1,136 @@
+# dedupe.py
+# Near-duplicate detection for job postings.
+#
+# The same role is frequently posted under several LinkedIn job IDs (one per
+# city, reposts, agencies).  Each posting gets a 64-bit SimHash over its
+# normalized title + description.  The hash is split into eight 8-bit bands
+# that are stored (and indexed) in the DB; by the pigeonhole principle any two
+# hashes within MAX_HAMMING_DISTANCE <= 7 bits share at least one band, so a
+# band lookup finds every candidate without scanning the table.  Each band
+# matches ~1/256 of the stored postings; the Hamming check then discards the
+# unrelated ones.
+#
+# A per-city repost of a 350-word posting differs in 2-5 bits (one changed word
+# moves every shingle that contains it), while distinct postings built from the
+# same template differ in 13+; check_dedupe.py measures both.
+
+import hashlib
+import re
+from typing import Optional, List, Tuple
+
+import database
+
+SIMHASH_BITS = 64
+BAND_COUNT = 8
+BAND_BITS = SIMHASH_BITS // BAND_COUNT
+MAX_HAMMING_DISTANCE = 7
+SHINGLE_SIZE = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text: Optional[str]) -> List[str]:
+    """Lowercase and tokenize text, dropping punctuation and whitespace runs."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _features(title: Optional[str], description: Optional[str]) -> List[str]:
+    """Word shingles of the description plus the title tokens."""
+    title_tokens = normalize_text(title)
+    desc_tokens = normalize_text(description)
+    features = [f"t:{tok}" for tok in title_tokens]
+    if len(desc_tokens) < SHINGLE_SIZE:
+        features.extend(desc_tokens)
+    else:
+        features.extend(
+            " ".join(desc_tokens[i:i + SHINGLE_SIZE])
+            for i in range(len(desc_tokens) - SHINGLE_SIZE + 1)
+        )
+    return features
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(title: Optional[str], description: Optional[str]) -> Optional[int]:
+    """Return the unsigned 64-bit SimHash of a posting, or None if there is no text."""
+    features = _features(title, description)
+    if not features:
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count("1")
+
+
+def bands(value: int) -> Tuple[int, ...]:
+    """Split a SimHash into BAND_COUNT integers used as LSH bucket keys."""
+    mask = (1 << BAND_BITS) - 1
+    return tuple((value >> (i * BAND_BITS)) & mask for i in range(BAND_COUNT))
+
+
+def to_signed(value: int) -> int:
+    """SQLite INTEGER is signed 64-bit; store the hash in two's complement."""
+    return value - (1 << SIMHASH_BITS) if value >= (1 << (SIMHASH_BITS - 1)) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << SIMHASH_BITS) if value < 0 else value
+
+
+def index_posting(linkedin_job_id: int, title: Optional[str], description: Optional[str]) -> Optional[int]:
+    """Store the fingerprint of a posting. Returns the unsigned SimHash (None if no text)."""
+    value = simhash(title, description)
+    if value is None:
+        return None
+    database.save_fingerprint(linkedin_job_id, to_signed(value), bands(value))
+    return value
+
+
+def find_canonical(linkedin_job_id: int, title: Optional[str], description: Optional[str]):
+    """Fingerprint a posting and look for an already analyzed near-duplicate.
+
+    Returns the canonical discovered_jobs row (with an ``approved_reason``
+    column that is NULL when the canonical posting was rejected), or None if
+    this posting is the first of its kind.
+    """
+    value = index_posting(linkedin_job_id, title, description)
+    if value is None:
+        return None
+
+    best = None
+    best_distance = MAX_HAMMING_DISTANCE + 1
+    for candidate in database.fetch_fingerprint_candidates(linkedin_job_id, bands(value)):
+        distance = hamming_distance(value, to_unsigned(candidate["simhash"]))
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+    return best
+
+
+def backfill_fingerprints() -> int:
+    """Fingerprint every stored posting that does not have a fingerprint yet."""
+    count = 0
+    for row in database.fetch_unfingerprinted_jobs():
+        if index_posting(row["job_id"], row["title"], row["description"]) is not None:
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    database.init_db()
+    print(f"Fingerprinted {backfill_fingerprints()} stored postings.")
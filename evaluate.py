@@ -2,15 +2,20 @@
 # import env # Removed as API keys are now managed via config.toml
 
 import re
+import time
 from config import load
+import prompt_builder
+import mock_llm
+import routing
 
 import os
 import json
 from typing import List, Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
 
-import openai
-import google.generativeai as genai
-from google.generativeai import types as gen_types
+# The provider SDKs (openai, google.generativeai) take seconds to import, so
+# they are imported by the calls that use them rather than here: importing this
+# module (and so the scraper, database tools and pages) stays cheap.
 
 
 
@@ -31,6 +36,10 @@ _GEMINI_MODEL = "models/gemini-2.5-flash-preview-04-17"
 
 _FENCE_RE = re.compile(r"^```(?:json)?\n|\n```$", re.S)
 
+# Provider calls attach usage metadata (provider, model, token counts) under this key;
+# analyze_job_detailed pops it so callers only ever see the model's verdict.
+USAGE_KEY = "_usage"
+
 
 
 def contains_exclusions(title):
@@ -60,7 +69,7 @@ def sanitize_text(text: str) -> str:
     # Remove any remaining non-ASCII characters
     return ''.join(char for char in text if ord(char) < 128)
     
-def prompt_eligibility(job_description: str, resume: Optional[str] = None) -> str:
+def prompt_eligibility(job_description: str, resume: Optional[str] = None, evaluation_prompt: Optional[str] = None) -> str:
     base = (
         "You are an AI recruiter assistant.\n"
         "You are a helpful assistant that evaluates job postings with a realistic understanding of hiring practices. "
@@ -70,9 +79,11 @@ def prompt_eligibility(job_description: str, resume: Optional[str] = None) -> st
         "Assume the candidate is eligible via US citizenship or residency requirements."
     )
     
-    # Add evaluation criteria from config
-    if 'prompts' in config and 'evaluation_prompt' in config['prompts']:
-        base += f"\n\nEvaluation Criteria:\n{config['prompts']['evaluation_prompt']}"
+    # Add evaluation criteria (the caller's freshly loaded prompt, else the one loaded at import)
+    if evaluation_prompt is None and 'prompts' in config:
+        evaluation_prompt = config['prompts'].get('evaluation_prompt')
+    if evaluation_prompt:
+        base += f"\n\nEvaluation Criteria:\n{evaluation_prompt}"
     
     if resume:
         base += f"\n\nJob Description:\n{sanitize_text(job_description.strip())}\n\nCandidate Resume:\n{sanitize_text(resume.strip())}"
@@ -88,7 +99,43 @@ def prompt_eligibility(job_description: str, resume: Optional[str] = None) -> st
     )
     return base
 
+def build_eligibility_prompt(
+    job_description: str,
+    resume: Optional[str] = None,
+    token_budget: int = prompt_builder.DEFAULT_TOKEN_BUDGET,
+    evaluation_prompt: Optional[str] = None,
+) -> tuple[str, Dict[str, Any]]:
+    """Build the eligibility prompt, trimming the description to fit *token_budget*.
+    Returns (prompt, stats) where stats describe the prompt size before/after trimming.
+    """
+    full_prompt = prompt_eligibility(job_description, resume, evaluation_prompt)
+    stats: Dict[str, Any] = {
+        "token_budget": token_budget,
+        "original_tokens": prompt_builder.estimate_tokens(full_prompt),
+    }
+
+    if token_budget <= 0:
+        # Trimming disabled: send the whole description
+        description_tokens = prompt_builder.estimate_tokens(job_description)
+        stats.update({
+            "description_tokens_before": description_tokens,
+            "description_tokens_after": description_tokens,
+            "sections_total": None,
+            "sections_kept": None,
+        })
+        prompt = full_prompt
+    else:
+        overhead = prompt_builder.estimate_tokens(prompt_eligibility("", resume, evaluation_prompt))
+        description_budget = max(token_budget - overhead, prompt_builder.MIN_DESCRIPTION_TOKENS)
+        trimmed, trim_stats = prompt_builder.trim_description(job_description, description_budget)
+        stats.update(trim_stats)
+        prompt = prompt_eligibility(trimmed, resume, evaluation_prompt)
+
+    stats["prompt_tokens"] = prompt_builder.estimate_tokens(prompt)
+    return prompt, stats
+
 def call_openai(prompt: str, temperature: float = 0) -> Dict[str, Any]:
+    import openai
     # Ensure the prompt is ASCII-only
     sanitized_prompt = sanitize_text(prompt)
     
@@ -98,9 +145,19 @@ def call_openai(prompt: str, temperature: float = 0) -> Dict[str, Any]:
         temperature=temperature,
         response_format={"type": "json_object"},
     )
-    return json.loads(response.choices[0].message.content)
+    result = json.loads(response.choices[0].message.content)
+    usage = getattr(response, "usage", None)
+    result[USAGE_KEY] = {
+        "provider": "openai",
+        "model": getattr(response, "model", None) or _OPENAI_MODEL,
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+    return result
 
 def call_gemini(prompt: str, temperature: float = 0) -> dict:
+    import google.generativeai as genai
     current_config = load() # Load config, potentially cached
     google_api_key = current_config.get("api_keys", {}).get("google_api_key")
 
@@ -121,46 +178,126 @@ def call_gemini(prompt: str, temperature: float = 0) -> dict:
         generation_config={"temperature": temperature},
     )
     txt = _FENCE_RE.sub("", resp.text.strip())
-    return json.loads(txt)
-
-
-def analyze_job(
-    job_description: str,
-    resume: Optional[str] = default_resume,
-    temperature: float = 0,
-) -> Dict[str, Any]:
-
-    prompt = prompt_eligibility(job_description, resume)
+    result = json.loads(txt)
+    usage = getattr(resp, "usage_metadata", None)
+    result[USAGE_KEY] = {
+        "provider": "gemini",
+        "model": _GEMINI_MODEL,
+        "prompt_tokens": getattr(usage, "prompt_token_count", None),
+        "completion_tokens": getattr(usage, "candidates_token_count", None),
+        "total_tokens": getattr(usage, "total_token_count", None),
+    }
+    return result
 
-    # Load the latest configuration to determine the AI provider
-    current_config = load() # ADDED to load fresh config
-    provider_to_use = current_config.get("general", {}).get("ai_provider", "gemini").lower() # ADDED
 
-    call: Callable[[str, float], Dict[str, Any]]
+def resolve_provider(provider_to_use: str, current_config: Dict[str, Any]) -> Callable[[str, float], Dict[str, Any]]:
+    """Return the call function for a single provider, configuring its API key first."""
     if provider_to_use == "openai": # MODIFIED
         # Configure OpenAI API key before making a call
-        # current_config = load() # No need to load again, already loaded above
         openai_api_key = current_config.get("api_keys", {}).get("openai_api_key")
         if not openai_api_key or openai_api_key == "YOUR_OPENAI_API_KEY_HERE":
             raise ValueError("OpenAI API Key not configured in config.toml or is a placeholder.")
+        import openai
         openai.api_key = openai_api_key # Set the API key for the openai module
-        call = call_openai
+        return call_openai
     elif provider_to_use == "gemini": # MODIFIED
         # Gemini configuration is handled within call_gemini itself to ensure it happens just before model instantiation
-        call = call_gemini
+        google_api_key = current_config.get("api_keys", {}).get("google_api_key")
+        if not google_api_key or google_api_key == "YOUR_GOOGLE_API_KEY_HERE":
+            raise ValueError("Google API Key not configured in config.toml or is a placeholder.")
+        return call_gemini
+    elif provider_to_use == "mock":
+        # Local stand-in for offline runs and benchmarks; settings come from the [mock] config section
+        return mock_llm.call_mock
+    # raise ValueError("provider must be 'openai' or 'gemini'") # MODIFIED error message
+    raise ValueError(f"Invalid AI provider configured: '{provider_to_use}'. Must be 'openai', 'gemini', 'mock' or 'multi'.") # MODIFIED
+
+
+def analyze_job_detailed(
+    job_description: str,
+    resume: Optional[str] = default_resume,
+    temperature: float = 0,
+    provider: Optional[str] = None,
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """Evaluate one job description and return (verdict, metadata).
+    Metadata holds provider, model, latency_ms, token counts (as reported by the provider)
+    and estimated_prompt_tokens. *provider* overrides general.ai_provider when given.
+    """
+
+    # Load the latest configuration to determine the AI provider
+    current_config = load() # ADDED to load fresh config
+    token_budget = int(current_config.get("prompts", {}).get("token_budget", prompt_builder.DEFAULT_TOKEN_BUDGET))
+    evaluation_prompt = current_config.get("prompts", {}).get("evaluation_prompt")
+    prompt, prompt_stats = build_eligibility_prompt(job_description, resume, token_budget, evaluation_prompt)
+
+    provider_to_use = (provider or current_config.get("general", {}).get("ai_provider", "gemini")).lower() # ADDED
+
+    call: Callable[[str, float], Dict[str, Any]]
+    if provider_to_use == "multi":
+        # Hedged/failover routing across every provider in [routing].providers that has a usable key
+        routing_settings = {**routing.DEFAULT_ROUTING_SETTINGS, **current_config.get("routing", {})}
+        calls: Dict[str, Callable[[str, float], Dict[str, Any]]] = {}
+        for name in routing_settings["providers"]:
+            try:
+                calls[name.lower()] = resolve_provider(name.lower(), current_config)
+            except ValueError:
+                continue # Provider not configured; route among the others
+        if not calls:
+            raise ValueError("ai_provider 'multi' needs at least one provider in [routing].providers with a configured API key.")
+        call = lambda p, t: routing.route(p, t, calls, routing_settings)[0]
     else:
-        # raise ValueError("provider must be 'openai' or 'gemini'") # MODIFIED error message
-        raise ValueError(f"Invalid AI provider configured: '{provider_to_use}'. Must be 'openai' or 'gemini'.") # MODIFIED
+        call = resolve_provider(provider_to_use, current_config)
 
-    return call(prompt, temperature)
+    start = time.perf_counter()
+    result = call(prompt, temperature)
+    latency_ms = (time.perf_counter() - start) * 1000
+    usage = result.pop(USAGE_KEY, {}) if isinstance(result, dict) else {}
+    prompt_stats["latency_ms"] = latency_ms
+    prompt_stats["eligible"] = bool(result.get("eligible")) if isinstance(result, dict) else None
+    prompt_builder.record_prompt_stats(prompt_stats)
+
+    metadata = {
+        "provider": usage.get("provider", provider_to_use),
+        "model": usage.get("model"),
+        "latency_ms": latency_ms,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+        "estimated_prompt_tokens": prompt_stats["prompt_tokens"],
+    }
+    return result, metadata
+
+
+def analyze_job(
+    job_description: str,
+    resume: Optional[str] = default_resume,
+    temperature: float = 0,
+    provider: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Evaluate one job description. *provider* overrides general.ai_provider when given."""
+    return analyze_job_detailed(job_description, resume=resume, temperature=temperature, provider=provider)[0]
 
 
 def batch_analyse_jobs(
     job_descriptions: List[str],
     resume: Optional[str] = None,
     temperature: float = 0,
+    max_workers: int = 1,
+    return_exceptions: bool = False,
+    provider: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    return [
-        analyze_job(desc, resume=resume, temperature=temperature) # MODIFIED
-        for desc in job_descriptions
-    ]
\ No newline at end of file
+    """Evaluate several descriptions, up to *max_workers* at a time. Results keep input order.
+    With *return_exceptions*, a failed evaluation yields its exception instead of aborting the batch.
+    """
+    def _one(desc: str):
+        try:
+            return analyze_job(desc, resume=resume, temperature=temperature, provider=provider) # MODIFIED
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+
+    if max_workers <= 1:
+        return [_one(desc) for desc in job_descriptions]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_one, job_descriptions))
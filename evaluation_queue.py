@@ -0,0 +1,135 @@
+# evaluation_queue.py
+# Persistent priority queue of jobs waiting for their AI evaluation.
+#
+# The scraper stores a job's details and enqueues it (database.evaluation_queue)
+# with a base priority
+#
+#   keyword_weight * (recency_weight * 0.5 ** (days since posted / recency_half_life_days)
+#                     + relevance_weight * local relevance to the resume)
+#
+# and drain() evaluates the queue with bounded concurrency, highest priority
+# first; age_weight is added for every hour a job has waited, up to
+# max_age_bonus, so nothing starves and a long wait cannot bury fresh postings.
+# Workers claim one job per free slot, so freshly posted, relevant roles
+# overtake older entries while the scan is still finding them, and a
+# scan that is cut short leaves only the least valuable jobs unevaluated.
+# The queue survives the process: the next scan (or `python evaluation_queue.py`)
+# picks up where the last one stopped.  Settings live in an optional
+# [evaluation_queue] section of config.toml:
+#
+#   [evaluation_queue]
+#   max_workers = 5
+#   keyword_weights = { "Security Engineer" = 2.0 }
+#
+# Run `python evaluation_queue.py --list 20` to see the next jobs in line.
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional
+
+from config import load
+import database
+
+DEFAULT_QUEUE_SETTINGS = {
+    "max_workers": 5,              # Concurrent evaluations
+    "recency_weight": 1.0,         # Priority of a job posted just now
+    "recency_half_life_days": 7.0, # The recency term halves with every this many days since posting
+    "relevance_weight": 1.0,       # Weight of the local TF-IDF similarity to the resume (0..1)
+    "age_weight": 0.01,            # Priority gained per hour in the queue
+    "max_age_bonus": 1.0,          # Most priority a job can gain by waiting
+    "keyword_weights": {},         # Search keyword -> multiplier; unlisted keywords count 1.0
+    "claim_timeout_minutes": 30,   # Claims older than this (a process died mid-evaluation) are released
+}
+
+POLL_INTERVAL_S = 0.5 # How often an idle drain() looks for new work
+
+
+def get_settings() -> Dict[str, Any]:
+    """[evaluation_queue] config values over the defaults."""
+    settings = dict(DEFAULT_QUEUE_SETTINGS)
+    settings.update(load().get("evaluation_queue", {}))
+    return settings
+
+
+def base_priority(posted_at: Optional[str], keyword: Optional[str], relevance: Optional[float], settings: Dict[str, Any]) -> float:
+    """Priority of a job when it is enqueued; a job with no known posting date counts as posted now."""
+    age_days = 0.0
+    if posted_at:
+        posted = datetime.strptime(posted_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        age_days = max(0.0, (datetime.now(timezone.utc) - posted).total_seconds() / 86400)
+    recency = 0.5 ** (age_days / max(settings["recency_half_life_days"], 1e-9))
+    weight = settings["keyword_weights"].get(keyword, 1.0)
+    return weight * (settings["recency_weight"] * recency + settings["relevance_weight"] * (relevance or 0.0))
+
+
+def drain(
+    evaluate_one: Callable[[Any], Any],
+    stop_requested: Callable[[], bool],
+    more_coming: Callable[[], bool] = lambda: False,
+    settings: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Evaluates queued jobs, highest priority first, with at most max_workers at a time.
+    *evaluate_one* gets a claimed row (job_id, url, title, description) and must take the job off
+    the queue (database.mark_job_as_analyzed).  Returns when *stop_requested*() is true, letting
+    evaluations in flight finish, or when the queue is empty and *more_coming*() is false.
+    Returns the number of evaluations that completed without raising.
+    """
+    settings = settings or get_settings()
+    max_workers = max(1, int(settings["max_workers"]))
+    in_flight = set()
+    evaluated = 0
+
+    def finished(done) -> int:
+        failed = [future.exception() for future in done if future.exception() is not None]
+        for error in failed:
+            sys.stdout.write(f"\nError evaluating a queued job: {error}\n")
+            sys.stdout.flush()
+        return len(done) - len(failed)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while not stop_requested():
+            coming = more_coming() # Read before claiming, so work enqueued meanwhile is not missed
+            free = max_workers - len(in_flight)
+            if free:
+                for row in database.claim_evaluations(free, settings["age_weight"], settings["max_age_bonus"]):
+                    in_flight.add(pool.submit(evaluate_one, row))
+            if not in_flight:
+                if not coming:
+                    break
+                time.sleep(POLL_INTERVAL_S)
+                continue
+            done, in_flight = wait(in_flight, timeout=POLL_INTERVAL_S, return_when=FIRST_COMPLETED)
+            evaluated += finished(done)
+        evaluated += finished(wait(in_flight).done) # Stopped: let the evaluations in flight finish
+    return evaluated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the jobs waiting in the evaluation queue, or list them.")
+    parser.add_argument("--list", type=int, metavar="N", help="Only list the N jobs next in line.")
+    args = parser.parse_args()
+
+    database.init_db()
+    settings = get_settings()
+    if args.list:
+        print(f"{database.count_evaluation_queue()} job(s) queued.")
+        for row in database.fetch_evaluation_queue(args.list, settings["age_weight"], settings["max_age_bonus"]):
+            print(f"{row['priority']:7.3f}  {row['job_id']}  {row['title'] or 'N/A'} ({row['keyword']}, posted {row['posted_at'] or 'unknown'})")
+        return
+
+    import scrape
+    released = database.release_evaluation_claims(settings["claim_timeout_minutes"])
+    if released:
+        print(f"Released {released} stale claim(s).")
+    evaluated = drain(
+        lambda row: scrape._evaluate_and_record(row["job_id"], row["title"], row["description"], row["url"]),
+        lambda: False, settings=settings,
+    )
+    print(f"\nEvaluated {evaluated} job(s); {database.count_evaluation_queue()} left in the queue.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# export_jobs.py
+# Streaming export of the job corpus for analysis outside JobFinder.
+#
+# Writes one row per discovered job, with its approval and latest AI
+# evaluation, to Parquet, CSV or JSON Lines.  Rows are read through a chunked
+# cursor (database.iter_job_export) and written a chunk at a time, so memory
+# use is bounded by the chunk size however large the corpus is.  --since
+# exports only the jobs discovered, approved, applied to or evaluated since a
+# timestamp; every run prints the value to pass next time.  Example:
+#
+#   python export_jobs.py --format parquet --out jobs.parquet
+#   python export_jobs.py --format jsonl --since "2026-10-01 00:00:00" --out new_jobs.jsonl
+#
+# Parquet needs pyarrow (installed along with streamlit).
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+import database
+
+FORMATS = ("parquet", "csv", "jsonl")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S" # As CURRENT_TIMESTAMP stores them (UTC)
+
+# Output columns and their types; the types fix the Parquet schema however sparse a chunk is
+EXPORT_COLUMNS = (
+    ("discovered_job_id", "int"),
+    ("job_id", "int"),
+    ("url", "str"),
+    ("title", "str"),
+    ("description", "str"),
+    ("location", "str"),
+    ("keyword", "str"),
+    ("date_discovered", "timestamp"),
+    ("analyzed", "bool"),
+    ("duplicate_of", "int"),
+    ("approved", "bool"),
+    ("date_approved", "timestamp"),
+    ("approval_reason", "str"),
+    ("date_applied", "timestamp"),
+    ("is_archived", "bool"),
+    ("relevance_score", "float"),
+    ("evaluation_count", "int"),
+    ("last_evaluated_at", "timestamp"),
+    ("last_provider", "str"),
+    ("last_model", "str"),
+    ("last_eligible", "bool"),
+    ("last_reasoning", "str"),
+    ("last_missing_requirements", "str"), # JSON list
+    ("last_latency_ms", "float"),
+    ("last_total_tokens", "int"),
+    ("last_error", "str"),
+)
+
+
+def parse_since(text: str) -> str:
+    """'YYYY-MM-DD', 'YYYY-MM-DD HH:MM[:SS]' or any ISO 8601 timestamp, as stored (UTC, TIMESTAMP_FORMAT)."""
+    moment = datetime.fromisoformat(text.strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def _convert(kind: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if kind == "timestamp":
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if kind == "bool":
+        return bool(value)
+    if kind == "int":
+        return int(value)
+    if kind == "float":
+        return float(value)
+    return str(value)
+
+
+def _normalized(chunks: Iterable[List[Dict[str, Any]]]) -> Iterable[List[Dict[str, Any]]]:
+    """Rows with the EXPORT_COLUMNS names, order and types, whichever backend produced them."""
+    for chunk in chunks:
+        yield [{name: _convert(kind, row.get(name)) for name, kind in EXPORT_COLUMNS} for row in chunk]
+
+
+def _write_parquet(chunks, out, progress) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow); use --format csv or jsonl.") from None
+    arrow_types = {"int": pa.int64(), "str": pa.string(), "bool": pa.bool_(), "float": pa.float64(), "timestamp": pa.timestamp("us")}
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in EXPORT_COLUMNS])
+    rows = 0
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema)) # One row group per chunk
+            rows += len(chunk)
+            progress(rows)
+    return rows
+
+
+def _write_csv(chunks, out, progress) -> int:
+    rows = 0
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[name for name, _ in EXPORT_COLUMNS])
+        writer.writeheader()
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+            progress(rows)
+    return rows
+
+
+def _write_jsonl(chunks, out, progress) -> int:
+    rows = 0
+    with open(out, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.writelines(json.dumps(row, default=str, ensure_ascii=False) + "\n" for row in chunk)
+            rows += len(chunk)
+            progress(rows)
+    return rows
+
+
+_WRITERS = {"parquet": _write_parquet, "csv": _write_csv, "jsonl": _write_jsonl}
+
+
+def export(
+    out,
+    fmt: str,
+    since: Optional[str] = None,
+    chunk_size: int = database.EXPORT_CHUNK_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """Write the corpus (or the jobs changed since *since*) to *out* in *fmt*.
+    The file is written beside *out* and renamed into place when complete.
+    Returns the row count and next_since, the *since* value for the next incremental run.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    since = parse_since(since) if since else None
+    # Taken before reading, so the next incremental run overlaps this one rather than leaving a gap
+    next_since = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    out = Path(out)
+    partial = out.with_name(out.name + ".part")
+    try:
+        rows = _WRITERS[fmt](_normalized(database.iter_job_export(since, chunk_size)), partial, progress or (lambda rows: None))
+        os.replace(partial, out)
+    finally:
+        if partial.exists():
+            partial.unlink()
+    return {"rows": rows, "out": str(out), "format": fmt, "since": since, "next_since": next_since}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export discovered jobs with their approvals and evaluations.")
+    parser.add_argument("--format", choices=FORMATS, default="parquet", help="Output format (default: parquet).")
+    parser.add_argument("--out", default=None, help="Output file (default: jobs_export.<format>).")
+    parser.add_argument("--since", default=None, help="Only jobs discovered, approved, applied to or evaluated since this UTC timestamp.")
+    parser.add_argument("--chunk-size", type=int, default=database.EXPORT_CHUNK_SIZE, help="Rows read and written per chunk.")
+    args = parser.parse_args()
+    if args.since:
+        try:
+            parse_since(args.since)
+        except ValueError:
+            parser.error(f"--since: not a timestamp: {args.since!r}")
+
+    database.init_db()
+    result = export(
+        args.out or f"jobs_export.{args.format}", args.format, args.since, max(1, args.chunk_size),
+        progress=lambda rows: (sys.stdout.write(f"\r{rows} rows"), sys.stdout.flush()),
+    )
+    print()
+    print(f"Exported {result['rows']} jobs to {result['out']}.")
+    print(f"Next incremental run: --since \"{result['next_since']}\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# mock_llm.py
+# Local stand-in for the Gemini/OpenAI calls (general.ai_provider = "mock").
+#
+# Lets scans and benchmarks run without API keys.  Latency is drawn from a
+# log-normal distribution, a configurable fraction of calls fail, and the
+# verdict is a deterministic function of the prompt so repeated runs agree.
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from typing import Dict, Any
+
+from config import load
+import prompt_builder
+
+DEFAULT_MOCK_SETTINGS = {
+    "latency_ms_median": 800.0,  # Median simulated call latency
+    "latency_sigma": 0.5,        # Log-normal shape; 0 gives a constant latency
+    "error_rate": 0.0,           # Fraction of calls that raise MockProviderError
+    "approve_rate": 0.3,         # Fraction of prompts judged eligible
+    "seed": 0,                   # Changes which prompts are approved
+}
+
+_overrides: Dict[str, Any] = {}
+_rng = random.Random()
+_rng_lock = threading.Lock()
+
+
+class MockProviderError(Exception):
+    """Simulated provider failure (timeout, 5xx, quota) raised by call_mock."""
+
+
+def set_overrides(**settings: Any) -> None:
+    """Override [mock] config values for this process (used by benchmark.py)."""
+    unknown = set(settings) - set(DEFAULT_MOCK_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown mock settings: {', '.join(sorted(unknown))}")
+    _overrides.update(settings)
+
+
+def get_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_MOCK_SETTINGS)
+    settings.update(load().get("mock", {}))
+    settings.update(_overrides)
+    return settings
+
+
+def _fraction(prompt: str, salt: str) -> float:
+    """Deterministic value in [0, 1) derived from the prompt text."""
+    digest = hashlib.sha256(f"{salt}:{prompt}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def call_mock(prompt: str, temperature: float = 0) -> Dict[str, Any]:
+    settings = get_settings()
+
+    with _rng_lock:
+        gauss = _rng.gauss(0, 1)
+        roll = _rng.random()
+    latency_s = float(settings["latency_ms_median"]) / 1000 * math.exp(float(settings["latency_sigma"]) * gauss)
+    time.sleep(max(latency_s, 0))
+
+    if roll < float(settings["error_rate"]):
+        raise MockProviderError("Simulated provider error")
+
+    eligible = _fraction(prompt, f"verdict-{settings['seed']}") < float(settings["approve_rate"])
+    result = {
+        "eligible": eligible,
+        "reasoning": f"Mock verdict ({'eligible' if eligible else 'not eligible'}) derived from the prompt hash.",
+        "missing_requirements": [] if eligible else ["Mock requirement not met"],
+    }
+    prompt_tokens = prompt_builder.estimate_tokens(prompt)
+    completion_tokens = prompt_builder.estimate_tokens(json.dumps(result))
+    result["_usage"] = {
+        "provider": "mock",
+        "model": "mock",
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    return result
@@ -28,36 +28,47 @@ except ImportError:
     archive_all_applied_jobs = None # Fallback
     st.error("Could not import archive_all_applied_jobs function from database.py. Archiving will not work.")
 
+try:
+    from database import archive_applied_jobs_by_id, delete_approved_jobs # Bulk actions on the selected jobs
+except ImportError:
+    archive_applied_jobs_by_id = None
+    delete_approved_jobs = None
 
-def fetch_only_applied_jobs_data():
-    """Fetches jobs that have been marked as applied and are NOT archived."""
-    if not DB_PATH.exists():
+try:
+    from database import fetch_applied_page, count_applied, DEFAULT_PAGE_SIZE, BACKEND, DatabaseError
+    from query_cache import cached # Results shared across sessions until the database changes
+    fetch_applied_page = cached(fetch_applied_page)
+    count_applied = cached(count_applied)
+except ImportError:
+    fetch_applied_page = None
+    def count_applied(search=None): return 0
+    DEFAULT_PAGE_SIZE = 25
+    BACKEND = "sqlite"
+    DatabaseError = (sqlite3.Error,)
+
+try:
+    from config import load
+except ImportError:
+    load = None
+
+
+def fetch_only_applied_jobs_data(search: str = "", cursor=None, page_size: int = DEFAULT_PAGE_SIZE):
+    """Fetches one page of jobs that have been marked as applied and are NOT archived.
+    With *search*, only jobs whose title/description match, best match first.
+    Returns (DataFrame, cursor of the next page or None on the last page).
+    """
+    if BACKEND == "sqlite" and not DB_PATH.exists():
         st.error(f"Database file not found at: {DB_PATH}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
+
+    if fetch_applied_page is None:
+        st.error("Applied jobs query (fallback) not loaded.")
+        return pd.DataFrame(), None
 
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        query = """
-        SELECT
-            aj.id AS approved_job_pk, 
-            dj.url,
-            dj.title,
-            dj.location,
-            dj.keyword,
-            aj.date_approved,
-            aj.reason,
-            aj.date_applied 
-        FROM
-            approved_jobs aj
-        JOIN
-            discovered_jobs dj ON aj.discovered_job_id = dj.id
-        WHERE 
-            aj.date_applied IS NOT NULL AND (aj.is_archived = FALSE OR aj.is_archived IS NULL) -- Key condition: only fetch applied and not archived jobs
-        ORDER BY
-            aj.date_applied DESC; -- Order by when applied
-        """
-        df = pd.read_sql_query(query, conn)
+        # Keyset page served by idx_approved_applied; only this page's rows are loaded
+        rows, next_cursor = fetch_applied_page(search, cursor, page_size)
+        df = pd.DataFrame([dict(row) for row in rows])
         
         # Format dates
         if 'date_approved' in df.columns:
@@ -66,16 +77,66 @@ def fetch_only_applied_jobs_data():
         if 'date_applied' in df.columns:
             try: df['date_applied'] = pd.to_datetime(df['date_applied']).dt.strftime('%Y-%m-%d %H:%M:%S')
             except: pass
-        return df
-    except sqlite3.Error as e:
-        st.error(f"SQLite error fetching applied jobs: {e}")
-        return pd.DataFrame()
-    finally:
-        if conn:
-            conn.close()
+        return df, next_cursor
+    except DatabaseError as e:
+        st.error(f"Database error fetching applied jobs: {e}")
+        return pd.DataFrame(), None
+
+def get_page_size() -> int:
+    try:
+        return max(1, int(load().get("display", {}).get("page_size", DEFAULT_PAGE_SIZE))) if load else DEFAULT_PAGE_SIZE
+    except Exception:
+        return DEFAULT_PAGE_SIZE
+
+def reset_applied_pages():
+    st.session_state.applied_page_cursors = [None]
+    clear_applied_selection()
+
+def next_applied_page(cursor):
+    st.session_state.applied_page_cursors.append(cursor)
+    clear_applied_selection()
+
+def prev_applied_page():
+    if len(st.session_state.applied_page_cursors) > 1:
+        st.session_state.applied_page_cursors.pop()
+    clear_applied_selection()
+
+# Each job has a checkbox keyed APPLIED_SELECT_PREFIX + approved_job_pk; the bulk actions
+# are on_click callbacks, so a whole selection is one transaction and one rerun.
+APPLIED_SELECT_PREFIX = "select_applied_"
+
+def selected_applied_pks() -> list:
+    return [int(key[len(APPLIED_SELECT_PREFIX):]) for key, ticked in st.session_state.items()
+            if str(key).startswith(APPLIED_SELECT_PREFIX) and ticked]
+
+def select_applied_page(pks):
+    for pk in pks:
+        st.session_state[f"{APPLIED_SELECT_PREFIX}{pk}"] = True
+
+def clear_applied_selection():
+    for key in [key for key in st.session_state.keys() if str(key).startswith(APPLIED_SELECT_PREFIX)]:
+        del st.session_state[key]
+
+def archive_selected_action(pks):
+    try:
+        archived_count = archive_applied_jobs_by_id(pks)
+        st.session_state.applied_action_message = f"Archived {archived_count} applied jobs."
+    except Exception as e:
+        st.session_state.applied_action_message = f"Error archiving applied jobs: {e}"
+    clear_applied_selection()
+
+def delete_selected_action(pks):
+    try:
+        deleted_count = delete_approved_jobs(pks)
+        st.session_state.applied_action_message = f"Deleted {deleted_count} applied jobs."
+    except Exception as e:
+        st.session_state.applied_action_message = f"Error deleting applied jobs: {e}"
+    clear_applied_selection()
 
 if 'applied_action_message' not in st.session_state:
     st.session_state.applied_action_message = ""
+if 'applied_page_cursors' not in st.session_state:
+    st.session_state.applied_page_cursors = [None] # Cursor of every page up to the current one; [None] = first page
 
 # --- Sidebar Actions for Applied Jobs ---
 with st.sidebar:
@@ -85,6 +146,7 @@ with st.sidebar:
             try:
                 archived_count = archive_all_applied_jobs()
                 st.session_state.applied_action_message = f"Successfully archived {archived_count} applied jobs."
+                reset_applied_pages()
                 st.rerun()
             except Exception as e:
                 st.session_state.applied_action_message = f"Error archiving applied jobs: {e}"
@@ -103,21 +165,52 @@ if st.session_state.applied_action_message:
 
 st.markdown("This page lists all jobs that you have marked as 'applied' and have not been archived.")
 
-applied_df = fetch_only_applied_jobs_data()
+search_text = st.text_input("🔎 Search applied jobs", key="applied_search", on_change=reset_applied_pages,
+                            placeholder='e.g. splunk "incident response"',
+                            help='Full-text search over titles and descriptions. All words must match; use "quotes" for phrases, word* for prefixes and OR for alternatives.')
 
-if applied_df.empty:
+page_size = get_page_size()
+page_cursors = st.session_state.applied_page_cursors
+applied_df, next_cursor = fetch_only_applied_jobs_data(search_text, page_cursors[-1], page_size)
+
+if applied_df.empty and search_text.strip():
+    st.info(f"No applied jobs match '{search_text}'.")
+elif applied_df.empty:
     st.info("No jobs have been marked as 'applied' yet, or an error occurred fetching them.")
 else:
-    st.metric(label="Total Jobs Applied To", value=len(applied_df))
+    total_applied = count_applied(search_text)
+    st.metric(label="Matching Jobs Applied To" if search_text.strip() else "Total Jobs Applied To", value=total_applied)
+    page_number = len(page_cursors)
+    first_shown = (page_number - 1) * page_size + 1
+    st.caption(f"Page {page_number} · showing {first_shown}–{first_shown + len(applied_df) - 1} of {total_applied}")
+
+    # Bulk actions on the jobs ticked on this page
+    selected_pks = selected_applied_pks()
+    bulk_unavailable = archive_applied_jobs_by_id is None
+    col_select, col_clear, col_archive, col_delete = st.columns(4)
+    with col_select:
+        st.button("☑️ Select Page", key="applied_select_page", on_click=select_applied_page,
+                  args=([int(pk) for pk in applied_df['approved_job_pk']],), disabled=bulk_unavailable, use_container_width=True)
+    with col_clear:
+        st.button("Clear Selection", key="applied_clear_selection", on_click=clear_applied_selection,
+                  disabled=not selected_pks, use_container_width=True)
+    with col_archive:
+        st.button(f"Archive {len(selected_pks)} Jobs", key="applied_bulk_archive", on_click=archive_selected_action,
+                  args=(selected_pks,), disabled=bulk_unavailable or not selected_pks, use_container_width=True,
+                  help="Mark every selected job as archived.")
+    with col_delete:
+        st.button(f"Delete {len(selected_pks)} Jobs", key="applied_bulk_delete", on_click=delete_selected_action,
+                  args=(selected_pks,), disabled=bulk_unavailable or not selected_pks, use_container_width=True, type="primary",
+                  help="Remove every selected job from the applied list.")
     st.markdown("---")
 
-    # Displaying applied jobs - similar to approved jobs list but without action buttons for now
-    # You might want different columns or actions on this page later.
     for index, row in applied_df.iterrows():
         title_escaped = html.escape(str(row['title'] if pd.notna(row['title']) else 'N/A'))
         url_filled = str(row['url'] if pd.notna(row['url']) else '#')
         
         st.markdown(f"### <a href='{url_filled}' target='_blank'>{title_escaped}</a>", unsafe_allow_html=True)
+        if not bulk_unavailable:
+            st.checkbox("Select", key=f"{APPLIED_SELECT_PREFIX}{row['approved_job_pk']}")
         col1, col2 = st.columns(2)
         with col1:
             st.caption(f"Applied On: {row.get('date_applied', 'N/A')}")
@@ -128,3 +221,11 @@ else:
         with st.expander("Reason for Original Approval"):
             st.markdown(f"<div style='word-wrap: break-word; white-space: pre-wrap;'>{html.escape(str(row.get('reason', 'N/A')))}</div>", unsafe_allow_html=True)
         st.markdown("---")
+
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        st.button("◀ Previous", key="applied_prev_page", on_click=prev_applied_page,
+                  disabled=page_number == 1, use_container_width=True)
+    with col_next:
+        st.button("Next ▶", key="applied_next_page", on_click=next_applied_page, args=(next_cursor,),
+                  disabled=next_cursor is None, use_container_width=True)
@@ -45,7 +45,8 @@ def get_default_config_structure() -> dict: # Updated default structure
             "text": "Paste your default resume text here...\n\nTechnical Skills\n...\n\nProfessional Experience\n..."
         },
         "prompts": {
-             "evaluation_prompt": "MUST-HAVE Criteria (job must meet ALL of these):\n1. ...\n\nFLEXIBLE Criteria:\n...\n\nDo NOT reject the job solely for:\n..."
+             "evaluation_prompt": "MUST-HAVE Criteria (job must meet ALL of these):\n1. ...\n\nFLEXIBLE Criteria:\n...\n\nDo NOT reject the job solely for:\n...",
+             "token_budget": 0
         },
         "api_keys": { # Added API keys section
             "google_api_key": "YOUR_GOOGLE_API_KEY_HERE",
@@ -53,6 +54,9 @@ def get_default_config_structure() -> dict: # Updated default structure
         },
         "general": { # ADDED
             "ai_provider": "gemini" # ADDED
+        },
+        "display": {
+            "page_size": 25
         }
     }
 
@@ -118,8 +122,8 @@ def is_valid_config_structure(imported_data: dict) -> tuple[bool, str]:
             return False, f"Missing setting '{general_key_name}' in 'general' section." # ADDED
         if not isinstance(general_imported[general_key_name], str): # ADDED
             return False, f"Setting '{general_key_name}' in 'general' section must be a string." # ADDED
-        if general_key_name == "ai_provider" and general_imported[general_key_name] not in ["gemini", "openai"]: # ADDED
-             return False, "ai_provider in general section must be either 'gemini' or 'openai'." # ADDED
+        if general_key_name == "ai_provider" and general_imported[general_key_name] not in ["gemini", "openai", "mock", "multi"]: # ADDED
+             return False, "ai_provider in general section must be 'gemini', 'openai', 'mock' or 'multi'." # ADDED
             
     return True, "Configuration structure is valid."
 
@@ -143,10 +147,10 @@ with st.sidebar:
             "locations_text_area", "keywords_text_area", 
             "exclusions_text_area", "default_resume_text_area", 
             "ai_prompt_text_area", "google_api_key_input", "openai_api_key_input",
-            "ai_provider_select" 
+            "ai_provider_select", "token_budget_input", "page_size_input"
         ]
         if all(k in st.session_state for k in required_toml_keys):
-            updated_config_data = {
+            ui_config_data = {
                 "search_parameters": {
                     "locations": [loc.strip() for loc in st.session_state.locations_text_area.splitlines() if loc.strip()],
                     "keywords": [kw.strip() for kw in st.session_state.keywords_text_area.splitlines() if kw.strip()],
@@ -156,7 +160,8 @@ with st.sidebar:
                     "text": st.session_state.default_resume_text_area
                 },
                 "prompts": {
-                    "evaluation_prompt": st.session_state.ai_prompt_text_area
+                    "evaluation_prompt": st.session_state.ai_prompt_text_area,
+                    "token_budget": int(st.session_state.token_budget_input)
                 },
                 "api_keys": {
                     "google_api_key": st.session_state.google_api_key_input,
@@ -164,8 +169,15 @@ with st.sidebar:
                 },
                 "general": { 
                     "ai_provider": st.session_state.ai_provider_select 
+                },
+                "display": {
+                    "page_size": int(st.session_state.page_size_input)
                 }
             }
+            # Merge into the existing file so settings without a widget here are preserved
+            updated_config_data = load_config_data(CONFIG_FILE_PATH)
+            for section_name, section_values in ui_config_data.items():
+                updated_config_data.setdefault(section_name, {}).update(section_values)
             save_config_data(CONFIG_FILE_PATH, updated_config_data) 
             st.session_state.config_just_saved_inputs_page = True 
         else:
@@ -239,14 +251,14 @@ with st.sidebar:
     st.subheader("AI Settings") 
     current_config_for_radio = load_config_data(CONFIG_FILE_PATH) 
     current_ai_provider = current_config_for_radio.get("general", {}).get("ai_provider", "gemini") 
-    ai_provider_options = ["gemini", "openai"] 
+    ai_provider_options = ["gemini", "openai", "multi", "mock"] 
     
     selected_ai_provider = st.radio( 
         "Choose AI Provider:", 
         options=ai_provider_options, 
         index=ai_provider_options.index(current_ai_provider) if current_ai_provider in ai_provider_options else 0, 
         key="ai_provider_select", 
-        help="Select the AI provider for job evaluation. This setting is saved when you click 'Save All Settings'." 
+        help="Select the AI provider for job evaluation. 'multi' routes across Gemini and OpenAI: slow calls are hedged to the other provider and errors fail over. 'mock' is a local stand-in (no API key, simulated latency and verdicts) for offline runs and benchmarks. This setting is saved when you click 'Save All Settings'." 
     ) 
 
 
@@ -280,6 +292,9 @@ default_resume_val = resume_data.get("text", "")
 
 prompts_data = config_data.get("prompts", {})
 ai_prompt_val = prompts_data.get("evaluation_prompt", "")
+token_budget_val = int(prompts_data.get("token_budget", 0))
+
+page_size_val = int(config_data.get("display", {}).get("page_size", 25))
 
 api_keys_data = config_data.get("api_keys", {}) # Get API keys section
 google_api_key_val = api_keys_data.get("google_api_key", "")
@@ -315,4 +330,23 @@ st.text_area("🚫 Exclusion Keywords", value=exclusions_str_val, height=150, ke
 st.header("✨ AI Evaluation Settings")
 st.text_area("📄 Resume Text", value=default_resume_val, height=300, key="default_resume_text_area")
 st.text_area("🤖 AI Prompt", value=ai_prompt_val, height=300, key="ai_prompt_text_area")
+st.number_input(
+    "🧮 Prompt Token Budget",
+    min_value=0,
+    step=250,
+    value=token_budget_val,
+    help="Maximum estimated tokens per evaluation prompt. 0 (the default) sends full descriptions. Descriptions that already fit are sent unchanged; longer ones lose benefits/EEO boilerplate and then low-value sections until they fit. Requirements and responsibilities are never treated as boilerplate.",
+    key="token_budget_input"
+)
+
+st.header("🖥️ Display Settings")
+st.number_input(
+    "📄 Jobs per Page",
+    min_value=5,
+    max_value=200,
+    step=5,
+    value=min(max(page_size_val, 5), 200),
+    help="Number of jobs shown per page on the Dashboard and Applied Jobs pages. Smaller pages render faster.",
+    key="page_size_input"
+)
 
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 from pathlib import Path
 from utils import DB_PATH # Assuming DB_PATH is correctly defined in utils
+from database import fetch_job_funnel, fetch_job_stats, BACKEND
+from query_cache import cached # Results shared across sessions until the database changes
+fetch_job_funnel = cached(fetch_job_funnel)
+fetch_job_stats = cached(fetch_job_stats)
 import altair as alt # ADDED Altair for better charts
 
 # --- Page Config ---
@@ -12,128 +15,96 @@ st.set_page_config(
 )
 
 # --- Helper Functions ---
-@st.cache_resource # MODIFIED: Changed from st.cache_data to st.cache_resource
-def get_db_connection():
-    """Establishes a connection to the SQLite database."""
+def fetch_stats():
+    """Reads the funnel totals and per-keyword/location/day counts from job_stats.
+    The table is maintained by triggers, so this is always current and never scans the jobs.
+    """
     if not DB_PATH:
         st.error("Database path (DB_PATH) is not configured in utils.py.")
-        return None
-    if not Path(DB_PATH).exists():
+        return None, {}
+    if BACKEND == "sqlite" and not Path(DB_PATH).exists():
         st.error(f"Database file not found at: {DB_PATH}")
-        return None
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        return conn
-    except sqlite3.Error as e:
-        st.error(f"SQLite error connecting to database: {e}")
-        return None
-
-@st.cache_data # Cache the data loading and processing
-def fetch_job_data_for_stats():
-    """Fetches all necessary data from discovered_jobs and approved_jobs."""
-    conn = get_db_connection()
-    if conn is None:
-        return pd.DataFrame(), pd.DataFrame()
+        return None, {}
 
     try:
-        discovered_df = pd.read_sql_query("SELECT * FROM discovered_jobs", conn)
-        approved_df = pd.read_sql_query("""
-            SELECT aj.*, dj.keyword, dj.location, dj.title as discovered_title
-            FROM approved_jobs aj
-            JOIN discovered_jobs dj ON aj.discovered_job_id = dj.id
-        """, conn)
-        conn.close()
-        return discovered_df, approved_df
-    except pd.errors.DatabaseError as e: # More specific exception for pandas SQL errors
-        st.error(f"Error fetching data for statistics: {e}")
-        if conn: conn.close() # Ensure connection is closed on error
-        return pd.DataFrame(), pd.DataFrame()
-    except Exception as e: # Catch any other unexpected errors
+        funnel = fetch_job_funnel()
+        breakdowns = {
+            dimension: pd.DataFrame([dict(row) for row in fetch_job_stats(dimension)],
+                                    columns=["value", "discovered", "analyzed", "approved", "applied"])
+            for dimension in ("keyword", "location", "day")
+        }
+        for df in breakdowns.values():
+            df["value"] = df["value"].replace("", "(none)")
+        return funnel, breakdowns
+    except Exception as e: # Catch any unexpected errors
         st.error(f"An unexpected error occurred while fetching statistics data: {e}")
-        if conn: conn.close()
-        return pd.DataFrame(), pd.DataFrame()
+        return None, {}
+
+def approved_bar_chart(df: pd.DataFrame, field: str, title: str):
+    approved_df = df[df["approved"] > 0].rename(columns={"value": field})
+    return alt.Chart(approved_df).mark_bar().encode(
+        x=alt.X('approved:Q', title='Number of Approved Jobs'),
+        y=alt.Y(f'{field}:N', title=title, sort='-x') # Sorts by count descending on y-axis
+    )
 
 # --- Main Page ---
 st.title("📊 Job Application Statistics")
 st.markdown("Insights into your job discovery and approval process.")
 
-discovered_jobs_df, approved_jobs_df = fetch_job_data_for_stats()
+funnel, breakdowns = fetch_stats()
 
-if discovered_jobs_df.empty and approved_jobs_df.empty and Path(DB_PATH).exists():
+if funnel is None:
+    pass # Error already shown by fetch_stats
+elif not funnel["discovered"] and not funnel["approved"]:
     st.warning("No data found in the database. Start a scan or approve some jobs to see statistics.")
-elif not Path(DB_PATH).exists():
-    # Error already shown by get_db_connection, but an additional page-level message can be useful
-    pass # Avoid redundant error messages if DB_PATH is invalid
 else:
     # --- Overall Job Funnel Metrics ---
     st.header("🚀 Overall Job Funnel")
-    total_discovered = len(discovered_jobs_df)
-    total_analyzed = len(discovered_jobs_df[discovered_jobs_df['analyzed'] == True]) # SQLite stores booleans as 0 or 1
-    total_approved = len(approved_jobs_df)
-    total_applied = len(approved_jobs_df[approved_jobs_df['date_applied'].notna()])
-
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Discovered Jobs", total_discovered)
-    col2.metric("Jobs Analyzed", total_analyzed)
-    col3.metric("Jobs Approved", total_approved)
-    col4.metric("Jobs Applied", total_applied)
+    col1.metric("Discovered Jobs", funnel["discovered"])
+    col2.metric("Jobs Analyzed", funnel["analyzed"])
+    col3.metric("Jobs Approved", funnel["approved"])
+    col4.metric("Jobs Applied", funnel["applied"])
 
     st.markdown("---")
 
     # --- Approved Jobs by Keyword ---
     st.header("🔑 Approved Jobs by Keyword")
-    if not approved_jobs_df.empty and 'keyword' in approved_jobs_df.columns:
-        keyword_counts_df = approved_jobs_df['keyword'].value_counts().reset_index()
-        keyword_counts_df.columns = ['keyword', 'count']
-        keyword_counts_df = keyword_counts_df.sort_values(by='count', ascending=False)
-        
-        if not keyword_counts_df.empty:
-            chart = alt.Chart(keyword_counts_df).mark_bar().encode(
-                x=alt.X('count:Q', title='Number of Approved Jobs'),
-                y=alt.Y('keyword:N', title='Keyword', sort='-x') # Sorts by count descending on y-axis
-            ).properties(
-                # title='Approved Jobs by Keyword' # Title can be handled by st.header
-            )
-            st.altair_chart(chart, use_container_width=True)
-            # st.bar_chart(keyword_counts) # REPLACED with Altair chart
-        else:
-            st.info("No approved jobs with keyword data found.")
-    elif approved_jobs_df.empty:
-        st.info("No approved jobs yet to analyze by keyword.")
+    keyword_df = breakdowns["keyword"]
+    if (keyword_df["approved"] > 0).any():
+        st.altair_chart(approved_bar_chart(keyword_df, "keyword", "Keyword"), use_container_width=True)
     else:
-        st.warning("Keyword data is missing from approved jobs.")
-    
+        st.info("No approved jobs yet to analyze by keyword.")
+
     st.markdown("---")
 
     # --- Approved Jobs by Location ---
     st.header("📍 Approved Jobs by Location")
-    if not approved_jobs_df.empty and 'location' in approved_jobs_df.columns:
-        location_counts_df = approved_jobs_df['location'].value_counts().reset_index()
-        location_counts_df.columns = ['location', 'count']
-        location_counts_df = location_counts_df.sort_values(by='count', ascending=False)
-
-        if not location_counts_df.empty:
-            chart = alt.Chart(location_counts_df).mark_bar().encode(
-                x=alt.X('count:Q', title='Number of Approved Jobs'),
-                y=alt.Y('location:N', title='Location', sort='-x') # Sorts by count descending on y-axis
-            ).properties(
-                # title='Approved Jobs by Location' # Title can be handled by st.header
-            )
-            st.altair_chart(chart, use_container_width=True)
-            # st.bar_chart(location_counts) # REPLACED with Altair chart
-        else:
-            st.info("No approved jobs with location data found.")
-    elif approved_jobs_df.empty:
-        st.info("No approved jobs yet to analyze by location.")
+    location_df = breakdowns["location"]
+    if (location_df["approved"] > 0).any():
+        st.altair_chart(approved_bar_chart(location_df, "location", "Location"), use_container_width=True)
     else:
-        st.warning("Location data is missing from approved jobs.")
+        st.info("No approved jobs yet to analyze by location.")
 
-    # --- Placeholder for more stats ---
-    # st.markdown("---")
-    # st.header("Further Analysis (Coming Soon)")
-    # st.info("More detailed statistics and visualizations will be added here.")
+    st.markdown("---")
+
+    # --- Activity per Day ---
+    st.header("📅 Activity per Day")
+    day_df = breakdowns["day"]
+    if not day_df.empty:
+        activity_df = day_df.rename(columns={"value": "day"}).melt(
+            id_vars="day", value_vars=["discovered", "approved", "applied"], var_name="stage", value_name="jobs"
+        )
+        chart = alt.Chart(activity_df).mark_line(point=True).encode(
+            x=alt.X('day:T', title='Day'),
+            y=alt.Y('jobs:Q', title='Jobs'),
+            color=alt.Color('stage:N', title='Stage', sort=["discovered", "approved", "applied"])
+        )
+        st.altair_chart(chart, use_container_width=True)
+        st.caption("Jobs discovered, approved and applied to on each day.")
+    else:
+        st.info("No activity recorded yet.")
 
-# Fallback message if DB_PATH itself is the issue (handled by get_db_connection implicitly)
-# but an explicit check at the end might be good if all dataframes are empty for other reasons
-if not DB_PATH or not Path(DB_PATH).exists():
-    st.error("Database not found. Please ensure the application is set up correctly and a database exists.") 
\ No newline at end of file
+# Fallback message if DB_PATH itself is the issue (handled by fetch_stats)
+if BACKEND == "sqlite" and (not DB_PATH or not Path(DB_PATH).exists()):
+    st.error("Database not found. Please ensure the application is set up correctly and a database exists.")
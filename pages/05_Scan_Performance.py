@@ -0,0 +1,198 @@
+import streamlit as st
+import pandas as pd
+from pathlib import Path
+from utils import DB_PATH
+from database import fetch_scan_runs, fetch_scan_stage_metrics, fetch_search_yields, BACKEND
+from query_cache import cached # Results shared across sessions until the database changes
+fetch_scan_runs = cached(fetch_scan_runs)
+fetch_scan_stage_metrics = cached(fetch_scan_stage_metrics)
+fetch_search_yields = cached(fetch_search_yields)
+import altair as alt
+
+# --- Page Config ---
+st.set_page_config(
+    page_title="JobFinder - Scan Performance",
+    layout="wide"
+)
+
+STAGE_LABELS = {
+    "search_page": "Search pages",
+    "job_page": "Job pages",
+    "guest_api": "Guest API",
+    "llm": "AI evaluation",
+}
+RATE_LABELS = {
+    "requests_per_s": "Requests / sec",
+    "rate_limited_pct": "429 rate (%)",
+    "cache_hit_pct": "Cache hit rate (%)",
+    "approvals_per_100": "Approvals per 100 links",
+}
+
+# --- Helper Functions ---
+def fetch_metrics(limit: int):
+    """Finished scans with their derived rates, and the per-stage latency summaries of those scans."""
+    if not DB_PATH:
+        st.error("Database path (DB_PATH) is not configured in utils.py.")
+        return None, None
+    if BACKEND == "sqlite" and not Path(DB_PATH).exists():
+        st.error(f"Database file not found at: {DB_PATH}")
+        return None, None
+
+    try:
+        runs = pd.DataFrame([dict(row) for row in fetch_scan_runs(limit)])
+        stages = pd.DataFrame([dict(row) for row in fetch_scan_stage_metrics(limit)])
+    except Exception as e:
+        st.error(f"An unexpected error occurred while fetching scan metrics: {e}")
+        return None, None
+    if runs.empty:
+        return runs, stages
+
+    runs = runs[runs["finished_at"].notna()].copy()
+    runs["started_at"] = pd.to_datetime(runs["started_at"])
+    duration = runs["duration_s"].where(runs["duration_s"] > 0)
+    requests = runs["requests"].where(runs["requests"] > 0)
+    links = runs["links"].where(runs["links"] > 0)
+    runs["requests_per_s"] = runs["requests"] / duration
+    runs["rate_limited_pct"] = 100 * runs["rate_limited"] / requests
+    runs["cache_hit_pct"] = 100 * runs["cache_hits"] / links
+    runs["approvals_per_100"] = 100 * runs["approved"] / links
+    if not stages.empty:
+        stages = stages[stages["scan_id"].isin(runs["id"])].copy()
+        stages["started_at"] = pd.to_datetime(stages["started_at"])
+    return runs, stages
+
+def percentile_chart(stages: pd.DataFrame, stage: str, title: str):
+    df = stages[stages["stage"] == stage].melt(
+        id_vars=["scan_id", "started_at"], value_vars=["p50_ms", "p95_ms", "p99_ms"],
+        var_name="percentile", value_name="ms",
+    )
+    df["percentile"] = df["percentile"].str.replace("_ms", "")
+    return alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X('started_at:T', title='Scan started'),
+        y=alt.Y('ms:Q', title=title),
+        color=alt.Color('percentile:N', title='Percentile', sort=["p50", "p95", "p99"]),
+        tooltip=['scan_id:Q', 'percentile:N', alt.Tooltip('ms:Q', format='.0f')]
+    )
+
+# --- Main Page ---
+st.title("⏱️ Scan Performance")
+st.markdown("Duration, throughput and latency of each scan, to spot regressions and tune concurrency.")
+
+limit = st.slider("Scans to show", min_value=10, max_value=500, value=100, step=10)
+runs, stages = fetch_metrics(limit)
+
+if runs is None:
+    pass # Error already shown by fetch_metrics
+elif runs.empty:
+    st.warning("No finished scans recorded yet. Metrics are stored at the end of every scan.")
+else:
+    # --- Latest Scan ---
+    latest = runs.iloc[-1]
+    st.header("🕒 Latest Scan")
+    st.caption(f"Scan {latest['id']} started {latest['started_at']:%Y-%m-%d %H:%M} UTC, {latest['status']}, {latest['max_workers']} workers.")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Duration", f"{latest['duration_s']:.0f}s")
+    col2.metric("Requests / sec", f"{latest['requests_per_s']:.2f}" if pd.notna(latest['requests_per_s']) else "–")
+    col3.metric("429 Rate", f"{latest['rate_limited_pct']:.1f}%" if pd.notna(latest['rate_limited_pct']) else "–")
+    col4.metric("Cache Hit Rate", f"{latest['cache_hit_pct']:.1f}%" if pd.notna(latest['cache_hit_pct']) else "–")
+    col5.metric("Approvals / 100 Links", f"{latest['approvals_per_100']:.1f}" if pd.notna(latest['approvals_per_100']) else "–")
+
+    st.markdown("---")
+
+    # --- Duration ---
+    st.header("⌛ Duration per Scan")
+    chart = alt.Chart(runs).mark_line(point=True).encode(
+        x=alt.X('started_at:T', title='Scan started'),
+        y=alt.Y('duration_s:Q', title='Duration (s)'),
+        tooltip=['id:Q', 'status:N', 'max_workers:Q', 'searches:Q', 'links:Q', alt.Tooltip('duration_s:Q', format='.0f')]
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+    st.markdown("---")
+
+    # --- Rates ---
+    st.header("📈 Throughput and Yield")
+    rates_df = runs.melt(
+        id_vars=["id", "started_at"], value_vars=list(RATE_LABELS), var_name="metric", value_name="value"
+    ).dropna(subset=["value"])
+    rates_df["metric"] = rates_df["metric"].map(RATE_LABELS)
+    chart = alt.Chart(rates_df).mark_line(point=True).encode(
+        x=alt.X('started_at:T', title='Scan started'),
+        y=alt.Y('value:Q', title=None),
+        tooltip=['id:Q', 'metric:N', alt.Tooltip('value:Q', format='.2f')]
+    ).properties(height=180).facet(
+        facet=alt.Facet('metric:N', title=None, sort=list(RATE_LABELS.values())), columns=2
+    ).resolve_scale(y='independent')
+    st.altair_chart(chart, use_container_width=True)
+    st.caption("Requests include retries. Cache hits are links already stored with their details, which need no fetch and no AI call.")
+
+    st.markdown("---")
+
+    # --- Latency ---
+    st.header("🌐 Fetch and AI Latency")
+    if stages.empty:
+        st.info("No requests recorded yet.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("LinkedIn requests")
+            if (stages["stage"] == "fetch").any():
+                st.altair_chart(percentile_chart(stages, "fetch", "Fetch latency (ms)"), use_container_width=True)
+            else:
+                st.info("No requests recorded yet.")
+        with col2:
+            st.subheader("AI evaluations")
+            if (stages["stage"] == "llm").any():
+                st.altair_chart(percentile_chart(stages, "llm", "AI latency (ms)"), use_container_width=True)
+            else:
+                st.info("No AI evaluations recorded yet.")
+
+        # --- Where the Time Goes ---
+        st.subheader("Where the time goes")
+        time_df = stages[stages["stage"].isin(STAGE_LABELS)].copy()
+        time_df["stage"] = time_df["stage"].map(STAGE_LABELS)
+        time_df["total_s"] = time_df["total_ms"] / 1000
+        chart = alt.Chart(time_df).mark_bar().encode(
+            x=alt.X('scan_id:O', title='Scan'),
+            y=alt.Y('total_s:Q', title='Time spent (s, all workers)'),
+            color=alt.Color('stage:N', title='Stage', sort=list(STAGE_LABELS.values())),
+            tooltip=['scan_id:Q', 'stage:N', 'calls:Q', 'errors:Q', alt.Tooltip('total_s:Q', format='.1f'),
+                     alt.Tooltip('p95_ms:Q', format='.0f')]
+        )
+        st.altair_chart(chart, use_container_width=True)
+        st.caption("Time is summed over the concurrent workers, so it can exceed the scan's duration.")
+
+    st.markdown("---")
+
+    # --- All Scans ---
+    st.header("🗂️ Scans")
+    st.dataframe(
+        runs[["id", "started_at", "status", "max_workers", "duration_s", "searches", "links", "new_jobs",
+              "requests", "rate_limited", "cache_hits", "llm_calls", "duplicates", "approved", "errors"]]
+            .sort_values("id", ascending=False),
+        hide_index=True, use_container_width=True,
+    )
+
+    st.markdown("---")
+
+    # --- Search Yield ---
+    st.header("🎯 Search Yield")
+    try:
+        yields = pd.DataFrame([dict(row) for row in fetch_search_yields()])
+    except Exception as e:
+        yields = None
+        st.error(f"An unexpected error occurred while fetching search yields: {e}")
+    if yields is not None and not yields.empty:
+        st.dataframe(
+            yields[["keyword", "location", "workplace", "expected_value", "runs", "skipped", "links", "new_jobs",
+                    "approved", "requests", "last_run_at"]],
+            hide_index=True, use_container_width=True,
+        )
+        st.caption("Scans run the searches with the highest expected value (new jobs plus weighted approvals per request) first. "
+                   "Low-yield searches sit out scans until their priority recovers; see search_scheduler.py.")
+    elif yields is not None:
+        st.info("No search yields recorded yet.")
+
+# Fallback message if DB_PATH itself is the issue (handled by fetch_metrics)
+if BACKEND == "sqlite" and (not DB_PATH or not Path(DB_PATH).exists()):
+    st.error("Database not found. Please ensure the application is set up correctly and a database exists.")
@@ -0,0 +1,2011 @@
+# pg_database.py
+# PostgreSQL implementation of the storage interface (storage.OPERATIONS).
+#
+# Selected with backend = "postgres" under [storage] in config.toml; callers
+# keep using database.<operation>.  Connections come from a thread-safe pool,
+# so every scan worker writes on its own connection and commits on its own:
+# there is no single writer to queue behind (start_writer()/stop_writer() are
+# no-ops).  The schema mirrors the SQLite one with these differences:
+#
+#   * descriptions are still zlib-compressed (job_descriptions.body BYTEA);
+#   * full-text search uses a weighted tsvector column on discovered_jobs
+#     (title A, description B) with a GIN index, ranked with ts_rank;
+#   * job_stats rows are split into shards by backend so concurrent writers do
+#     not queue on the same 'total' row; reads add the shards up.
+#
+# Run against a local server (the schema goes into a throw-away namespace):
+#
+#   python pg_database.py --selftest --dsn postgresql://localhost/jobfinder --workers 8
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, Dict, Any, Optional, Tuple, List, Callable
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+
+import storage
+from database import compress_text, decompress_text, DEFAULT_PAGE_SIZE, SCAN_TOTALS, SEARCH_YIELD_COLUMNS, _FTS_TERM_RE, _JOB_ID_RE
+
+TS_CONFIG = "english"          # Stemming, like the porter tokenizer of the SQLite index
+JOB_STATS_SHARDS = 16          # job_stats rows per (dimension, value), one per group of backends
+POOL_WAIT_TIMEOUT_S = 30       # How long get_conn() waits for a free pooled connection
+MIGRATION_LOCK_ID = 0x4A4F4246 # pg_advisory_xact_lock key serializing init_db() across processes
+
+
+# -- connection pool -----------------------------------------------------------
+# Each thread borrows one connection for its outermost get_conn() block and
+# hands it back when the block ends; nested blocks share the transaction.
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_pool_key: Optional[Tuple[str, Optional[str]]] = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+class _Connection:
+    """A pooled psycopg2 connection with sqlite3's conn.execute(...) -> cursor shape."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def execute(self, sql: str, params=None):
+        cur = self.raw.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        cur.execute(sql, params)
+        return cur
+
+    def executemany(self, sql: str, params_seq) -> None:
+        with self.raw.cursor() as cur:
+            psycopg2.extras.execute_batch(cur, sql, list(params_seq), page_size=500)
+
+    def execute_values(self, sql: str, rows, template: Optional[str] = None, fetch: bool = False):
+        """One multi-row INSERT ... VALUES %s; returns the RETURNING rows with *fetch*."""
+        cur = self.raw.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        return psycopg2.extras.execute_values(cur, sql, rows, template=template, page_size=1000, fetch=fetch)
+
+
+def connect(dsn: Optional[str] = None, schema: Optional[str] = None) -> None:
+    """(Re)creates the pool for *dsn* ([storage] dsn by default), optionally confined to *schema*."""
+    global _pool, _pool_slots, _pool_key
+    settings = storage.get_settings()
+    dsn = dsn or settings["dsn"]
+    if not dsn:
+        raise RuntimeError(
+            f"The postgres storage backend needs a dsn under [storage] in config.toml (or {storage.DSN_ENV_VAR})."
+        )
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        kwargs = {"options": f"-c search_path={schema}"} if schema else {}
+        max_connections = max(1, int(settings["pool_max"]))
+        _pool = psycopg2.pool.ThreadedConnectionPool(
+            min(int(settings["pool_min"]), max_connections), max_connections, dsn, **kwargs
+        )
+        _pool_slots = threading.BoundedSemaphore(max_connections)
+        _pool_key = (dsn, schema)
+
+
+def close_pool() -> None:
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool, _pool_key = None, None
+
+
+def _borrow():
+    if _pool is None:
+        connect()
+    # ThreadedConnectionPool raises instead of waiting when it is exhausted
+    if not _pool_slots.acquire(timeout=POOL_WAIT_TIMEOUT_S):
+        raise psycopg2.pool.PoolError(f"No pooled connection free after {POOL_WAIT_TIMEOUT_S}s; raise [storage] pool_max")
+    try:
+        return _pool, _pool.getconn()
+    except Exception:
+        _pool_slots.release()
+        raise
+
+
+def _give_back(pool, raw) -> None:
+    try:
+        pool.putconn(raw, close=bool(raw.closed))
+    finally:
+        _pool_slots.release()
+
+
+@contextmanager
+def get_conn():
+    """Context‑managed connection that commits on success and rolls back on error.
+    Nested blocks in the same thread share the outermost block's connection and transaction.
+    """
+    if getattr(_local, "depth", 0) == 0:
+        _local.pool, raw = _borrow()
+        _local.conn = _Connection(raw)
+        _local.depth = 0
+    conn = _local.conn
+    _local.depth += 1
+    try:
+        yield conn
+        if _local.depth == 1:
+            conn.raw.commit()
+    except Exception:
+        if _local.depth == 1 and not conn.raw.closed:
+            conn.raw.rollback()
+        raise
+    finally:
+        _local.depth -= 1
+        if _local.depth == 0:
+            _local.conn = None
+            _give_back(_local.pool, conn.raw)
+
+
+@contextmanager
+def _autocommit_conn():
+    """A pooled connection outside any transaction (VACUUM cannot run inside one)."""
+    pool, raw = _borrow()
+    try:
+        raw.autocommit = True
+        yield _Connection(raw)
+    finally:
+        if not raw.closed:
+            raw.autocommit = False
+        _give_back(pool, raw)
+
+
+def data_version() -> Tuple[Any, str]:
+    """Changes whenever anything is committed on the server: the current WAL position (query_cache.py)."""
+    with get_conn() as conn:
+        return _pool_key, conn.execute("SELECT pg_current_wal_lsn()::text;").fetchone()[0]
+
+
+def checkpoint() -> None:
+    """Nothing to do: PostgreSQL has no WAL file to fold into a downloadable database file."""
+
+
+def backup_database(dest_path, *args, **kwargs) -> None:
+    raise NotImplementedError(
+        "Exporting a database file needs the sqlite storage backend; "
+        "copy PostgreSQL databases with pg_dump/pg_restore."
+    )
+
+
+def replace_database(source_path, *args, **kwargs) -> None:
+    raise NotImplementedError(
+        "Importing a SQLite database file needs the sqlite storage backend; "
+        "copy PostgreSQL databases with pg_dump/pg_restore."
+    )
+
+
+def start_writer(*args, **kwargs) -> bool:
+    """Writers commit on their own pooled connections; there is no writer thread to start."""
+    return False
+
+
+def stop_writer() -> None:
+    pass
+
+
+# -- schema ------------------------------------------------------------------
+DDL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS discovered_jobs (
+    id              BIGSERIAL PRIMARY KEY,
+    job_id          BIGINT UNIQUE NOT NULL,
+    url             TEXT UNIQUE NOT NULL,
+    title           TEXT,
+    location        TEXT,
+    keyword         TEXT,
+    date_discovered TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    analyzed        BOOLEAN DEFAULT FALSE,
+    duplicate_of    BIGINT NULL, -- discovered_jobs.id of the canonical posting, if a near-duplicate
+    search_vector   TSVECTOR     -- title (weight A) and description (weight B), see _index_search_text
+);
+CREATE INDEX IF NOT EXISTS idx_discovered_date ON discovered_jobs(date_discovered DESC, id);
+CREATE INDEX IF NOT EXISTS idx_discovered_analyzed ON discovered_jobs(analyzed, date_discovered DESC, id);
+CREATE INDEX IF NOT EXISTS idx_discovered_jobs_duplicate_of ON discovered_jobs(duplicate_of);
+CREATE INDEX IF NOT EXISTS idx_discovered_search ON discovered_jobs USING GIN (search_vector);
+
+CREATE TABLE IF NOT EXISTS job_descriptions (
+    discovered_job_id BIGINT PRIMARY KEY REFERENCES discovered_jobs(id) ON DELETE CASCADE,
+    body              BYTEA NOT NULL -- zlib-compressed UTF-8 text (database.compress_text)
+);
+
+CREATE TABLE IF NOT EXISTS approved_jobs (
+    id                BIGSERIAL PRIMARY KEY,
+    discovered_job_id BIGINT UNIQUE NOT NULL REFERENCES discovered_jobs(id) ON DELETE CASCADE,
+    date_approved     TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    reason            TEXT,
+    date_applied      TIMESTAMP NULL,
+    is_archived       BOOLEAN DEFAULT FALSE,
+    relevance_score   DOUBLE PRECISION NULL -- cosine similarity to the resume (relevance.py)
+);
+CREATE INDEX IF NOT EXISTS idx_approved_pending ON approved_jobs(date_approved, id) WHERE date_applied IS NULL;
+CREATE INDEX IF NOT EXISTS idx_approved_applied ON approved_jobs(date_applied, id) WHERE date_applied IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_approved_jobs_relevance ON approved_jobs(relevance_score);
+
+CREATE TABLE IF NOT EXISTS approved_jobs_archive (
+    id                BIGINT PRIMARY KEY, -- approved_jobs.id the row had
+    discovered_job_id BIGINT NOT NULL,
+    date_approved     TIMESTAMP,
+    reason            TEXT,
+    date_applied      TIMESTAMP NULL,
+    relevance_score   DOUBLE PRECISION NULL,
+    date_archived     TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC')
+);
+CREATE INDEX IF NOT EXISTS idx_approved_archive_job ON approved_jobs_archive(discovered_job_id);
+
+CREATE TABLE IF NOT EXISTS scan_control (
+    id             INTEGER PRIMARY KEY CHECK (id = 1), -- Ensures only one row
+    stop_requested BOOLEAN DEFAULT FALSE
+);
+INSERT INTO scan_control (id, stop_requested) VALUES (1, FALSE) ON CONFLICT (id) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS job_fingerprints (
+    discovered_job_id BIGINT PRIMARY KEY REFERENCES discovered_jobs(id) ON DELETE CASCADE,
+    simhash           BIGINT NOT NULL,  -- 64-bit SimHash, stored signed
+    band0             INTEGER NOT NULL, -- LSH bands of the hash; band4-band7 and the
+    band1             INTEGER NOT NULL, -- 8-bit layout come from DDL_FINGERPRINT_BANDS
+    band2             INTEGER NOT NULL,
+    band3             INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band0 ON job_fingerprints(band0);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band1 ON job_fingerprints(band1);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band2 ON job_fingerprints(band2);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band3 ON job_fingerprints(band3);
+
+CREATE TABLE IF NOT EXISTS prompt_metrics (
+    id                        BIGSERIAL PRIMARY KEY,
+    created_at                TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    token_budget              INTEGER,
+    original_tokens           INTEGER,
+    prompt_tokens             INTEGER,
+    description_tokens_before INTEGER,
+    description_tokens_after  INTEGER,
+    sections_total            INTEGER,
+    sections_kept             INTEGER,
+    latency_ms                DOUBLE PRECISION,
+    eligible                  BOOLEAN NULL
+);
+
+CREATE TABLE IF NOT EXISTS evaluations (
+    id                      BIGSERIAL PRIMARY KEY,
+    discovered_job_id       BIGINT NULL REFERENCES discovered_jobs(id) ON DELETE CASCADE,
+    created_at              TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    provider                TEXT,
+    model                   TEXT,
+    eligible                BOOLEAN NULL,
+    reasoning               TEXT,
+    missing_requirements    TEXT,
+    latency_ms              DOUBLE PRECISION,
+    prompt_tokens           INTEGER,
+    completion_tokens       INTEGER,
+    total_tokens            INTEGER,
+    estimated_prompt_tokens INTEGER,
+    error                   TEXT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_created_at ON evaluations(created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_provider_model ON evaluations(provider, model, created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_job ON evaluations(discovered_job_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_latency ON evaluations(latency_ms);
+
+CREATE TABLE IF NOT EXISTS reevaluation_runs (
+    id                BIGSERIAL PRIMARY KEY,
+    started_at        TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    finished_at       TIMESTAMP NULL,
+    criteria_hash     TEXT NOT NULL,
+    status            TEXT NOT NULL DEFAULT 'running',
+    cursor_discovered TIMESTAMP NULL,
+    cursor_id         BIGINT NULL,
+    total             INTEGER DEFAULT 0,
+    processed         INTEGER DEFAULT 0,
+    approved          INTEGER DEFAULT 0,
+    revoked           INTEGER DEFAULT 0,
+    errors            INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS job_vectors (
+    discovered_job_id BIGINT PRIMARY KEY REFERENCES discovered_jobs(id) ON DELETE CASCADE,
+    indices           BYTEA NOT NULL, -- sorted uint32 hashed-term buckets
+    weights           BYTEA NOT NULL  -- float32 sublinear term frequencies, parallel to indices
+);
+CREATE TABLE IF NOT EXISTS relevance_df (
+    bucket INTEGER PRIMARY KEY,
+    df     INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS relevance_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Statistics aggregates, with the same rows and day semantics as the SQLite job_stats.
+# Each backend adds its deltas to its own shard; fetch_job_funnel/fetch_job_stats sum them.
+# Every trigger touches the 'total' row first, so writers sharing a shard queue there
+# instead of deadlocking on the other rows.
+DDL_JOB_STATS = f"""
+CREATE TABLE IF NOT EXISTS job_stats (
+    dimension  TEXT NOT NULL,     -- 'total', 'keyword', 'location' or 'day'
+    value      TEXT NOT NULL,     -- '' for 'total', YYYY-MM-DD for 'day'
+    shard      SMALLINT NOT NULL, -- pg_backend_pid() % {JOB_STATS_SHARDS} of the writer
+    discovered BIGINT NOT NULL DEFAULT 0,
+    analyzed   BIGINT NOT NULL DEFAULT 0,
+    approved   BIGINT NOT NULL DEFAULT 0,
+    applied    BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value, shard)
+);
+
+CREATE OR REPLACE FUNCTION job_stats_add(
+    p_dimension TEXT, p_value TEXT, p_discovered INTEGER, p_analyzed INTEGER, p_approved INTEGER, p_applied INTEGER
+) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_discovered = 0 AND p_analyzed = 0 AND p_approved = 0 AND p_applied = 0 THEN
+        RETURN;
+    END IF;
+    INSERT INTO job_stats (dimension, value, shard, discovered, analyzed, approved, applied)
+    VALUES (p_dimension, COALESCE(p_value, ''), pg_backend_pid() % {JOB_STATS_SHARDS},
+            p_discovered, p_analyzed, p_approved, p_applied)
+    ON CONFLICT (dimension, value, shard) DO UPDATE SET
+        discovered = job_stats.discovered + EXCLUDED.discovered, analyzed = job_stats.analyzed + EXCLUDED.analyzed,
+        approved = job_stats.approved + EXCLUDED.approved, applied = job_stats.applied + EXCLUDED.applied;
+END $$;
+
+-- Deletes run BEFORE: the approvals are still there to count (the foreign key cascade removes them after)
+CREATE OR REPLACE FUNCTION discovered_jobs_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    n_approved INTEGER;
+    n_applied  INTEGER;
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.analyzed IS NOT DISTINCT FROM NEW.analyzed
+       AND OLD.keyword IS NOT DISTINCT FROM NEW.keyword AND OLD.location IS NOT DISTINCT FROM NEW.location
+       AND OLD.date_discovered IS NOT DISTINCT FROM NEW.date_discovered THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT COUNT(*), COUNT(date_applied) INTO n_approved, n_applied FROM approved_jobs WHERE discovered_job_id = OLD.id;
+        PERFORM job_stats_add('total', '', -1, -COALESCE(OLD.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('day', to_char(OLD.date_discovered, 'YYYY-MM-DD'), -1, -COALESCE(OLD.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('keyword', OLD.keyword, -1, -COALESCE(OLD.analyzed, FALSE)::int, -n_approved, -n_applied);
+        PERFORM job_stats_add('location', OLD.location, -1, -COALESCE(OLD.analyzed, FALSE)::int, -n_approved, -n_applied);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*), COUNT(date_applied) INTO n_approved, n_applied FROM approved_jobs WHERE discovered_job_id = NEW.id;
+        PERFORM job_stats_add('total', '', 1, COALESCE(NEW.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('day', to_char(NEW.date_discovered, 'YYYY-MM-DD'), 1, COALESCE(NEW.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('keyword', NEW.keyword, 1, COALESCE(NEW.analyzed, FALSE)::int, n_approved, n_applied);
+        PERFORM job_stats_add('location', NEW.location, 1, COALESCE(NEW.analyzed, FALSE)::int, n_approved, n_applied);
+        RETURN NULL;
+    END IF;
+    RETURN OLD;
+END $$;
+
+-- Shared by approved_jobs and approved_jobs_archive (a job moved to the archive keeps counting)
+CREATE OR REPLACE FUNCTION approved_jobs_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    v_keyword  TEXT;
+    v_location TEXT;
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.date_approved IS NOT DISTINCT FROM NEW.date_approved
+       AND OLD.date_applied IS NOT DISTINCT FROM NEW.date_applied THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM job_stats_add('total', '', 0, 0, -1, -(OLD.date_applied IS NOT NULL)::int);
+        PERFORM job_stats_add('day', to_char(OLD.date_approved, 'YYYY-MM-DD'), 0, 0, -1, 0);
+        IF OLD.date_applied IS NOT NULL THEN
+            PERFORM job_stats_add('day', to_char(OLD.date_applied, 'YYYY-MM-DD'), 0, 0, 0, -1);
+        END IF;
+        -- Not found when the discovered job itself is being deleted; its trigger took the counts off
+        SELECT keyword, location INTO v_keyword, v_location FROM discovered_jobs WHERE id = OLD.discovered_job_id;
+        IF FOUND THEN
+            PERFORM job_stats_add('keyword', v_keyword, 0, 0, -1, -(OLD.date_applied IS NOT NULL)::int);
+            PERFORM job_stats_add('location', v_location, 0, 0, -1, -(OLD.date_applied IS NOT NULL)::int);
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM job_stats_add('total', '', 0, 0, 1, (NEW.date_applied IS NOT NULL)::int);
+        PERFORM job_stats_add('day', to_char(NEW.date_approved, 'YYYY-MM-DD'), 0, 0, 1, 0);
+        IF NEW.date_applied IS NOT NULL THEN
+            PERFORM job_stats_add('day', to_char(NEW.date_applied, 'YYYY-MM-DD'), 0, 0, 0, 1);
+        END IF;
+        SELECT keyword, location INTO v_keyword, v_location FROM discovered_jobs WHERE id = NEW.discovered_job_id;
+        IF FOUND THEN
+            PERFORM job_stats_add('keyword', v_keyword, 0, 0, 1, (NEW.date_applied IS NOT NULL)::int);
+            PERFORM job_stats_add('location', v_location, 0, 0, 1, (NEW.date_applied IS NOT NULL)::int);
+        END IF;
+    END IF;
+    RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS discovered_jobs_stats_write ON discovered_jobs;
+CREATE TRIGGER discovered_jobs_stats_write AFTER INSERT OR UPDATE OF analyzed, keyword, location, date_discovered
+    ON discovered_jobs FOR EACH ROW EXECUTE FUNCTION discovered_jobs_stats();
+DROP TRIGGER IF EXISTS discovered_jobs_stats_delete ON discovered_jobs;
+CREATE TRIGGER discovered_jobs_stats_delete BEFORE DELETE
+    ON discovered_jobs FOR EACH ROW EXECUTE FUNCTION discovered_jobs_stats();
+DROP TRIGGER IF EXISTS approved_jobs_stats ON approved_jobs;
+CREATE TRIGGER approved_jobs_stats AFTER INSERT OR DELETE OR UPDATE OF date_approved, date_applied
+    ON approved_jobs FOR EACH ROW EXECUTE FUNCTION approved_jobs_stats();
+DROP TRIGGER IF EXISTS approved_jobs_archive_stats ON approved_jobs_archive;
+CREATE TRIGGER approved_jobs_archive_stats AFTER INSERT OR DELETE
+    ON approved_jobs_archive FOR EACH ROW EXECUTE FUNCTION approved_jobs_stats();
+"""
+
+# Replaces discovered_jobs_stats() of DDL_JOB_STATS, which only counted the approvals still in
+# approved_jobs: deleting a job or changing its keyword or location also moves its archived ones.
+DDL_JOB_STATS_ARCHIVED = """
+CREATE OR REPLACE FUNCTION discovered_jobs_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    n_approved INTEGER;
+    n_applied  INTEGER;
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.analyzed IS NOT DISTINCT FROM NEW.analyzed
+       AND OLD.keyword IS NOT DISTINCT FROM NEW.keyword AND OLD.location IS NOT DISTINCT FROM NEW.location
+       AND OLD.date_discovered IS NOT DISTINCT FROM NEW.date_discovered THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT COUNT(*), COUNT(date_applied) INTO n_approved, n_applied FROM (
+            SELECT date_applied FROM approved_jobs WHERE discovered_job_id = OLD.id
+            UNION ALL
+            SELECT date_applied FROM approved_jobs_archive WHERE discovered_job_id = OLD.id
+        ) approvals;
+        PERFORM job_stats_add('total', '', -1, -COALESCE(OLD.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('day', to_char(OLD.date_discovered, 'YYYY-MM-DD'), -1, -COALESCE(OLD.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('keyword', OLD.keyword, -1, -COALESCE(OLD.analyzed, FALSE)::int, -n_approved, -n_applied);
+        PERFORM job_stats_add('location', OLD.location, -1, -COALESCE(OLD.analyzed, FALSE)::int, -n_approved, -n_applied);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*), COUNT(date_applied) INTO n_approved, n_applied FROM (
+            SELECT date_applied FROM approved_jobs WHERE discovered_job_id = NEW.id
+            UNION ALL
+            SELECT date_applied FROM approved_jobs_archive WHERE discovered_job_id = NEW.id
+        ) approvals;
+        PERFORM job_stats_add('total', '', 1, COALESCE(NEW.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('day', to_char(NEW.date_discovered, 'YYYY-MM-DD'), 1, COALESCE(NEW.analyzed, FALSE)::int, 0, 0);
+        PERFORM job_stats_add('keyword', NEW.keyword, 1, COALESCE(NEW.analyzed, FALSE)::int, n_approved, n_applied);
+        PERFORM job_stats_add('location', NEW.location, 1, COALESCE(NEW.analyzed, FALSE)::int, n_approved, n_applied);
+        RETURN NULL;
+    END IF;
+    RETURN OLD;
+END $$;
+"""
+
+# Recomputes job_stats from scratch into shard 0, matching the triggers above
+SQL_REBUILD_JOB_STATS = """
+INSERT INTO job_stats (dimension, value, shard, discovered, analyzed, approved, applied)
+WITH approvals AS (
+    SELECT discovered_job_id, date_approved, date_applied FROM approved_jobs
+    UNION ALL
+    SELECT discovered_job_id, date_approved, date_applied FROM approved_jobs_archive
+)
+SELECT dimension, value, 0, SUM(discovered), SUM(analyzed), SUM(approved), SUM(applied) FROM (
+    SELECT 'total' AS dimension, '' AS value, COUNT(*) AS discovered, COUNT(*) FILTER (WHERE analyzed) AS analyzed,
+           0 AS approved, 0 AS applied
+      FROM discovered_jobs
+    UNION ALL
+    SELECT 'day', COALESCE(to_char(date_discovered, 'YYYY-MM-DD'), ''), COUNT(*), COUNT(*) FILTER (WHERE analyzed), 0, 0
+      FROM discovered_jobs GROUP BY 2
+    UNION ALL
+    SELECT 'total', '', 0, 0, COUNT(*), COUNT(date_applied) FROM approvals
+    UNION ALL
+    SELECT 'day', COALESCE(to_char(date_approved, 'YYYY-MM-DD'), ''), 0, 0, COUNT(*), 0 FROM approvals GROUP BY 2
+    UNION ALL
+    SELECT 'day', to_char(date_applied, 'YYYY-MM-DD'), 0, 0, 0, COUNT(*) FROM approvals
+     WHERE date_applied IS NOT NULL GROUP BY 2
+    UNION ALL
+    SELECT 'keyword', COALESCE(d.keyword, ''), COUNT(*), COUNT(*) FILTER (WHERE d.analyzed),
+           COUNT(a.discovered_job_id), COUNT(a.date_applied)
+      FROM discovered_jobs d LEFT JOIN approvals a ON a.discovered_job_id = d.id GROUP BY 2
+    UNION ALL
+    SELECT 'location', COALESCE(d.location, ''), COUNT(*), COUNT(*) FILTER (WHERE d.analyzed),
+           COUNT(a.discovered_job_id), COUNT(a.date_applied)
+      FROM discovered_jobs d LEFT JOIN approvals a ON a.discovered_job_id = d.id GROUP BY 2
+) AS parts
+GROUP BY dimension, value;
+"""
+
+
+DDL_SCAN_METRICS = """
+CREATE TABLE IF NOT EXISTS scan_runs (
+    id           BIGSERIAL PRIMARY KEY,
+    started_at   TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    finished_at  TIMESTAMP NULL,
+    status       TEXT NOT NULL DEFAULT 'running',
+    max_workers  INTEGER,
+    duration_s   DOUBLE PRECISION,
+    searches     INTEGER DEFAULT 0,
+    links        INTEGER DEFAULT 0,
+    cache_hits   INTEGER DEFAULT 0,
+    new_jobs     INTEGER DEFAULT 0,
+    requests     INTEGER DEFAULT 0,
+    rate_limited INTEGER DEFAULT 0,
+    llm_calls    INTEGER DEFAULT 0,
+    duplicates   INTEGER DEFAULT 0,
+    approved     INTEGER DEFAULT 0,
+    errors       INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS scan_stage_metrics (
+    scan_id  BIGINT NOT NULL REFERENCES scan_runs(id) ON DELETE CASCADE,
+    stage    TEXT NOT NULL,
+    calls    INTEGER NOT NULL,
+    errors   INTEGER NOT NULL,
+    total_ms DOUBLE PRECISION NOT NULL,
+    p50_ms   DOUBLE PRECISION,
+    p95_ms   DOUBLE PRECISION,
+    p99_ms   DOUBLE PRECISION,
+    max_ms   DOUBLE PRECISION,
+    PRIMARY KEY (scan_id, stage)
+);
+"""
+
+DDL_SEARCH_YIELD = """
+CREATE TABLE IF NOT EXISTS search_yield (
+    keyword        TEXT NOT NULL,
+    location       TEXT NOT NULL,
+    workplace      TEXT NOT NULL,
+    runs           INTEGER NOT NULL DEFAULT 0,
+    skipped        INTEGER NOT NULL DEFAULT 0,
+    links          INTEGER NOT NULL DEFAULT 0,
+    new_jobs       INTEGER NOT NULL DEFAULT 0,
+    approved       INTEGER NOT NULL DEFAULT 0,
+    requests       INTEGER NOT NULL DEFAULT 0,
+    expected_value DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_run_at    TIMESTAMP NULL,
+    PRIMARY KEY (keyword, location, workplace)
+);
+"""
+
+DDL_SEARCH_RESULTS = """
+CREATE TABLE IF NOT EXISTS search_results (
+    location  TEXT NOT NULL,
+    job_id    BIGINT NOT NULL,
+    last_seen TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (location, job_id)
+);
+CREATE INDEX IF NOT EXISTS idx_search_results_last_seen ON search_results(last_seen);
+"""
+
+DDL_EVALUATION_QUEUE = """
+CREATE TABLE IF NOT EXISTS evaluation_queue (
+    discovered_job_id BIGINT PRIMARY KEY REFERENCES discovered_jobs(id) ON DELETE CASCADE,
+    enqueued_at       TIMESTAMP DEFAULT (now() AT TIME ZONE 'UTC'),
+    posted_at         TIMESTAMP NULL,
+    relevance         DOUBLE PRECISION NULL,
+    base_priority     DOUBLE PRECISION NOT NULL,
+    claimed_at        TIMESTAMP NULL
+);
+"""
+
+DDL_EVALUATION_QUEUE_SEARCH = """
+ALTER TABLE evaluation_queue
+    ADD COLUMN IF NOT EXISTS search_keyword TEXT NULL,
+    ADD COLUMN IF NOT EXISTS search_location TEXT NULL,
+    ADD COLUMN IF NOT EXISTS search_workplace TEXT NULL;
+"""
+
+DDL_FINGERPRINT_BANDS = """
+ALTER TABLE job_fingerprints
+    ADD COLUMN IF NOT EXISTS band4 INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS band5 INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS band6 INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS band7 INTEGER NOT NULL DEFAULT 0;
+UPDATE job_fingerprints SET
+    band0 = simhash & 255,         band1 = (simhash >> 8) & 255,
+    band2 = (simhash >> 16) & 255, band3 = (simhash >> 24) & 255,
+    band4 = (simhash >> 32) & 255, band5 = (simhash >> 40) & 255,
+    band6 = (simhash >> 48) & 255, band7 = (simhash >> 56) & 255;
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band4 ON job_fingerprints(band4);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band5 ON job_fingerprints(band5);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band6 ON job_fingerprints(band6);
+CREATE INDEX IF NOT EXISTS idx_job_fingerprints_band7 ON job_fingerprints(band7);
+"""
+
+# Dashboard "Best match" order: the index holds the sort key expression itself
+DDL_RELEVANCE_PAGE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_approved_pending_relevance
+    ON approved_jobs((COALESCE(relevance_score, -1.0)), id) WHERE date_applied IS NULL;
+"""
+
+
+# -- migrations --------------------------------------------------------------
+# schema_version holds the last applied migration.  The advisory lock lets
+# several scan processes start at once without racing on the DDL.
+def _migrate_base_schema(conn: _Connection) -> None:
+    conn.execute(DDL_SCHEMA)
+    conn.execute(DDL_JOB_STATS)
+    _rebuild_job_stats(conn)
+
+
+def _migrate_scan_metrics(conn: _Connection) -> None:
+    conn.execute(DDL_SCAN_METRICS)
+
+
+def _migrate_search_yield(conn: _Connection) -> None:
+    conn.execute(DDL_SEARCH_YIELD)
+
+
+def _migrate_evaluation_queue(conn: _Connection) -> None:
+    conn.execute(DDL_EVALUATION_QUEUE)
+    conn.execute("""
+        INSERT INTO evaluation_queue (discovered_job_id, enqueued_at, base_priority)
+        SELECT d.id, d.date_discovered, 0 FROM discovered_jobs d
+         WHERE d.analyzed = FALSE
+           AND EXISTS (SELECT 1 FROM job_descriptions jd WHERE jd.discovered_job_id = d.id)
+        ON CONFLICT DO NOTHING;
+    """)
+
+
+def _migrate_search_results(conn: _Connection) -> None:
+    conn.execute(DDL_SEARCH_RESULTS)
+
+
+def _migrate_archived_job_stats(conn: _Connection) -> None:
+    conn.execute(DDL_JOB_STATS_ARCHIVED)
+    _rebuild_job_stats(conn)
+
+
+def _migrate_queue_backfill_dates(conn: _Connection) -> None:
+    conn.execute("""
+        UPDATE evaluation_queue q SET enqueued_at = (now() AT TIME ZONE 'UTC')
+          FROM discovered_jobs d
+         WHERE d.id = q.discovered_job_id AND q.base_priority = 0 AND q.enqueued_at = d.date_discovered;
+    """)
+
+
+def _migrate_queue_search(conn: _Connection) -> None:
+    conn.execute(DDL_EVALUATION_QUEUE_SEARCH)
+
+
+def _migrate_fingerprint_bands(conn: _Connection) -> None:
+    conn.execute(DDL_FINGERPRINT_BANDS)
+
+
+def _migrate_relevance_page_index(conn: _Connection) -> None:
+    conn.execute(DDL_RELEVANCE_PAGE_INDEX)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[_Connection], None]]] = [
+    (1, "Base schema", _migrate_base_schema),
+    (2, "Per-scan and per-stage performance metrics", _migrate_scan_metrics),
+    (3, "Per-search yield for scan scheduling", _migrate_search_yield),
+    (4, "Persistent priority queue of pending evaluations", _migrate_evaluation_queue),
+    (5, "Per-location search results for the search planner", _migrate_search_results),
+    (6, "Statistics triggers that count archived approvals", _migrate_archived_job_stats),
+    (7, "Evaluation queue backlog re-dated to when it was queued", _migrate_queue_backfill_dates),
+    (8, "Search that queued each pending evaluation", _migrate_queue_search),
+    (9, "Eight near-duplicate bands so per-city reposts are matched", _migrate_fingerprint_bands),
+    (10, "Index for the Dashboard's best-match order", _migrate_relevance_page_index),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_migrated_keys = set()
+_migrate_lock = threading.Lock()
+
+
+def init_db() -> None:
+    """Create the schema or bring it up to SCHEMA_VERSION; checked once per process and database."""
+    if _pool is None:
+        connect()
+    key = _pool_key
+    if key in _migrated_keys:
+        return
+    with _migrate_lock:
+        if key in _migrated_keys:
+            return
+        with get_conn() as conn:
+            conn.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_ID,))
+            conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL);")
+            row = conn.execute("SELECT version FROM schema_version;").fetchone()
+            current = row["version"] if row else 0
+            for version, description, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                migrate(conn)
+                if current:
+                    print(f"Applied database migration {version}: {description}.")
+            if current < SCHEMA_VERSION:
+                conn.execute("DELETE FROM schema_version;")
+                conn.execute("INSERT INTO schema_version (version) VALUES (%s);", (SCHEMA_VERSION,))
+        _migrated_keys.add(key)
+
+
+# -- CRUD helpers ------------------------------------------------------------
+def _decoded(rows) -> List[Dict[str, Any]]:
+    """Rows as dicts, the compressed 'body' column replaced by the 'description' text."""
+    result = []
+    for row in rows:
+        item = dict(row)
+        item["description"] = decompress_text(item.pop("body"))
+        result.append(item)
+    return result
+
+
+def _index_search_text(conn: _Connection, discovered_id: int, title: Optional[str], description: Optional[str]) -> None:
+    conn.execute(f"""
+        UPDATE discovered_jobs
+           SET search_vector = setweight(to_tsvector('{TS_CONFIG}', COALESCE(%s, '')), 'A')
+                            || setweight(to_tsvector('{TS_CONFIG}', COALESCE(%s, '')), 'B')
+         WHERE id = %s;
+    """, (title, description, discovered_id))
+
+
+def _store_description(conn: _Connection, discovered_id: int, desc: str) -> None:
+    """Writes a compressed description (an empty one is removed)."""
+    if desc:
+        conn.execute("""
+            INSERT INTO job_descriptions (discovered_job_id, body) VALUES (%s, %s)
+            ON CONFLICT (discovered_job_id) DO UPDATE SET body = EXCLUDED.body;
+        """, (discovered_id, compress_text(desc)))
+    else:
+        conn.execute("DELETE FROM job_descriptions WHERE discovered_job_id = %s;", (discovered_id,))
+
+
+def upsert_discovered(job: Dict[str, Any]) -> None:
+    """Insert a job if it is new; ignore duplicates."""
+    job["job_id"] = int(_JOB_ID_RE.search(job["url"]).group(1))
+    with get_conn() as conn:
+        row = conn.execute("""
+            INSERT INTO discovered_jobs (job_id, url, title, location, keyword, analyzed)
+            VALUES (%(job_id)s, %(url)s, %(title)s, %(location)s, %(keyword)s, %(analyzed)s)
+            ON CONFLICT (job_id) DO NOTHING
+            RETURNING id;
+        """, job).fetchone()
+        if row is None:
+            return
+        if job.get("description"):
+            _store_description(conn, row["id"], job["description"])
+        _index_search_text(conn, row["id"], job.get("title"), job.get("description"))
+
+
+def approve_job(linkedin_job_id: int, reason: str) -> bool:
+    """Approve a discovered job by its LinkedIn job_id. Returns True if a new approval was inserted."""
+    sql = """
+    INSERT INTO approved_jobs (discovered_job_id, reason)
+    SELECT id, %s FROM discovered_jobs WHERE job_id = %s
+    ON CONFLICT (discovered_job_id) DO NOTHING;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (reason, linkedin_job_id)).rowcount == 1
+
+
+# --- List Queries (same pages and cursors as database.py) ---
+
+SQL_PENDING_APPROVED_COLUMNS = """
+    aj.id AS approved_job_pk,
+    dj.url,
+    dj.title,
+    dj.location,
+    dj.keyword,
+    aj.date_approved,
+    aj.reason,
+    aj.date_applied,
+    aj.relevance_score,
+    (SELECT COUNT(*) FROM discovered_jobs dup WHERE dup.duplicate_of = dj.id) AS duplicate_count,
+    (SELECT string_agg(dup.url, ' ') FROM discovered_jobs dup WHERE dup.duplicate_of = dj.id) AS duplicate_urls
+"""
+SQL_PENDING_APPROVED_FROM = """
+FROM
+    approved_jobs aj
+JOIN
+    discovered_jobs dj ON aj.discovered_job_id = dj.id
+{search_join}
+WHERE aj.date_applied IS NULL
+{search_filter}
+"""
+
+APPROVED_SORT_KEYS = {
+    "Newest": "aj.date_approved",
+    "Best match": "COALESCE(aj.relevance_score, -1.0)",
+}
+
+SQL_APPLIED_COLUMNS = """
+    aj.id AS approved_job_pk,
+    dj.url,
+    dj.title,
+    dj.location,
+    dj.keyword,
+    aj.date_approved,
+    aj.reason,
+    aj.date_applied
+"""
+SQL_APPLIED_FROM = """
+FROM
+    approved_jobs aj
+JOIN
+    discovered_jobs dj ON aj.discovered_job_id = dj.id
+{search_join}
+WHERE
+    aj.date_applied IS NOT NULL AND (aj.is_archived = FALSE OR aj.is_archived IS NULL)
+{search_filter}
+"""
+APPLIED_SORT_KEY = "aj.date_applied"
+
+# Title matches weigh more than description matches (weights A and B); float8 so the
+# rank round-trips exactly through a page cursor
+SQL_SEARCH_JOIN = f"CROSS JOIN to_tsquery('{TS_CONFIG}', %s) AS query"
+SQL_SEARCH_FILTER = "AND dj.search_vector @@ query"
+SQL_SEARCH_SORT_KEY = "ts_rank(dj.search_vector, query, 1)::float8"
+
+
+def to_ts_query(text: str) -> Optional[str]:
+    """Turns a search box entry into a tsquery with the same rules as database.to_fts_query:
+    "quoted phrases" and words must all match, word* matches a prefix, OR allows either.
+    """
+    terms: List[str] = []
+    for phrase, word in _FTS_TERM_RE.findall(text or ""):
+        if word == "OR":
+            if terms and terms[-1] != "|":
+                terms.append("|")
+            continue
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if not words:
+                continue
+            term = "(" + " <-> ".join(words) + ")"
+        elif word.endswith("*"):
+            term = f"{word[:-1]}:*"
+        else:
+            term = word
+        if terms and terms[-1] != "|":
+            terms.append("&")
+        terms.append(term)
+    while terms and terms[-1] in ("|", "&"):
+        terms.pop()
+    return " ".join(terms) or None
+
+
+def _from_clause(from_sql: str, search: Optional[str]) -> Tuple[str, list]:
+    query = to_ts_query(search) if search else None
+    if query is None:
+        return from_sql.format(search_join="", search_filter=""), []
+    return from_sql.format(search_join=SQL_SEARCH_JOIN, search_filter=SQL_SEARCH_FILTER), [query]
+
+
+def _page_query(
+    columns: str,
+    from_sql: str,
+    sort_key: str,
+    search: Optional[str],
+    cursor: Optional[Tuple[Any, int]],
+    limit: Optional[int],
+) -> Tuple[str, tuple]:
+    """(SQL, params) for one keyset page ordered by (sort key, id) descending, after *cursor*."""
+    from_clause, params = _from_clause(from_sql, search)
+    limit_clause = "LIMIT %s" if limit else ""
+    if params:
+        sql = f"""
+        WITH ranked AS MATERIALIZED (
+            SELECT {SQL_SEARCH_SORT_KEY} AS sort_key, {columns} {from_clause}
+        )
+        SELECT * FROM ranked
+        {"WHERE (sort_key, approved_job_pk) < (%s, %s)" if cursor else ""}
+        ORDER BY sort_key DESC, approved_job_pk DESC
+        {limit_clause};
+        """
+    else:
+        sql = f"""
+        SELECT {sort_key} AS sort_key, {columns} {from_clause}
+        {f"AND ({sort_key}, aj.id) < (%s, %s)" if cursor else ""}
+        ORDER BY {sort_key} DESC, aj.id DESC
+        {limit_clause};
+        """
+    if cursor:
+        params += list(cursor)
+    if limit:
+        params.append(limit)
+    return sql, tuple(params)
+
+
+def _fetch_page(sql: str, params: tuple, limit: int):
+    with get_conn() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], (last["sort_key"], last["approved_job_pk"])
+
+
+def pending_approved_jobs_query(sort_by: str = "Newest", search: Optional[str] = None,
+                                cursor: Optional[Tuple[Any, int]] = None, limit: Optional[int] = None) -> Tuple[str, tuple]:
+    sort_key = APPROVED_SORT_KEYS.get(sort_by, APPROVED_SORT_KEYS["Newest"])
+    return _page_query(SQL_PENDING_APPROVED_COLUMNS, SQL_PENDING_APPROVED_FROM, sort_key, search, cursor, limit)
+
+
+def fetch_pending_approved_page(sort_by: str = "Newest", search: Optional[str] = None,
+                                cursor: Optional[Tuple[Any, int]] = None, limit: int = DEFAULT_PAGE_SIZE):
+    sql, params = pending_approved_jobs_query(sort_by, search, cursor, limit + 1)
+    return _fetch_page(sql, params, limit)
+
+
+def count_pending_approved(search: Optional[str] = None) -> int:
+    from_clause, params = _from_clause(SQL_PENDING_APPROVED_FROM, search)
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) " + from_clause, params).fetchone()[0]
+
+
+def applied_jobs_query(search: Optional[str] = None, cursor: Optional[Tuple[Any, int]] = None,
+                       limit: Optional[int] = None) -> Tuple[str, tuple]:
+    return _page_query(SQL_APPLIED_COLUMNS, SQL_APPLIED_FROM, APPLIED_SORT_KEY, search, cursor, limit)
+
+
+def fetch_applied_page(search: Optional[str] = None, cursor: Optional[Tuple[Any, int]] = None,
+                       limit: int = DEFAULT_PAGE_SIZE):
+    sql, params = applied_jobs_query(search, cursor, limit + 1)
+    return _fetch_page(sql, params, limit)
+
+
+def count_applied(search: Optional[str] = None) -> int:
+    from_clause, params = _from_clause(SQL_APPLIED_FROM, search)
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) " + from_clause, params).fetchone()[0]
+
+
+SQL_UNAPPROVED_JOBS = """
+SELECT d.id, d.job_id, d.url, d.title, jd.body,
+       d.location, d.keyword, d.date_discovered, d.analyzed, d.duplicate_of
+FROM discovered_jobs AS d
+LEFT JOIN approved_jobs AS a
+  ON d.id = a.discovered_job_id
+LEFT JOIN job_descriptions AS jd
+  ON jd.discovered_job_id = d.id
+WHERE a.id IS NULL
+ORDER BY d.date_discovered DESC;
+"""
+
+
+def fetch_unapproved() -> List[Dict[str, Any]]:
+    """Jobs that have not yet been approved."""
+    with get_conn() as conn:
+        return _decoded(conn.execute(SQL_UNAPPROVED_JOBS).fetchall())
+
+
+def count_discovered_jobs() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM discovered_jobs;").fetchone()[0]
+
+
+def insert_stub(job_id: int, url: str, location: str, keyword: str) -> bool:
+    """Create a row with just the identifiers. Returns True if it is new."""
+    return insert_stubs([(job_id, url, location, keyword)])[0]
+
+
+def insert_stubs(stubs: List[Tuple[int, str, str, str]]) -> List[bool]:
+    """insert_stub for a whole search page in one statement. Returns, per stub, True if it is new."""
+    if not stubs:
+        return []
+    # Inserted in job_id order: workers whose pages overlap take the unique-index locks in the
+    # same order, so they wait for each other instead of deadlocking
+    rows = sorted({stub[0]: stub for stub in reversed(stubs)}.values())
+    with get_conn() as conn:
+        inserted = conn.execute_values(
+            "INSERT INTO discovered_jobs (job_id, url, location, keyword, analyzed) VALUES %s "
+            "ON CONFLICT (job_id) DO NOTHING RETURNING id, job_id;",
+            [(*row, False) for row in rows], fetch=True,
+        )
+    new = {row["job_id"] for row in inserted}
+    result = []
+    for job_id, *_ in stubs:
+        result.append(job_id in new)
+        new.discard(job_id) # A job listed twice is new only the first time
+    return result
+
+
+def row_missing_details(job_id: int) -> bool:
+    sql = """
+    SELECT 1
+      FROM discovered_jobs
+     WHERE job_id = %s
+       AND (title IS NULL OR title = ''
+            OR NOT EXISTS (SELECT 1 FROM job_descriptions jd WHERE jd.discovered_job_id = discovered_jobs.id))
+       AND analyzed = FALSE
+     LIMIT 1;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (job_id,)).fetchone() is not None
+
+
+def update_details(job_id: int, title: Optional[str], desc: Optional[str]) -> None:
+    """Sets the title and/or description; None leaves a field unchanged."""
+    if title is None and desc is None:
+        return
+    with get_conn() as conn:
+        row = conn.execute(
+            "UPDATE discovered_jobs SET title = COALESCE(%s, title) WHERE job_id = %s RETURNING id, title;",
+            (title, job_id),
+        ).fetchone()
+        if row is None:
+            return
+        if desc is not None:
+            _store_description(conn, row["id"], desc)
+        else:
+            body = conn.execute("SELECT body FROM job_descriptions WHERE discovered_job_id = %s;", (row["id"],)).fetchone()
+            desc = decompress_text(body["body"]) if body else None
+        _index_search_text(conn, row["id"], row["title"], desc)
+
+
+def get_description(linkedin_job_id: int) -> Optional[str]:
+    with get_conn() as conn:
+        row = conn.execute("""
+            SELECT jd.body FROM job_descriptions jd
+              JOIN discovered_jobs d ON d.id = jd.discovered_job_id
+             WHERE d.job_id = %s;
+        """, (linkedin_job_id,)).fetchone()
+    return decompress_text(row["body"]) if row else None
+
+
+def mark_job_as_analyzed(job_id: int) -> None:
+    with get_conn() as conn:
+        row = conn.execute("UPDATE discovered_jobs SET analyzed = TRUE WHERE job_id = %s RETURNING id;", (job_id,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM evaluation_queue WHERE discovered_job_id = %s;", (row["id"],))
+
+
+# --- Near-Duplicate Functions ---
+
+def save_fingerprint(linkedin_job_id: int, simhash: int, bands: Tuple[int, ...]) -> None:
+    sql = """
+    INSERT INTO job_fingerprints (discovered_job_id, simhash, band0, band1, band2, band3, band4, band5, band6, band7)
+    SELECT id, %s, %s, %s, %s, %s, %s, %s, %s, %s FROM discovered_jobs WHERE job_id = %s
+    ON CONFLICT (discovered_job_id) DO UPDATE SET
+        simhash = EXCLUDED.simhash, band0 = EXCLUDED.band0, band1 = EXCLUDED.band1,
+        band2 = EXCLUDED.band2, band3 = EXCLUDED.band3, band4 = EXCLUDED.band4, band5 = EXCLUDED.band5,
+        band6 = EXCLUDED.band6, band7 = EXCLUDED.band7;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (simhash, *bands, linkedin_job_id))
+
+
+def fetch_fingerprint_candidates(linkedin_job_id: int, bands: Tuple[int, ...]):
+    sql = """
+    SELECT d.id, d.job_id, d.url, d.title, f.simhash, a.reason AS approved_reason
+      FROM job_fingerprints AS f
+      JOIN discovered_jobs AS d ON d.id = f.discovered_job_id
+      LEFT JOIN approved_jobs AS a ON a.discovered_job_id = d.id
+     WHERE (f.band0 = %s OR f.band1 = %s OR f.band2 = %s OR f.band3 = %s
+            OR f.band4 = %s OR f.band5 = %s OR f.band6 = %s OR f.band7 = %s)
+       AND d.job_id <> %s
+       AND d.duplicate_of IS NULL
+       AND d.analyzed = TRUE;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (*bands, linkedin_job_id)).fetchall()
+
+
+def fetch_unfingerprinted_jobs() -> List[Dict[str, Any]]:
+    sql = """
+    SELECT d.job_id, d.title, jd.body
+      FROM discovered_jobs AS d
+      JOIN job_descriptions AS jd ON jd.discovered_job_id = d.id
+      LEFT JOIN job_fingerprints AS f ON f.discovered_job_id = d.id
+     WHERE f.discovered_job_id IS NULL;
+    """
+    with get_conn() as conn:
+        return _decoded(conn.execute(sql).fetchall())
+
+
+def link_duplicate(linkedin_job_id: int, canonical_discovered_id: int) -> None:
+    with get_conn() as conn:
+        conn.execute("UPDATE discovered_jobs SET duplicate_of = %s WHERE job_id = %s;", (canonical_discovered_id, linkedin_job_id))
+
+
+# --- Prompt Metrics Functions ---
+
+def insert_prompt_metrics(stats: Dict[str, Any]) -> None:
+    sql = """
+    INSERT INTO prompt_metrics
+        (token_budget, original_tokens, prompt_tokens, description_tokens_before,
+         description_tokens_after, sections_total, sections_kept, latency_ms, eligible)
+    VALUES
+        (%(token_budget)s, %(original_tokens)s, %(prompt_tokens)s, %(description_tokens_before)s,
+         %(description_tokens_after)s, %(sections_total)s, %(sections_kept)s, %(latency_ms)s, %(eligible)s);
+    """
+    with get_conn() as conn:
+        conn.execute(sql, stats)
+
+
+def fetch_prompt_metrics(since: Optional[str] = None):
+    sql = "SELECT * FROM prompt_metrics WHERE (%s::timestamp IS NULL OR created_at >= %s::timestamp) ORDER BY created_at, id;"
+    with get_conn() as conn:
+        return conn.execute(sql, (since, since)).fetchall()
+
+
+# --- Evaluation Record Functions ---
+
+def insert_evaluation(
+    linkedin_job_id: Optional[int],
+    verdict: Optional[Dict[str, Any]],
+    metadata: Dict[str, Any],
+    error: Optional[str] = None,
+) -> None:
+    verdict = verdict or {}
+    missing = verdict.get("missing_requirements")
+    sql = """
+    INSERT INTO evaluations
+        (discovered_job_id, provider, model, eligible, reasoning, missing_requirements,
+         latency_ms, prompt_tokens, completion_tokens, total_tokens, estimated_prompt_tokens, error)
+    VALUES
+        ((SELECT id FROM discovered_jobs WHERE job_id = %s), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+    """
+    params = (
+        linkedin_job_id,
+        metadata.get("provider"),
+        metadata.get("model"),
+        bool(verdict["eligible"]) if "eligible" in verdict else None,
+        verdict.get("reasoning"),
+        json.dumps(missing) if missing is not None else None,
+        metadata.get("latency_ms"),
+        metadata.get("prompt_tokens"),
+        metadata.get("completion_tokens"),
+        metadata.get("total_tokens"),
+        metadata.get("estimated_prompt_tokens"),
+        error,
+    )
+    with get_conn() as conn:
+        conn.execute(sql, params)
+
+
+def fetch_evaluation_summary(since: Optional[str] = None, until: Optional[str] = None):
+    sql = """
+    SELECT to_char(created_at, 'YYYY-MM-DD')   AS day,
+           provider,
+           model,
+           COUNT(*)                           AS evaluations,
+           COUNT(*) FILTER (WHERE eligible)   AS approved,
+           COUNT(error)                       AS errors,
+           AVG(latency_ms)                    AS avg_latency_ms,
+           MAX(latency_ms)                    AS max_latency_ms,
+           SUM(prompt_tokens)                 AS prompt_tokens,
+           SUM(completion_tokens)             AS completion_tokens,
+           SUM(total_tokens)                  AS total_tokens
+      FROM evaluations
+     WHERE created_at >= COALESCE(%s::timestamp, '-infinity')
+       AND created_at <  COALESCE(%s::timestamp, 'infinity')
+     GROUP BY 1, provider, model
+     ORDER BY 1, provider, model;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (since, until)).fetchall()
+
+
+def fetch_evaluation_latencies(provider: str, model: Optional[str] = None, since: Optional[str] = None) -> List[float]:
+    sql = """
+    SELECT latency_ms
+      FROM evaluations
+     WHERE provider = %s
+       AND (%s::text IS NULL OR model = %s)
+       AND created_at >= COALESCE(%s::timestamp, '-infinity')
+       AND error IS NULL
+     ORDER BY created_at;
+    """
+    with get_conn() as conn:
+        return [row["latency_ms"] for row in conn.execute(sql, (provider, model, model, since))]
+
+
+def fetch_slowest_evaluations(limit: int = 20, since: Optional[str] = None):
+    sql = """
+    SELECT e.id, e.created_at, e.provider, e.model, e.latency_ms, e.prompt_tokens,
+           e.estimated_prompt_tokens, e.total_tokens, e.error, d.job_id, d.title
+      FROM evaluations AS e
+      LEFT JOIN discovered_jobs AS d ON d.id = e.discovered_job_id
+     WHERE e.created_at >= COALESCE(%s::timestamp, '-infinity')
+     ORDER BY e.latency_ms DESC NULLS LAST
+     LIMIT %s;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (since, limit)).fetchall()
+
+
+def fetch_job_evaluations(linkedin_job_id: int):
+    sql = """
+    SELECT e.*
+      FROM evaluations AS e
+      JOIN discovered_jobs AS d ON d.id = e.discovered_job_id
+     WHERE d.job_id = %s
+     ORDER BY e.created_at DESC, e.id DESC;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (linkedin_job_id,)).fetchall()
+
+
+# --- Re-evaluation Functions ---
+
+SQL_REEVALUATION_CANDIDATES = """
+    FROM discovered_jobs
+    JOIN job_descriptions jd ON jd.discovered_job_id = discovered_jobs.id
+   WHERE analyzed = TRUE
+     AND duplicate_of IS NULL
+     AND NOT EXISTS (SELECT 1 FROM approved_jobs_archive ar WHERE ar.discovered_job_id = discovered_jobs.id)
+"""
+
+
+def count_reevaluation_candidates() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) " + SQL_REEVALUATION_CANDIDATES + ";").fetchone()[0]
+
+
+def fetch_reevaluation_chunk(cursor_discovered, cursor_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    sql = (
+        "SELECT id, job_id, url, title, jd.body, date_discovered "
+        + SQL_REEVALUATION_CANDIDATES
+        + """
+       AND (%s::timestamp IS NULL OR (date_discovered, id) < (%s::timestamp, %s))
+     ORDER BY date_discovered DESC, id DESC
+     LIMIT %s;
+    """)
+    with get_conn() as conn:
+        return _decoded(conn.execute(sql, (cursor_discovered, cursor_discovered, cursor_id, limit)).fetchall())
+
+
+def create_reevaluation_run(criteria_hash: str, total: int) -> int:
+    with get_conn() as conn:
+        conn.execute(
+            "UPDATE reevaluation_runs SET status = 'superseded', finished_at = (now() AT TIME ZONE 'UTC') "
+            "WHERE status IN ('running', 'cancel_requested', 'cancelled');"
+        )
+        return conn.execute(
+            "INSERT INTO reevaluation_runs (criteria_hash, total) VALUES (%s, %s) RETURNING id;",
+            (criteria_hash, total),
+        ).fetchone()["id"]
+
+
+def fetch_resumable_reevaluation_run(criteria_hash: str):
+    sql = """
+    SELECT * FROM reevaluation_runs
+     WHERE criteria_hash = %s AND status IN ('running', 'cancel_requested', 'cancelled')
+     ORDER BY id DESC LIMIT 1;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (criteria_hash,)).fetchone()
+
+
+def fetch_reevaluation_run(run_id: int):
+    with get_conn() as conn:
+        return conn.execute("SELECT * FROM reevaluation_runs WHERE id = %s;", (run_id,)).fetchone()
+
+
+def fetch_latest_reevaluation_run():
+    with get_conn() as conn:
+        return conn.execute("SELECT * FROM reevaluation_runs ORDER BY id DESC LIMIT 1;").fetchone()
+
+
+def update_reevaluation_progress(
+    run_id: int, cursor_discovered, cursor_id: int,
+    processed: int, approved: int, revoked: int, errors: int,
+) -> None:
+    sql = """
+    UPDATE reevaluation_runs
+       SET cursor_discovered = %s, cursor_id = %s,
+           processed = processed + %s, approved = approved + %s,
+           revoked = revoked + %s, errors = errors + %s
+     WHERE id = %s;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (cursor_discovered, cursor_id, processed, approved, revoked, errors, run_id))
+
+
+def set_reevaluation_status(run_id: int, status: str) -> None:
+    sql = """
+    UPDATE reevaluation_runs
+       SET status = %s,
+           finished_at = CASE WHEN %s IN ('cancelled', 'completed') THEN (now() AT TIME ZONE 'UTC') ELSE finished_at END
+     WHERE id = %s;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (status, status, run_id))
+
+
+def request_reevaluation_cancel() -> bool:
+    with get_conn() as conn:
+        return conn.execute("UPDATE reevaluation_runs SET status = 'cancel_requested' WHERE status = 'running';").rowcount > 0
+
+
+def reevaluation_cancel_requested(run_id: int) -> bool:
+    with get_conn() as conn:
+        row = conn.execute("SELECT status FROM reevaluation_runs WHERE id = %s;", (run_id,)).fetchone()
+        return row is not None and row["status"] == "cancel_requested"
+
+
+def upsert_approval(linkedin_job_id: int, reason: str) -> bool:
+    """Approves a job or refreshes the reason of an existing approval in place.
+    Returns True if the job was not approved before.
+    """
+    sql = """
+    INSERT INTO approved_jobs (discovered_job_id, reason)
+    SELECT id, %s FROM discovered_jobs WHERE job_id = %s
+    ON CONFLICT (discovered_job_id) DO UPDATE SET reason = EXCLUDED.reason
+    RETURNING (xmax = 0) AS inserted;
+    """
+    with get_conn() as conn:
+        row = conn.execute(sql, (reason, linkedin_job_id)).fetchone()
+        return bool(row and row["inserted"])
+
+
+def revoke_approval(linkedin_job_id: int) -> bool:
+    sql = """
+    DELETE FROM approved_jobs
+     WHERE discovered_job_id = (SELECT id FROM discovered_jobs WHERE job_id = %s)
+       AND date_applied IS NULL;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (linkedin_job_id,)).rowcount > 0
+
+
+# --- Relevance Functions ---
+
+def fetch_job_text(linkedin_job_id: int) -> Optional[Dict[str, Any]]:
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT d.id, d.title, jd.body FROM discovered_jobs d "
+            "LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id WHERE d.job_id = %s;",
+            (linkedin_job_id,),
+        ).fetchall()
+    return _decoded(rows)[0] if rows else None
+
+
+def save_job_vector(discovered_job_id: int, indices: bytes, weights: bytes, buckets: List[int]) -> bool:
+    with get_conn() as conn:
+        cur = conn.execute(
+            "INSERT INTO job_vectors (discovered_job_id, indices, weights) VALUES (%s, %s, %s) "
+            "ON CONFLICT (discovered_job_id) DO NOTHING;",
+            (discovered_job_id, psycopg2.Binary(indices), psycopg2.Binary(weights)),
+        )
+        if cur.rowcount != 1:
+            return False
+        # Buckets arrive sorted, so concurrent approvals lock relevance_df rows in the same order
+        conn.execute_values(
+            "INSERT INTO relevance_df (bucket, df) VALUES %s ON CONFLICT (bucket) DO UPDATE SET df = relevance_df.df + 1;",
+            [(bucket,) for bucket in sorted(buckets)], template="(%s, 1)",
+        )
+        return True
+
+
+def fetch_relevance_df() -> Tuple[List[int], List[int]]:
+    with get_conn() as conn:
+        rows = conn.execute("SELECT bucket, df FROM relevance_df;").fetchall()
+    return [row["bucket"] for row in rows], [row["df"] for row in rows]
+
+
+def count_job_vectors() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM job_vectors;").fetchone()[0]
+
+
+def fetch_unvectorized_approved_jobs() -> List[Dict[str, Any]]:
+    sql = """
+    SELECT d.id, d.title, jd.body
+      FROM approved_jobs a
+      JOIN discovered_jobs d ON d.id = a.discovered_job_id
+      LEFT JOIN job_descriptions jd ON jd.discovered_job_id = d.id
+      LEFT JOIN job_vectors v ON v.discovered_job_id = d.id
+     WHERE v.discovered_job_id IS NULL;
+    """
+    with get_conn() as conn:
+        return _decoded(conn.execute(sql).fetchall())
+
+
+def fetch_approved_job_vectors():
+    sql = """
+    SELECT v.discovered_job_id, v.indices, v.weights
+      FROM approved_jobs a
+      JOIN job_vectors v ON v.discovered_job_id = a.discovered_job_id;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def update_relevance_scores(scores: List[Tuple[float, int]]) -> None:
+    with get_conn() as conn:
+        conn.executemany("UPDATE approved_jobs SET relevance_score = %s WHERE discovered_job_id = %s;", scores)
+
+
+def get_relevance_state(key: str) -> Optional[str]:
+    with get_conn() as conn:
+        row = conn.execute("SELECT value FROM relevance_state WHERE key = %s;", (key,)).fetchone()
+        return row["value"] if row else None
+
+
+def set_relevance_state(key: str, value: str) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO relevance_state (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value;",
+            (key, value),
+        )
+
+
+def clear_all_approved_jobs() -> int:
+    with get_conn() as conn:
+        return conn.execute("DELETE FROM approved_jobs;").rowcount
+
+
+def mark_job_as_applied(approved_job_pk: int) -> bool:
+    sql = """
+    UPDATE approved_jobs
+    SET date_applied = (now() AT TIME ZONE 'UTC')
+    WHERE id = %s AND date_applied IS NULL;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (approved_job_pk,)).rowcount > 0
+
+
+def delete_approved_job(approved_job_pk: int) -> bool:
+    with get_conn() as conn:
+        return conn.execute("DELETE FROM approved_jobs WHERE id = %s;", (approved_job_pk,)).rowcount > 0
+
+
+def archive_all_applied_jobs() -> int:
+    sql = """
+    UPDATE approved_jobs
+    SET is_archived = TRUE
+    WHERE date_applied IS NOT NULL AND (is_archived = FALSE OR is_archived IS NULL);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql).rowcount
+
+
+def mark_jobs_as_applied(approved_job_pks: Iterable[int]) -> int:
+    sql = """
+    UPDATE approved_jobs
+    SET date_applied = (now() AT TIME ZONE 'UTC')
+    WHERE id = ANY(%s) AND date_applied IS NULL;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, ([int(pk) for pk in approved_job_pks],)).rowcount
+
+
+def archive_applied_jobs_by_id(approved_job_pks: Iterable[int]) -> int:
+    sql = """
+    UPDATE approved_jobs
+    SET is_archived = TRUE
+    WHERE id = ANY(%s) AND date_applied IS NOT NULL AND (is_archived = FALSE OR is_archived IS NULL);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, ([int(pk) for pk in approved_job_pks],)).rowcount
+
+
+def delete_approved_jobs(approved_job_pks: Iterable[int]) -> int:
+    with get_conn() as conn:
+        return conn.execute("DELETE FROM approved_jobs WHERE id = ANY(%s);", ([int(pk) for pk in approved_job_pks],)).rowcount
+
+
+# --- Statistics Functions ---
+
+def fetch_job_funnel() -> Dict[str, int]:
+    with get_conn() as conn:
+        row = conn.execute("""
+            SELECT COALESCE(SUM(discovered), 0)::bigint AS discovered, COALESCE(SUM(analyzed), 0)::bigint AS analyzed,
+                   COALESCE(SUM(approved), 0)::bigint AS approved, COALESCE(SUM(applied), 0)::bigint AS applied
+              FROM job_stats WHERE dimension = 'total' AND value = '';
+        """).fetchone()
+    return dict(row)
+
+
+def fetch_job_stats(dimension: str):
+    order_by = "value" if dimension == "day" else "approved DESC, discovered DESC, value"
+    sql = f"""
+    SELECT value, SUM(discovered)::bigint AS discovered, SUM(analyzed)::bigint AS analyzed,
+           SUM(approved)::bigint AS approved, SUM(applied)::bigint AS applied
+      FROM job_stats
+     WHERE dimension = %s
+     GROUP BY value
+    HAVING SUM(discovered) <> 0 OR SUM(approved) <> 0 OR SUM(applied) <> 0
+     ORDER BY {order_by};
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (dimension,)).fetchall()
+
+
+def _rebuild_job_stats(conn: _Connection) -> None:
+    # Holds back the triggers of concurrent writers until the new totals are committed
+    conn.execute("LOCK TABLE job_stats IN EXCLUSIVE MODE;")
+    conn.execute("DELETE FROM job_stats;")
+    conn.execute(SQL_REBUILD_JOB_STATS)
+
+
+def rebuild_job_stats() -> None:
+    with get_conn() as conn:
+        _rebuild_job_stats(conn)
+
+
+# --- Retention Functions ---
+
+def purge_rejected_descriptions(older_than_days: int, after_id: int, limit: int) -> Tuple[int, Optional[int]]:
+    sql = """
+    SELECT jd.discovered_job_id AS id,
+           d.analyzed = TRUE
+           AND d.date_discovered < (now() AT TIME ZONE 'UTC') - make_interval(days => %s)
+           AND NOT EXISTS (SELECT 1 FROM approved_jobs a WHERE a.discovered_job_id = d.id)
+           AND NOT EXISTS (SELECT 1 FROM approved_jobs_archive ar WHERE ar.discovered_job_id = d.id) AS rejected
+      FROM job_descriptions jd
+      JOIN discovered_jobs d ON d.id = jd.discovered_job_id
+     WHERE jd.discovered_job_id > %s
+     ORDER BY jd.discovered_job_id
+     LIMIT %s;
+    """
+    with get_conn() as conn:
+        rows = conn.execute(sql, (int(older_than_days), after_id, limit)).fetchall()
+        purge = [row["id"] for row in rows if row["rejected"]]
+        if purge:
+            conn.execute("DELETE FROM job_descriptions WHERE discovered_job_id = ANY(%s);", (purge,))
+            conn.execute(
+                f"UPDATE discovered_jobs SET search_vector = setweight(to_tsvector('{TS_CONFIG}', COALESCE(title, '')), 'A') "
+                "WHERE id = ANY(%s);",
+                (purge,),
+            )
+    return len(purge), (rows[-1]["id"] if len(rows) == limit else None)
+
+
+def archive_applied_jobs(older_than_days: int, limit: int) -> int:
+    sql = """
+    WITH moved AS (
+        DELETE FROM approved_jobs
+         WHERE id IN (
+            SELECT id FROM approved_jobs
+             WHERE is_archived = TRUE AND date_applied < (now() AT TIME ZONE 'UTC') - make_interval(days => %s)
+             ORDER BY id
+             LIMIT %s
+             FOR UPDATE SKIP LOCKED
+         )
+        RETURNING id, discovered_job_id, date_approved, reason, date_applied, relevance_score
+    )
+    INSERT INTO approved_jobs_archive (id, discovered_job_id, date_approved, reason, date_applied, relevance_score)
+    SELECT id, discovered_job_id, date_approved, reason, date_applied, relevance_score FROM moved
+    ON CONFLICT (id) DO UPDATE SET
+        discovered_job_id = EXCLUDED.discovered_job_id, date_approved = EXCLUDED.date_approved,
+        reason = EXCLUDED.reason, date_applied = EXCLUDED.date_applied, relevance_score = EXCLUDED.relevance_score;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (int(older_than_days), limit)).rowcount
+
+
+def prune_evaluations(older_than_days: int, limit: int) -> int:
+    deleted = 0
+    with get_conn() as conn:
+        for table in ("evaluations", "prompt_metrics"):
+            deleted += conn.execute(f"""
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table}
+                     WHERE created_at < (now() AT TIME ZONE 'UTC') - make_interval(days => %s)
+                     ORDER BY created_at LIMIT %s
+                );
+            """, (int(older_than_days), limit)).rowcount
+    return deleted
+
+
+def incremental_vacuum(pages: Optional[int] = None) -> int:
+    """VACUUMs the tables retention deletes from so their space is reused (PostgreSQL's nearest
+    equivalent of SQLite's incremental vacuum; plain VACUUM does not block writers).
+    *pages* is ignored. Returns bytes released to the filesystem.
+    """
+    before = database_size()["bytes"]
+    with _autocommit_conn() as conn:
+        conn.execute(
+            "VACUUM job_descriptions, discovered_jobs, approved_jobs, approved_jobs_archive, evaluations, prompt_metrics;"
+        )
+    return max(before - database_size()["bytes"], 0)
+
+
+def merge_search_index(pages: int) -> None:
+    """Moves the GIN index's pending entries into the main index structure."""
+    with get_conn() as conn:
+        conn.execute("SELECT gin_clean_pending_list('idx_discovered_search'::regclass);")
+
+
+def database_size() -> Dict[str, int]:
+    """Size of the database in bytes (free space inside it is not tracked)."""
+    with get_conn() as conn:
+        return {
+            "bytes": conn.execute("SELECT pg_database_size(current_database());").fetchone()[0],
+            "free_bytes": 0,
+        }
+
+
+# --- Corpus Export Functions ---
+
+EXPORT_CHUNK_SIZE = 1000
+
+SQL_JOB_EXPORT = """
+SELECT dj.id AS discovered_job_id, dj.job_id, dj.url, dj.title, jd.body,
+       dj.location, dj.keyword, dj.date_discovered, dj.analyzed, dj.duplicate_of,
+       aj.id IS NOT NULL AS approved, aj.date_approved, aj.reason AS approval_reason,
+       aj.date_applied, aj.is_archived, aj.relevance_score,
+       (SELECT COUNT(*) FROM evaluations AS e WHERE e.discovered_job_id = dj.id) AS evaluation_count,
+       ev.created_at AS last_evaluated_at, ev.provider AS last_provider, ev.model AS last_model,
+       ev.eligible AS last_eligible, ev.reasoning AS last_reasoning,
+       ev.missing_requirements AS last_missing_requirements, ev.latency_ms AS last_latency_ms,
+       ev.total_tokens AS last_total_tokens, ev.error AS last_error
+  FROM discovered_jobs AS dj
+  LEFT JOIN job_descriptions AS jd ON jd.discovered_job_id = dj.id
+  LEFT JOIN (
+        SELECT id, discovered_job_id, date_approved, reason, date_applied, is_archived, relevance_score
+          FROM approved_jobs
+        UNION ALL -- Applications moved out by retention.py stay in the export
+        SELECT id, discovered_job_id, date_approved, reason, date_applied, TRUE, relevance_score
+          FROM approved_jobs_archive) AS aj ON aj.discovered_job_id = dj.id
+  LEFT JOIN LATERAL (
+        SELECT e.* FROM evaluations AS e
+         WHERE e.discovered_job_id = dj.id
+         ORDER BY e.created_at DESC, e.id DESC
+         LIMIT 1) AS ev ON TRUE
+{where}
+ ORDER BY dj.id;
+"""
+
+SQL_JOB_EXPORT_SINCE = """
+ WHERE dj.id IN (
+       SELECT id FROM discovered_jobs WHERE date_discovered >= %(since)s::timestamp
+       UNION SELECT discovered_job_id FROM approved_jobs
+              WHERE date_approved >= %(since)s::timestamp OR date_applied >= %(since)s::timestamp
+       UNION SELECT discovered_job_id FROM approved_jobs_archive
+              WHERE date_approved >= %(since)s::timestamp OR date_applied >= %(since)s::timestamp
+       UNION SELECT discovered_job_id FROM evaluations WHERE created_at >= %(since)s::timestamp)
+"""
+
+
+def iter_job_export(since: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Streams the export through a server-side (named) cursor, *chunk_size* rows per round trip."""
+    pool, raw = _borrow()
+    try:
+        with raw.cursor(name="job_export", cursor_factory=psycopg2.extras.DictCursor) as cur:
+            cur.itersize = chunk_size
+            cur.execute(SQL_JOB_EXPORT.format(where=SQL_JOB_EXPORT_SINCE if since else ""), {"since": since})
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield _decoded(rows)
+    finally:
+        if not raw.closed:
+            raw.rollback() # Read-only; ends the transaction holding the cursor
+        _give_back(pool, raw)
+
+
+# --- Scan Metrics Functions ---
+
+def create_scan_run(max_workers: int) -> int:
+    with get_conn() as conn:
+        return conn.execute(
+            "INSERT INTO scan_runs (max_workers) VALUES (%s) RETURNING id;", (max_workers,)
+        ).fetchone()["id"]
+
+
+def finish_scan_run(
+    scan_id: int, status: str, duration_s: float, totals: Dict[str, int], stages: List[Dict[str, Any]],
+) -> None:
+    assignments = ", ".join(f"{name} = %({name})s" for name in SCAN_TOTALS)
+    sql = f"""
+    UPDATE scan_runs
+       SET finished_at = (now() AT TIME ZONE 'UTC'), status = %(status)s, duration_s = %(duration_s)s, {assignments}
+     WHERE id = %(id)s;
+    """
+    params = {name: totals.get(name, 0) for name in SCAN_TOTALS}
+    params.update(id=scan_id, status=status, duration_s=duration_s)
+    with get_conn() as conn:
+        conn.execute(sql, params)
+        for stage in stages:
+            conn.execute("""
+                INSERT INTO scan_stage_metrics
+                    (scan_id, stage, calls, errors, total_ms, p50_ms, p95_ms, p99_ms, max_ms)
+                VALUES (%(scan_id)s, %(stage)s, %(calls)s, %(errors)s, %(total_ms)s,
+                        %(p50_ms)s, %(p95_ms)s, %(p99_ms)s, %(max_ms)s)
+                ON CONFLICT (scan_id, stage) DO UPDATE SET
+                    calls = excluded.calls, errors = excluded.errors, total_ms = excluded.total_ms,
+                    p50_ms = excluded.p50_ms, p95_ms = excluded.p95_ms, p99_ms = excluded.p99_ms,
+                    max_ms = excluded.max_ms;
+            """, dict(stage, scan_id=scan_id))
+
+
+def fetch_scan_runs(limit: int = 100):
+    sql = "SELECT * FROM (SELECT * FROM scan_runs ORDER BY id DESC LIMIT %s) AS r ORDER BY id;"
+    with get_conn() as conn:
+        return conn.execute(sql, (limit,)).fetchall()
+
+
+def fetch_scan_stage_metrics(limit: int = 100):
+    sql = """
+    SELECT m.*, r.started_at FROM scan_stage_metrics m
+      JOIN (SELECT id, started_at FROM scan_runs ORDER BY id DESC LIMIT %s) AS r ON r.id = m.scan_id
+     ORDER BY m.scan_id, m.stage;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (limit,)).fetchall()
+
+
+# --- Search Yield Functions ---
+
+def fetch_search_yields():
+    with get_conn() as conn:
+        return conn.execute("SELECT * FROM search_yield ORDER BY expected_value DESC, keyword, location, workplace;").fetchall()
+
+
+def save_search_yields(rows: List[Dict[str, Any]]) -> None:
+    columns = ", ".join(SEARCH_YIELD_COLUMNS)
+    values = ", ".join(f"%({name})s" for name in SEARCH_YIELD_COLUMNS)
+    updates = ", ".join(f"{name} = excluded.{name}" for name in SEARCH_YIELD_COLUMNS[3:])
+    sql = f"""
+    INSERT INTO search_yield ({columns}) VALUES ({values})
+    ON CONFLICT (keyword, location, workplace) DO UPDATE SET {updates};
+    """
+    with get_conn() as conn:
+        for row in rows:
+            conn.execute(sql, row)
+
+
+# --- Search Result Functions ---
+
+def record_search_results(location: str, job_ids: List[int]) -> None:
+    sql = """
+    INSERT INTO search_results (location, job_id) VALUES %s
+    ON CONFLICT (location, job_id) DO UPDATE SET last_seen = (now() AT TIME ZONE 'UTC');
+    """
+    if not job_ids:
+        return
+    with get_conn() as conn:
+        # A page can list a job twice; one VALUES list may not touch the same row twice
+        conn.execute_values(sql, [(location, job_id) for job_id in dict.fromkeys(job_ids)])
+
+
+def fetch_search_results(since_days: float):
+    sql = """
+    SELECT location, job_id FROM search_results
+     WHERE last_seen >= (now() AT TIME ZONE 'UTC') - make_interval(secs => %s * 86400);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (float(since_days),)).fetchall()
+
+
+def prune_search_results(older_than_days: float) -> int:
+    sql = """
+    DELETE FROM search_results
+     WHERE last_seen < (now() AT TIME ZONE 'UTC') - make_interval(secs => %s * 86400);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (float(older_than_days),)).rowcount
+
+
+# --- Evaluation Queue Functions ---
+
+# base_priority plus the waiting-time bonus; bind (max_age_bonus, age_weight)
+_QUEUE_PRIORITY = "{q}.base_priority + LEAST(%s, %s * EXTRACT(EPOCH FROM (now() AT TIME ZONE 'UTC') - {q}.enqueued_at) / 3600)"
+
+
+def enqueue_evaluation(
+    linkedin_job_id: int, base_priority: float, posted_at: Optional[str], relevance: Optional[float],
+    search: Optional[Tuple[str, str, str]] = None,
+) -> None:
+    sql = """
+    INSERT INTO evaluation_queue (discovered_job_id, posted_at, relevance, base_priority,
+                                  search_keyword, search_location, search_workplace)
+    SELECT id, %s, %s, %s, %s, %s, %s FROM discovered_jobs WHERE job_id = %s
+    ON CONFLICT (discovered_job_id) DO UPDATE SET
+        posted_at = excluded.posted_at, relevance = excluded.relevance, base_priority = excluded.base_priority,
+        search_keyword = excluded.search_keyword, search_location = excluded.search_location,
+        search_workplace = excluded.search_workplace;
+    """
+    with get_conn() as conn:
+        conn.execute(sql, (posted_at, relevance, base_priority, *(search or (None, None, None)), linkedin_job_id))
+
+
+def claim_evaluations(limit: int, age_weight: float, max_age_bonus: float) -> List[Dict[str, Any]]:
+    """SKIP LOCKED lets several scan processes claim from the queue at once without taking the same job."""
+    sql = f"""
+    WITH claimed AS (
+        UPDATE evaluation_queue SET claimed_at = (now() AT TIME ZONE 'UTC')
+         WHERE discovered_job_id IN (
+            SELECT q.discovered_job_id FROM evaluation_queue q
+             WHERE q.claimed_at IS NULL
+             ORDER BY {_QUEUE_PRIORITY.format(q="q")} DESC
+             LIMIT %s
+             FOR UPDATE SKIP LOCKED)
+        RETURNING discovered_job_id, base_priority, enqueued_at, search_keyword, search_location, search_workplace
+    )
+    SELECT c.discovered_job_id, d.job_id, d.url, d.title, jd.body,
+           c.search_keyword, c.search_location, c.search_workplace,
+           {_QUEUE_PRIORITY.format(q="c")} AS priority
+      FROM claimed c
+      JOIN discovered_jobs d ON d.id = c.discovered_job_id
+      LEFT JOIN job_descriptions jd ON jd.discovered_job_id = c.discovered_job_id
+     ORDER BY priority DESC;
+    """
+    with get_conn() as conn:
+        return _decoded(conn.execute(sql, (max_age_bonus, age_weight, limit, max_age_bonus, age_weight)).fetchall())
+
+
+def release_evaluation_claims(older_than_minutes: float) -> int:
+    sql = """
+    UPDATE evaluation_queue SET claimed_at = NULL
+     WHERE claimed_at IS NOT NULL
+       AND claimed_at <= (now() AT TIME ZONE 'UTC') - make_interval(secs => %s * 60);
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (float(older_than_minutes),)).rowcount
+
+
+def count_evaluation_queue() -> int:
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM evaluation_queue;").fetchone()[0]
+
+
+def fetch_evaluation_queue(limit: int, age_weight: float, max_age_bonus: float):
+    sql = f"""
+    SELECT d.job_id, d.title, d.keyword, q.enqueued_at, q.posted_at, q.relevance, q.base_priority, q.claimed_at,
+           {_QUEUE_PRIORITY.format(q="q")} AS priority
+      FROM evaluation_queue q
+      JOIN discovered_jobs d ON d.id = q.discovered_job_id
+     ORDER BY priority DESC
+     LIMIT %s;
+    """
+    with get_conn() as conn:
+        return conn.execute(sql, (max_age_bonus, age_weight, limit)).fetchall()
+
+
+# --- Scan Control Functions ---
+
+def set_stop_scan_flag(stop: bool) -> None:
+    with get_conn() as conn:
+        conn.execute("UPDATE scan_control SET stop_requested = %s WHERE id = 1;", (stop,))
+
+
+def should_stop_scan() -> bool:
+    with get_conn() as conn:
+        row = conn.execute("SELECT stop_requested FROM scan_control WHERE id = 1;").fetchone()
+        return bool(row and row["stop_requested"])
+
+
+# --- Query Plan Check ---
+
+# The planner starts a search from the GIN index or from the list's own index, and answers
+# the unapproved query with an anti-join, depending on the data; those only must avoid Seq Scans
+INDEX_SCANS_ONLY = "index scans only"
+EXPECTED_QUERY_INDEXES = {
+    "dashboard page": (pending_approved_jobs_query(cursor=(datetime(2024, 1, 1), 1), limit=26), "idx_approved_pending"),
+    "dashboard best match": (pending_approved_jobs_query("Best match", cursor=(0.5, 1), limit=26),
+                             "idx_approved_pending_relevance"),
+    "applied page": (applied_jobs_query(cursor=(datetime(2024, 1, 1), 1), limit=26), "idx_approved_applied"),
+    "unapproved": ((SQL_UNAPPROVED_JOBS, ()), INDEX_SCANS_ONLY),
+    "dashboard search": (pending_approved_jobs_query(search="splunk", limit=26), INDEX_SCANS_ONLY),
+    "applied search": (applied_jobs_query(search="splunk", limit=26), INDEX_SCANS_ONLY),
+}
+
+
+def explain_query_plan(sql: str, params: tuple = ()) -> List[str]:
+    with get_conn() as conn:
+        # A small or empty database is cheapest to scan whole; ask what the planner does at scale
+        conn.execute("SET LOCAL enable_seqscan = off;")
+        return [row[0] for row in conn.execute("EXPLAIN " + sql, params)]
+
+
+def check_query_plans() -> Dict[str, Tuple[bool, List[str]]]:
+    init_db()
+    results = {}
+    for name, ((sql, params), index) in EXPECTED_QUERY_INDEXES.items():
+        plan = explain_query_plan(sql, params)
+        if index == INDEX_SCANS_ONLY:
+            results[name] = (not any("Seq Scan" in line for line in plan), plan)
+        else:
+            results[name] = (any(index in line for line in plan), plan)
+    return results
+
+
+# --- Self-test ---
+
+def selftest(dsn: str, workers: int, jobs: int) -> bool:
+    """Runs the storage operations in a throw-away schema, with *workers* threads inserting
+    overlapping search pages at once. Prints one line per check; returns True if all passed.
+    """
+    schema = f"jobfinder_selftest_{os.getpid()}"
+    admin = psycopg2.connect(dsn)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema};")
+    results: List[Tuple[str, bool]] = []
+
+    def check(name: str, ok: bool) -> None:
+        results.append((name, ok))
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+
+    try:
+        connect(dsn, schema)
+        init_db()
+
+        def scan_worker(worker: int) -> int:
+            new = 0
+            # Every worker walks all jobs in pages of 25, so the pages overlap and race
+            for start in range(0, jobs, 25):
+                page = [(100000 + i, f"https://www.linkedin.com/jobs/view/{100000 + i}/",
+                         ["Remote", "Berlin", "Austin"][i % 3], ["analyst", "engineer"][i % 2])
+                        for i in range(start, min(start + 25, jobs))]
+                for (job_id, *_), is_new in zip(page, insert_stubs(page)):
+                    if not is_new:
+                        continue
+                    new += 1
+                    tool = "Splunk" if job_id % 4 == 0 else "Sentinel"
+                    update_details(job_id, f"Security Analyst {job_id}", f"Monitor {tool} alerts. Worker {worker}.")
+                    mark_job_as_analyzed(job_id)
+                    if job_id % 3 == 0:
+                        approve_job(job_id, "Selftest approval")
+            return new
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            inserted = sum(pool.map(scan_worker, range(workers)))
+        check(f"{workers} concurrent writers inserted each of {jobs} jobs exactly once", inserted == jobs == count_discovered_jobs())
+
+        approved = count_pending_approved()
+        seen, cursor = [], None
+        while True:
+            rows, cursor = fetch_pending_approved_page(cursor=cursor, limit=7)
+            seen += [row["approved_job_pk"] for row in rows]
+            if cursor is None:
+                break
+        check("dashboard pages cover every approval once", len(seen) == len(set(seen)) == approved > 0)
+
+        matches = count_pending_approved("splunk")
+        seen, cursor = [], None
+        while True:
+            rows, cursor = fetch_pending_approved_page(search="splunk", cursor=cursor, limit=5)
+            seen += [row["approved_job_pk"] for row in rows]
+            if cursor is None:
+                break
+        check("search pages cover every match once", len(seen) == len(set(seen)) == matches > 0)
+
+        for pk in seen[:3]:
+            mark_job_as_applied(pk)
+        check("applied page lists applied jobs", len(fetch_applied_page()[0]) == count_applied() == min(3, len(seen)))
+
+        def check_stats(after: str) -> None:
+            def snapshot():
+                return [fetch_job_funnel()] + [[tuple(row) for row in fetch_job_stats(dimension)]
+                                               for dimension in ("keyword", "location", "day")]
+            stored = snapshot()
+            rebuild_job_stats()
+            check(f"trigger-maintained stats match a rebuild after {after}", stored == snapshot())
+
+        check_stats("concurrent writes")
+
+        still_matching = count_pending_approved("splunk")
+        dropped, _ = purge_rejected_descriptions(0, 0, jobs)
+        check("retention drops only rejected descriptions",
+              dropped == jobs - approved and count_pending_approved("splunk") == still_matching)
+        incremental_vacuum()
+
+        archive_all_applied_jobs()
+        with get_conn() as conn:
+            conn.execute("UPDATE approved_jobs SET date_applied = date_applied - interval '400 days' WHERE is_archived;")
+        archive_applied_jobs(365, jobs)
+        check_stats("archiving applied jobs")
+        with get_conn() as conn:
+            conn.execute("UPDATE discovered_jobs SET keyword = 'renamed', location = 'Denver' WHERE job_id % 2 = 0;")
+        check_stats("keyword and location edits")
+        with get_conn() as conn:
+            conn.execute("DELETE FROM discovered_jobs WHERE job_id % 4 = 0;")
+        check_stats("deleting jobs")
+
+        for name, (ok, _) in check_query_plans().items():
+            check(f"query plan: {name} uses {EXPECTED_QUERY_INDEXES[name][1]}", ok)
+    finally:
+        close_pool()
+        _migrated_keys.clear()
+        admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE;")
+        admin.close()
+    return all(ok for _, ok in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PostgreSQL storage backend tools.")
+    parser.add_argument("--selftest", action="store_true", help="Run the storage operations against a throw-away schema.")
+    parser.add_argument("--dsn", default=None, help=f"Server to test against (default: [storage] dsn or {storage.DSN_ENV_VAR}).")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent writer threads.")
+    parser.add_argument("--jobs", type=int, default=500, help="Synthetic jobs inserted.")
+    args = parser.parse_args()
+    if not args.selftest:
+        parser.print_help()
+        sys.exit(0)
+    dsn = args.dsn or storage.get_settings()["dsn"]
+    if not dsn:
+        parser.error(f"no DSN: pass --dsn or set {storage.DSN_ENV_VAR}")
+    sys.exit(0 if selftest(dsn, args.workers, args.jobs) else 1)
@@ -0,0 +1,235 @@
+# prompt_builder.py
+# Token-budgeted trimming of job descriptions before they are sent to the LLM.
+#
+# Descriptions that already fit the budget are sent unchanged.  Longer ones are
+# split into sections (requirements, responsibilities, company blurb, benefits,
+# EEO/legal text, ...); boilerplate sections are dropped and, if the rest still
+# exceeds the budget, the highest-value sections are kept in their original
+# order.  Trimming is opt-in (prompts.token_budget > 0).
+
+import math
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import database
+from utils import percentile
+
+DEFAULT_TOKEN_BUDGET = 0         # Whole-prompt budget; 0 disables trimming
+MIN_DESCRIPTION_TOKENS = 400     # Never squeeze the description below this
+MAX_HEADING_WORDS = 6            # Longer lines are content, not headings
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+|[^\sA-Za-z0-9]")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+_BULLET_RE = re.compile(r"^(?:[•\-*·▪◦]|\d+[.)])\s*")
+
+# Section headings, checked against the start of short heading-like lines
+_HEADINGS = [
+    ("requirements", re.compile(
+        r"^(?:minimum |basic |required |preferred |desired |additional )?"
+        r"(?:requirements|qualifications|skills|experience|what you(?:'ll| will)? (?:need|bring)|"
+        r"who you are|must[- ]haves?|nice[- ]to[- ]haves?|education)\b", re.I)),
+    ("responsibilities", re.compile(
+        r"^(?:key |primary |main |job |essential )?"
+        r"(?:responsibilities|duties|what you(?:'ll| will)? do|the role|your role|role overview|"
+        r"job summary|position summary|day[- ]to[- ]day|essential functions)\b", re.I)),
+    ("company", re.compile(
+        r"^(?:about (?:us|the company|the team|our)|who we are|our (?:mission|story|culture|values)|"
+        r"why (?:join|work)|company overview|life at)\b", re.I)),
+    ("benefits", re.compile(
+        r"^(?:benefits|perks|what we offer|we offer|compensation|salary|pay range|total rewards|"
+        r"why you'll love)\b", re.I)),
+    ("legal", re.compile(
+        r"^(?:equal (?:employment )?opportunity|eeo|disclaimer|notice|accommodations?|"
+        r"e-verify|privacy)\b", re.I)),
+]
+
+# Sentence-level boilerplate, outside requirements/responsibilities sections
+_BOILERPLATE = [
+    ("legal", re.compile(
+        r"equal opportunity|affirmative action|without regard to|protected veteran|"
+        r"reasonable accommodation|e-verify|drug[- ]free|background check|sexual orientation|"
+        r"gender identity|national origin", re.I)),
+    ("benefits", re.compile(
+        r"401\(?k\)?|dental|vision insurance|paid time off|\bpto\b|parental leave|tuition reimbursement|"
+        r"employee assistance|wellness program|pay range|base salary|salary range", re.I)),
+]
+
+# Sections whose sentences are never reclassified as boilerplate: "must pass a
+# background check" under Requirements is a requirement, not EEO text
+_PROTECTED_SECTIONS = ("requirements", "responsibilities")
+
+SECTION_SCORES = {
+    "requirements": 3.0,
+    "responsibilities": 2.0,
+    "general": 1.0,
+    "company": 0.3,
+    "benefits": 0.0,
+    "legal": 0.0,
+}
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Offline token estimate (roughly BPE-sized: ~4 characters per word piece)."""
+    if not text:
+        return 0
+    return sum(
+        math.ceil(len(piece) / 4) if piece[0].isalnum() else 1
+        for piece in _WORD_RE.findall(text)
+    )
+
+
+def _classify_heading(line: str) -> Optional[str]:
+    """Category of a heading line, or None if *line* is content.
+    Bullets and sentences are content; a heading is a short line that either
+    ends in ":" or consists of little more than the heading phrase itself.
+    """
+    if _BULLET_RE.match(line):
+        return None
+    has_colon = line.endswith(":")
+    text = line.rstrip(":").strip()
+    if not text or len(text.split()) > MAX_HEADING_WORDS or text.endswith("."):
+        return None
+    for category, pattern in _HEADINGS:
+        match = pattern.match(text)
+        if match and (has_colon or len(text[match.end():].split()) <= 2):
+            return category
+    return None
+
+
+def _classify_boilerplate(unit: str) -> Optional[str]:
+    for category, pattern in _BOILERPLATE:
+        if pattern.search(unit):
+            return category
+    return None
+
+
+def split_sections(description: str) -> List[Dict[str, Any]]:
+    """Split a cleaned description into consecutive same-category sections.
+    Returns a list of {"category", "text", "tokens", "score"} dicts in original order.
+    """
+    units: List[Tuple[str, str]] = []
+    current = "general"
+    for line in description.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = _classify_heading(line)
+        if heading:
+            current = heading
+        for unit in _SENTENCE_SPLIT_RE.split(line):
+            category = current
+            if current not in _PROTECTED_SECTIONS:
+                category = _classify_boilerplate(unit) or current
+            units.append((category, unit))
+
+    sections: List[Dict[str, Any]] = []
+    for category, unit in units:
+        if sections and sections[-1]["category"] == category:
+            sections[-1]["parts"].append(unit)
+        else:
+            sections.append({"category": category, "parts": [unit]})
+
+    for section in sections:
+        section["text"] = "\n".join(section.pop("parts"))
+        section["tokens"] = estimate_tokens(section["text"])
+        section["score"] = SECTION_SCORES[section["category"]]
+    return sections
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    words = text.split()
+    kept, used = [], 0
+    for word in words:
+        cost = estimate_tokens(word)
+        if used + cost > max_tokens:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept)
+
+
+def trim_description(description: str, max_tokens: int) -> Tuple[str, Dict[str, Any]]:
+    """Drop boilerplate and, if needed, low-value sections to fit *max_tokens*.
+    Descriptions that already fit are returned unchanged.
+    Returns (trimmed_text, stats).
+    """
+    sections = split_sections(description)
+    original_tokens = estimate_tokens(description)
+    if original_tokens <= max_tokens:
+        return description, {
+            "description_tokens_before": original_tokens,
+            "description_tokens_after": original_tokens,
+            "sections_total": len(sections),
+            "sections_kept": len(sections),
+        }
+    candidates = [(i, s) for i, s in enumerate(sections) if s["score"] > 0]
+
+    kept_indices = set()
+    used = 0
+    for i, section in sorted(candidates, key=lambda item: (-item[1]["score"], item[0])):
+        if used + section["tokens"] <= max_tokens:
+            kept_indices.add(i)
+            used += section["tokens"]
+
+    parts = [sections[i]["text"] for i in sorted(kept_indices)]
+    if not parts and candidates:
+        # Nothing fits whole: keep the start of the best section
+        best = min(candidates, key=lambda item: (-item[1]["score"], item[0]))[1]
+        parts = [_truncate_to_tokens(best["text"], max_tokens)]
+        kept_indices = {sections.index(best)}
+    if not parts:
+        # Everything looked like boilerplate; fall back to the raw text
+        parts = [_truncate_to_tokens(description, max_tokens)]
+
+    trimmed = "\n".join(parts)
+    stats = {
+        "description_tokens_before": original_tokens,
+        "description_tokens_after": estimate_tokens(trimmed),
+        "sections_total": len(sections),
+        "sections_kept": len(kept_indices),
+    }
+    return trimmed, stats
+
+
+def record_prompt_stats(stats: Dict[str, Any]) -> None:
+    """Persist one prompt-size sample; failures never block an evaluation."""
+    try:
+        database.insert_prompt_metrics(stats)
+    except Exception as e:
+        print(f"WARN: Could not record prompt metrics: {e}")
+
+
+def summarize_prompt_metrics(rows) -> Dict[str, Dict[str, float]]:
+    """Percentile summary of recorded prompt sizes and call latencies."""
+    summary = {}
+    for column in ("original_tokens", "prompt_tokens", "latency_ms"):
+        values = [row[column] for row in rows if row[column] is not None]
+        summary[column] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "mean": sum(values) / len(values) if values else 0.0,
+        }
+    approvals = [row["eligible"] for row in rows if row["eligible"] is not None]
+    summary["approval_rate"] = {"count": len(approvals), "rate": sum(approvals) / len(approvals) if approvals else 0.0}
+    return summary
+
+
+if __name__ == "__main__":
+    database.init_db()
+    rows = database.fetch_prompt_metrics()
+    groups = [
+        ("trimmed", [row for row in rows if row["token_budget"]]),
+        ("untrimmed", [row for row in rows if not row["token_budget"]]),
+    ]
+    print("──────────────── Prompt Size Distribution ────────────────")
+    for label, group in groups:
+        if not group:
+            continue
+        summary = summarize_prompt_metrics(group)
+        print(f"[{label}]")
+        for column in ("original_tokens", "prompt_tokens", "latency_ms"):
+            s = summary[column]
+            print(f"  {column:>16}: n={s['count']}  p50={s['p50']:.0f}  p95={s['p95']:.0f}  mean={s['mean']:.0f}")
+        print(f"  {'approval_rate':>16}: n={summary['approval_rate']['count']}  rate={summary['approval_rate']['rate']:.1%}")
+    print("──────────────────────────────────────────────────────────")
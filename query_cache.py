@@ -0,0 +1,42 @@
+# query_cache.py
+# Query results shared by every Streamlit session in the process.
+#
+# Each result is keyed on the query function and its arguments and tagged
+# with database.data_version() as read just before the query ran.  Any commit
+# by any connection or process changes that version, so a cached result is
+# only served while the database is unchanged: reruns and other sessions
+# reuse it without touching the database, and nothing stale is shown.
+# Cached results are shared between sessions and must not be modified.
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+import database
+
+MAX_ENTRIES = 256 # Least recently used results are dropped beyond this
+
+_entries: "OrderedDict[Tuple, Tuple[Any, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached(fn: Callable) -> Callable:
+    """Wraps a read-only query function with the shared cache. Arguments must be hashable."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        version = database.data_version() # Before the query: a commit racing it only costs a refetch
+        with _lock:
+            entry = _entries.get(key)
+            if entry is not None and entry[0] == version:
+                _entries.move_to_end(key)
+                return entry[1]
+        result = fn(*args, **kwargs)
+        with _lock:
+            _entries[key] = (version, result)
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+        return result
+    return wrapper
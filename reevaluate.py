@@ -0,0 +1,123 @@
+# reevaluate.py
+# Bulk re-evaluation of already analyzed jobs after the resume or criteria change.
+#
+# Stored descriptions are streamed from discovered_jobs newest-first in
+# keyset-paginated chunks and sent through the normal evaluation path with
+# bounded concurrency; approved_jobs is updated in place.  No HTTP fetches are
+# made.  Progress is persisted per chunk in reevaluation_runs, so a cancelled
+# or interrupted run resumes where it stopped as long as the criteria are the
+# same.
+
+import hashlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+
+from config import load
+import database
+import relevance
+from evaluate import analyze_job_detailed
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_WORKERS = 5
+
+
+def criteria_hash(current_config: Dict[str, Any]) -> str:
+    """Identifies the resume + evaluation prompt a run applies."""
+    resume = current_config.get("resume", {}).get("text", "")
+    prompt = current_config.get("prompts", {}).get("evaluation_prompt", "")
+    return hashlib.sha256(f"{resume}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+def _reevaluate_one(row, resume: str) -> str:
+    """Re-score one stored job. Returns 'approved', 'revoked', 'rejected' or 'error'."""
+    linkedin_job_id = row["job_id"]
+    try:
+        verdict, metadata = analyze_job_detailed(job_description=row["description"], resume=resume)
+    except Exception as e:
+        database.insert_evaluation(linkedin_job_id, None, {"provider": None}, error=str(e))
+        sys.stdout.write(f"\nError re-evaluating job_id {linkedin_job_id}: {e}\n")
+        sys.stdout.flush()
+        return "error"
+
+    database.insert_evaluation(linkedin_job_id, verdict, metadata)
+    if verdict.get("eligible"):
+        if database.upsert_approval(linkedin_job_id, verdict.get("reasoning", "No reasoning provided by AI.")):
+            relevance.index_job(linkedin_job_id)
+        return "approved"
+    return "revoked" if database.revoke_approval(linkedin_job_id) else "rejected"
+
+
+def run(
+    stop_signal: Optional[List[bool]] = None,
+    chunk_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Re-evaluate every analyzed job against the current resume and evaluation prompt,
+    resuming an unfinished run for the same criteria if there is one.
+    Stops after the current chunk when *stop_signal[0]* is set or a cancel is requested
+    (database.request_reevaluation_cancel). Returns the run's row as a dict.
+    """
+    current_config = load()
+    settings = current_config.get("reevaluation", {})
+    chunk_size = chunk_size or int(settings.get("chunk_size", DEFAULT_CHUNK_SIZE))
+    max_workers = max_workers or int(settings.get("max_workers", DEFAULT_MAX_WORKERS))
+    resume = current_config.get("resume", {}).get("text", "")
+    digest = criteria_hash(current_config)
+
+    run_row = database.fetch_resumable_reevaluation_run(digest)
+    if run_row is None:
+        run_id = database.create_reevaluation_run(digest, database.count_reevaluation_candidates())
+        cursor_discovered, cursor_id, done = None, None, 0
+    else:
+        run_id = run_row["id"]
+        cursor_discovered, cursor_id, done = run_row["cursor_discovered"], run_row["cursor_id"], run_row["processed"]
+        database.set_reevaluation_status(run_id, "running")
+    total = database.fetch_reevaluation_run(run_id)["total"]
+
+    status = "completed"
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            if (stop_signal and stop_signal[0]) or database.reevaluation_cancel_requested(run_id):
+                status = "cancelled"
+                break
+
+            chunk = database.fetch_reevaluation_chunk(cursor_discovered, cursor_id, chunk_size)
+            if not chunk:
+                break
+
+            outcomes = list(pool.map(lambda row: _reevaluate_one(row, resume), chunk))
+            cursor_discovered, cursor_id = chunk[-1]["date_discovered"], chunk[-1]["id"]
+            database.update_reevaluation_progress(
+                run_id, cursor_discovered, cursor_id,
+                processed=len(chunk),
+                approved=outcomes.count("approved"),
+                revoked=outcomes.count("revoked"),
+                errors=outcomes.count("error"),
+            )
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+
+    database.set_reevaluation_status(run_id, status)
+    return dict(database.fetch_reevaluation_run(run_id))
+
+
+if __name__ == "__main__":
+    database.init_db()
+    stop = [False]
+    try:
+        summary = run(stop, progress=lambda done, total: (sys.stdout.write(f"\r{done}/{total} re-evaluated"), sys.stdout.flush()))
+    except KeyboardInterrupt:
+        # Progress is committed per chunk; the next run resumes from there
+        stop[0] = True
+        print("\nInterrupted. Run again to resume.")
+        sys.exit(1)
+    print()
+    print("──────────────── Re-evaluation Summary ────────────────")
+    print(f"Status: {summary['status']}")
+    print(f"Processed: {summary['processed']}/{summary['total']}")
+    print(f"Approved: {summary['approved']}  Revoked: {summary['revoked']}  Errors: {summary['errors']}")
+    print("───────────────────────────────────────────────────────")
@@ -0,0 +1,184 @@
+# relevance.py
+# Local relevance ranking of approved jobs against the resume (no LLM calls).
+#
+# Resume and job texts become hashed TF-IDF vectors: unigrams and bigrams are
+# hashed into N_FEATURES buckets with sublinear term frequencies.  Each
+# approved job's sparse vector is stored compactly (uint32 bucket ids +
+# float32 weights) in job_vectors, and document frequencies in relevance_df
+# are updated incrementally as jobs are approved.  Cosine scores for every
+# job are computed in one batched NumPy pass and stored in
+# approved_jobs.relevance_score.
+#
+# Single approvals are scored with the IDF of the last full pass (loaded once
+# per process), so stored scores do not mix IDF versions; ensure_scores_current()
+# rescores everything once the corpus has grown by RESCORE_GROWTH since then.
+
+import hashlib
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import load
+import database
+from dedupe import normalize_text
+
+N_FEATURES = 2 ** 18
+RESCORE_GROWTH = 0.1 # Full rescore once the vectorized jobs grew by this share since the last one
+
+# (last full pass, resume hash) -> (idf, query vector) shared by index_job() and text_scorer()
+_model_lock = threading.Lock()
+_model: Optional[Tuple[Tuple[Optional[str], str], np.ndarray, np.ndarray]] = None
+
+
+def _buckets(text: Optional[str]) -> Dict[int, int]:
+    tokens = normalize_text(text)
+    counts: Dict[int, int] = {}
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for gram in grams:
+        bucket = zlib.crc32(gram.encode("utf-8")) % N_FEATURES
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def vectorize(text: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse hashed term-frequency vector: (sorted uint32 bucket ids, float32 1+log(tf))."""
+    counts = _buckets(text)
+    indices = np.fromiter(sorted(counts), dtype=np.uint32, count=len(counts))
+    weights = np.array([1.0 + np.log(counts[i]) for i in indices.tolist()], dtype=np.float32)
+    return indices, weights
+
+
+def _idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    return (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+def _load_idf() -> np.ndarray:
+    df = np.zeros(N_FEATURES, dtype=np.float32)
+    buckets, counts = database.fetch_relevance_df()
+    df[buckets] = counts
+    return _idf(df, database.count_job_vectors())
+
+
+def _resume_text() -> str:
+    return load().get("resume", {}).get("text", "")
+
+
+def resume_hash(resume: str) -> str:
+    return hashlib.sha256(resume.encode("utf-8")).hexdigest()
+
+
+def _query_vector(resume: str, idf: np.ndarray) -> np.ndarray:
+    """Dense, L2-normalized TF-IDF vector of the resume."""
+    indices, weights = vectorize(resume)
+    query = np.zeros(N_FEATURES, dtype=np.float32)
+    query[indices] = weights * idf[indices]
+    norm = np.linalg.norm(query)
+    return query / norm if norm else query
+
+
+def score_vectors(
+    vectors: List[Tuple[np.ndarray, np.ndarray]],
+    query: np.ndarray,
+    idf: np.ndarray,
+) -> np.ndarray:
+    """Cosine similarity of many sparse vectors with a dense query, in one batched pass."""
+    scores = np.zeros(len(vectors), dtype=np.float32)
+    lengths = np.array([len(indices) for indices, _ in vectors], dtype=np.int64)
+    nonempty = np.flatnonzero(lengths)
+    if not len(nonempty):
+        return scores
+
+    all_indices = np.concatenate([vectors[i][0] for i in nonempty])
+    all_weights = np.concatenate([vectors[i][1] for i in nonempty]) * idf[all_indices]
+    offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+
+    dots = np.add.reduceat(all_weights * query[all_indices], offsets)
+    norms = np.sqrt(np.add.reduceat(all_weights * all_weights, offsets))
+    scores[nonempty] = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+    return scores
+
+
+def _scoring_model() -> Tuple[np.ndarray, np.ndarray]:
+    """(idf, query) for scoring single jobs. Loaded once and reloaded only after a full
+    rescore (here or in another process) or a resume change, not on every approval.
+    """
+    global _model
+    key = (database.get_relevance_state("scored_docs"), resume_hash(_resume_text()))
+    with _model_lock:
+        if _model is None or _model[0] != key:
+            idf = _load_idf()
+            _model = (key, idf, _query_vector(_resume_text(), idf))
+        return _model[1], _model[2]
+
+
+def index_job(linkedin_job_id: int) -> Optional[float]:
+    """Vectorize a newly approved job, update document frequencies and store its score.
+    Cheap enough to run on every approval. Returns the score (None if the job is unknown).
+    """
+    row = database.fetch_job_text(linkedin_job_id)
+    if row is None:
+        return None
+    indices, weights = vectorize(f"{row['title'] or ''}\n{row['description'] or ''}")
+    database.save_job_vector(row["id"], indices.tobytes(), weights.tobytes(), indices.tolist())
+
+    idf, query = _scoring_model()
+    score = float(score_vectors([(indices, weights)], query, idf)[0])
+    database.update_relevance_scores([(score, row["id"])])
+    return score
+
+
+def text_scorer():
+    """A function scoring a job's text against the resume without storing anything, for ranking
+    jobs before they are evaluated.  Uses the same IDF and resume as index_job().
+    """
+    idf, query = _scoring_model()
+
+    def score(text: Optional[str]) -> float:
+        return float(score_vectors([vectorize(text)], query, idf)[0])
+    return score
+
+
+def rescore_all() -> int:
+    """Vectorize approved jobs that have no vector yet, then rescore every approved job
+    against the current resume in one batched pass. Returns the number of jobs scored.
+    """
+    for row in database.fetch_unvectorized_approved_jobs():
+        indices, weights = vectorize(f"{row['title'] or ''}\n{row['description'] or ''}")
+        database.save_job_vector(row["id"], indices.tobytes(), weights.tobytes(), indices.tolist())
+
+    rows = database.fetch_approved_job_vectors()
+    if not rows:
+        return 0
+    vectors = [
+        (np.frombuffer(row["indices"], dtype=np.uint32), np.frombuffer(row["weights"], dtype=np.float32))
+        for row in rows
+    ]
+    resume = _resume_text()
+    idf = _load_idf()
+    scores = score_vectors(vectors, _query_vector(resume, idf), idf)
+    database.update_relevance_scores([(float(score), row["discovered_job_id"]) for score, row in zip(scores, rows)])
+    database.set_relevance_state("resume_hash", resume_hash(resume))
+    database.set_relevance_state("scored_docs", str(database.count_job_vectors()))
+    return len(rows)
+
+
+def ensure_scores_current() -> bool:
+    """Rescore everything if the resume changed since the last full pass, or the corpus grew by
+    RESCORE_GROWTH so that its IDF has drifted. Returns True if rescored.
+    """
+    scored_docs = int(database.get_relevance_state("scored_docs") or 0)
+    if (database.get_relevance_state("resume_hash") == resume_hash(_resume_text())
+            and database.count_job_vectors() <= scored_docs * (1 + RESCORE_GROWTH)):
+        return False
+    rescore_all()
+    return True
+
+
+if __name__ == "__main__":
+    import time
+    database.init_db()
+    start = time.perf_counter()
+    count = rescore_all()
+    print(f"Scored {count} approved jobs in {(time.perf_counter() - start) * 1000:.1f} ms.")
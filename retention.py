@@ -0,0 +1,128 @@
+# retention.py
+# Retention policies for the discovered-jobs corpus.
+#
+# Rejected postings keep their full descriptions and archived applications stay
+# in approved_jobs forever unless something removes them.  This applies the
+# optional [retention] policies: descriptions of rejected jobs are dropped after
+# N days (the rows themselves stay, so the scraper still recognises the IDs),
+# archived applications are moved to approved_jobs_archive, and old evaluation
+# records can be pruned.  Work is done in small batches, each its own short
+# transaction followed by an incremental vacuum, so a scan running at the same
+# time is never blocked for long.
+
+import sys
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+from config import load
+import database
+
+DEFAULT_RETENTION_SETTINGS = {
+    "rejected_description_days": 90,  # Drop descriptions of rejected jobs discovered this long ago
+    "archive_after_days": 30,         # Move archived applications applied to this long ago
+    "evaluation_days": 0,             # Prune evaluation records and prompt metrics this old
+    "batch_size": 500,                # Rows per transaction
+    "fts_merge_pages": 200,           # Search-index pages merged after each batch of dropped descriptions
+    "pause_ms": 50,                   # Pause between batches, leaving the write lock to a scan
+}
+
+
+def get_settings() -> Dict[str, Any]:
+    """[retention] config values over the defaults. A policy set to 0 days is off."""
+    settings = dict(DEFAULT_RETENTION_SETTINGS)
+    settings.update(load().get("retention", {}))
+    return settings
+
+
+def _format_bytes(count: int) -> str:
+    size = float(count)
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def run(
+    settings: Optional[Dict[str, Any]] = None,
+    stop_signal: Optional[List[bool]] = None,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> Dict[str, Any]:
+    """Apply every enabled policy in batches. Stops after the current batch when
+    *stop_signal[0]* is set. *progress* is called with (policy, rows so far) after each batch.
+    Returns rows affected per policy, the database size before and after, and bytes reclaimed.
+    """
+    settings = {**get_settings(), **(settings or {})}
+    batch_size = max(1, int(settings["batch_size"]))
+    pause_s = float(settings["pause_ms"]) / 1000
+    size_before = database.database_size()
+    summary = {"descriptions_dropped": 0, "jobs_archived": 0, "evaluations_pruned": 0}
+
+    def stopped() -> bool:
+        return bool(stop_signal and stop_signal[0])
+
+    def after_batch(policy: str, key: str, rows: int) -> None:
+        summary[key] += rows
+        if rows:
+            database.incremental_vacuum()
+        if progress:
+            progress(policy, summary[key])
+        time.sleep(pause_s)
+
+    days = int(settings["rejected_description_days"])
+    if days > 0:
+        cursor: Optional[int] = 0
+        while cursor is not None and not stopped():
+            dropped, cursor = database.purge_rejected_descriptions(days, cursor, batch_size)
+            if dropped:
+                database.merge_search_index(int(settings["fts_merge_pages"]))
+            after_batch("descriptions", "descriptions_dropped", dropped)
+
+    days = int(settings["archive_after_days"])
+    if days > 0:
+        while not stopped():
+            moved = database.archive_applied_jobs(days, batch_size)
+            after_batch("archive", "jobs_archived", moved)
+            if moved < batch_size:
+                break
+
+    days = int(settings["evaluation_days"])
+    if days > 0:
+        while not stopped():
+            pruned = database.prune_evaluations(days, batch_size)
+            after_batch("evaluations", "evaluations_pruned", pruned)
+            if pruned < batch_size:
+                break
+
+    # Pages freed by deletes in other tables (or earlier runs) go back as well
+    database.incremental_vacuum()
+    summary["size_before"] = size_before["bytes"]
+    summary["size_after"] = database.database_size()["bytes"]
+    # Net of what a concurrent scan wrote meanwhile
+    summary["bytes_reclaimed"] = max(summary["size_before"] - summary["size_after"], 0)
+    summary["stopped"] = stopped()
+    return summary
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    return (
+        f"Dropped {summary['descriptions_dropped']} rejected-job descriptions, "
+        f"archived {summary['jobs_archived']} applications, "
+        f"pruned {summary['evaluations_pruned']} evaluation records. "
+        f"Reclaimed {_format_bytes(summary['bytes_reclaimed'])} "
+        f"({_format_bytes(summary['size_before'])} → {_format_bytes(summary['size_after'])})."
+    )
+
+
+if __name__ == "__main__":
+    database.init_db()
+    stop = [False]
+    try:
+        result = run(stop_signal=stop, progress=lambda policy, rows: (sys.stdout.write(f"\r{policy}: {rows} rows"), sys.stdout.flush()))
+    except KeyboardInterrupt:
+        # Every finished batch is committed; the next run picks up the rest
+        stop[0] = True
+        print("\nInterrupted.")
+        sys.exit(1)
+    print()
+    print(format_summary(result))
@@ -0,0 +1,166 @@
+# routing.py
+# Multi-provider routing for job evaluations (general.ai_provider = "multi").
+#
+# Each call goes to a primary provider picked at random, weighted towards the
+# provider with the lower observed median latency and error rate.  If the
+# primary has not answered within its observed p95 latency, a hedged request
+# is sent to the next provider and whichever answers first wins.  A provider
+# error fails over to the next provider immediately.
+
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+import time
+from typing import Callable, Dict, Any, List, Tuple, Optional
+
+DEFAULT_ROUTING_SETTINGS = {
+    "providers": ["gemini", "openai"],  # Providers used by "multi", if their keys are configured
+    "hedge_min_ms": 1000.0,             # Never hedge earlier than this
+    "hedge_default_ms": 15000.0,        # Hedge delay until a provider has min_samples latencies
+    "min_samples": 20,
+    "window": 200,                      # Latencies/outcomes kept per provider
+}
+
+ProviderCall = Callable[[str, float], Dict[str, Any]]
+
+
+class RoutingError(Exception):
+    """Raised when every configured provider failed for a prompt."""
+
+
+class ProviderStats:
+    """Rolling latency and error window for one provider (thread-safe)."""
+
+    def __init__(self, window: int):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)   # True = success
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self._latencies.append(latency_ms)
+            self._outcomes.append(ok)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self._latencies)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1 - sum(self._outcomes) / len(self._outcomes)
+
+
+_stats: Dict[str, ProviderStats] = {}
+_stats_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_stats(provider: str, window: int = DEFAULT_ROUTING_SETTINGS["window"]) -> ProviderStats:
+    with _stats_lock:
+        if provider not in _stats:
+            _stats[provider] = ProviderStats(window)
+        return _stats[provider]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Separate from the scraper's pool: a hedged call must not wait for a free scraper worker
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-route")
+        return _executor
+
+
+def _weight(stats: ProviderStats, settings: Dict[str, Any]) -> float:
+    median = stats.percentile(50) if stats.sample_count() >= settings["min_samples"] else None
+    median = median or settings["hedge_default_ms"] / 2
+    return max(1 - stats.error_rate(), 0.05) / max(median, 1.0)
+
+
+def order_providers(providers: List[str], settings: Dict[str, Any]) -> List[str]:
+    """Primary first (weighted random by observed speed), then the rest fastest-first."""
+    weights = [_weight(get_stats(p, settings["window"]), settings) for p in providers]
+    primary = random.choices(providers, weights=weights, k=1)[0]
+    rest = sorted(
+        (p for p in providers if p != primary),
+        key=lambda p: -_weight(get_stats(p, settings["window"]), settings),
+    )
+    return [primary] + rest
+
+
+def hedge_delay_s(provider: str, settings: Dict[str, Any]) -> float:
+    stats = get_stats(provider, settings["window"])
+    p95 = stats.percentile(95) if stats.sample_count() >= settings["min_samples"] else None
+    delay_ms = p95 if p95 is not None else settings["hedge_default_ms"]
+    return max(delay_ms, settings["hedge_min_ms"]) / 1000
+
+
+def _timed_call(name: str, call: ProviderCall, prompt: str, temperature: float, window: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = call(prompt, temperature)
+    except Exception:
+        get_stats(name, window).record((time.perf_counter() - start) * 1000, ok=False)
+        raise
+    get_stats(name, window).record((time.perf_counter() - start) * 1000, ok=True)
+    return result
+
+
+def route(
+    prompt: str,
+    temperature: float,
+    calls: Dict[str, ProviderCall],
+    settings: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], str]:
+    """Evaluate *prompt* with hedging/failover across *calls* (provider name -> call).
+    Returns (result, name of the provider that answered). Raises RoutingError if all fail.
+    """
+    settings = {**DEFAULT_ROUTING_SETTINGS, **(settings or {})}
+    if not calls:
+        raise RoutingError("No AI providers available for routing.")
+
+    backups = order_providers(list(calls), settings)
+    executor = _get_executor()
+    in_flight: Dict[Future, str] = {}
+    errors: List[str] = []
+
+    def launch() -> None:
+        name = backups.pop(0)
+        future = executor.submit(_timed_call, name, calls[name], prompt, temperature, settings["window"])
+        in_flight[future] = name
+
+    launch()
+    hedge_after = hedge_delay_s(next(iter(in_flight.values())), settings)
+    hedged = False
+
+    while in_flight:
+        timeout = hedge_after if (backups and not hedged) else None
+        done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # Primary is slower than its usual p95: race it against the next provider
+            hedged = True
+            launch()
+            continue
+        for future in done:
+            name = in_flight.pop(future)
+            try:
+                # Any still-running request is abandoned; it finishes in the background and only updates stats
+                return future.result(), name
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                if backups:
+                    launch()
+
+    raise RoutingError("All AI providers failed: " + "; ".join(errors))
@@ -0,0 +1,97 @@
+# scan_metrics.py
+# Performance metrics of scan runs, shown on the Scan Performance page.
+#
+# scrape.scrape_phase() opens a run with start() and closes it with finish().
+# In between the scraper reports every HTTP request and AI call with
+# record(stage, latency_ms) and counts events with count().  Latencies are
+# kept in memory and summarized per stage (calls, errors, total time,
+# p50/p95/p99, max) when the run finishes; the summaries and the run's totals
+# are then stored together (database.finish_scan_run).  Outside a scan
+# (benchmark.py, reevaluate.py) record() and count() do nothing.
+
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import database
+from utils import percentile
+
+FETCH_STAGES = ("search_page", "job_page", "guest_api") # HTTP requests to LinkedIn
+STAGES = FETCH_STAGES + ("llm",)
+FETCH = "fetch" # Summary of all FETCH_STAGES together
+
+_lock = threading.Lock()
+_run: Optional[Dict[str, Any]] = None
+
+
+def start(max_workers: int) -> int:
+    """Opens a scan run; returns its id."""
+    global _run
+    scan_id = database.create_scan_run(max_workers)
+    with _lock:
+        _run = {
+            "id": scan_id,
+            "started": time.perf_counter(),
+            "latencies": {stage: [] for stage in STAGES},
+            "failures": dict.fromkeys(STAGES, 0),
+            "totals": dict.fromkeys(database.SCAN_TOTALS, 0),
+        }
+    return scan_id
+
+
+def record(stage: str, latency_ms: float, ok: bool = True) -> None:
+    """Adds one request or AI call of *stage* to the current run."""
+    with _lock:
+        if _run is None:
+            return
+        _run["latencies"][stage].append(latency_ms)
+        if not ok:
+            _run["failures"][stage] += 1
+
+
+def count(name: str, n: int = 1) -> None:
+    """Adds *n* to one of the run's database.SCAN_TOTALS counters."""
+    with _lock:
+        if _run is not None:
+            _run["totals"][name] += n
+
+
+def snapshot() -> Dict[str, int]:
+    """The current run's counters so far, requests included; empty outside a scan."""
+    with _lock:
+        if _run is None:
+            return {}
+        return dict(_run["totals"], requests=sum(len(_run["latencies"][stage]) for stage in FETCH_STAGES))
+
+
+def _summary(stage: str, latencies: List[float], errors: int) -> Dict[str, Any]:
+    return {
+        "stage": stage,
+        "calls": len(latencies),
+        "errors": errors,
+        "total_ms": sum(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+def finish(status: str, new_jobs: int) -> Optional[Dict[str, Any]]:
+    """Closes the current run with *status* ('completed', 'stopped' or 'interrupted') and stores it.
+    Returns the stored totals, or None if no run was open.
+    """
+    global _run
+    with _lock:
+        run, _run = _run, None
+    if run is None:
+        return None
+    latencies, failures, totals = run["latencies"], run["failures"], run["totals"]
+    stages = [_summary(stage, latencies[stage], failures[stage]) for stage in STAGES if latencies[stage]]
+    fetched = [ms for stage in FETCH_STAGES for ms in latencies[stage]]
+    if fetched:
+        stages.append(_summary(FETCH, fetched, sum(failures[stage] for stage in FETCH_STAGES)))
+    totals.update(new_jobs=new_jobs, requests=len(fetched), llm_calls=len(latencies["llm"]))
+    duration_s = time.perf_counter() - run["started"]
+    database.finish_scan_run(run["id"], status, duration_s, totals, stages)
+    return dict(totals, id=run["id"], status=status, duration_s=duration_s)
@@ -3,15 +3,24 @@
 import requests
 from bs4 import BeautifulSoup
 import evaluate
-from evaluate import analyze_job
+from evaluate import analyze_job_detailed
 import json, html, re, urllib
 from urllib.parse import urlparse, parse_qs
 from config import load
 import database
+from database import _JOB_ID_RE
+import dedupe
+import evaluation_queue
+import relevance
+import scan_metrics
+import search_planner
+import search_scheduler
 import random
-from typing import Sequence, List, TypeVar, Optional
+from typing import Sequence, List, Dict, TypeVar, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+import threading
+from datetime import datetime, timezone
 from http import HTTPStatus
 import sys
 
@@ -34,8 +43,10 @@ HEADERS = {
     )
 }
 
+# Set by scrape_phase() for the duration of a scan: evaluation_queue settings and a relevance scorer.
+# Jobs fetched during a scan are queued for evaluation; outside a scan they are evaluated inline.
+_scan_queue: Optional[dict] = None
 
-_JOB_ID_RE = re.compile(r"/jobs/view/(?:[^/?]*-)?(\d+)(?:[/?]|$)")
 
 def shuffled(seq: Sequence[T]) -> List[T]:
     """Return a new list containing all items from *seq* in random order."""
@@ -45,9 +56,11 @@ def shuffled(seq: Sequence[T]) -> List[T]:
 
 def process_search_page(search) -> int:
     handled = 0
+    stubs = []
     jobs_for_update = []
 
     soup = get_soup(search["url"])
+    scan_metrics.count("searches")
     if soup is None:
         return 0
 
@@ -62,9 +75,18 @@ def process_search_page(search) -> int:
         if job_id is None:
             continue
 
-        is_new = database.insert_stub(job_id, url, search["location"], search["keyword"])
+        stubs.append((job_id, url, search["location"], search["keyword"]))
+
+    # One queued write for the whole page instead of one commit per link
+    inserted = database.insert_stubs(stubs)
+    database.record_search_results(search["location"], [job_id for job_id, _, _, _ in stubs])
+    for (job_id, url, _, _), is_new in zip(stubs, inserted):
         if is_new or database.row_missing_details(job_id):
-            jobs_for_update.append({"job_id": job_id, "url": url})
+            jobs_for_update.append({"job_id": job_id, "url": url, "keyword": search["keyword"],
+                                    "search": search_scheduler.search_key(search)})
+    scan_metrics.count("links", handled)
+    scan_metrics.count("new_jobs", sum(inserted))
+    scan_metrics.count("cache_hits", len(stubs) - len(jobs_for_update))
 
     if jobs_for_update:
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
@@ -72,31 +94,36 @@ def process_search_page(search) -> int:
 
     return handled
 
-def get_searches():
-    searches = []
-
-    for location in shuffled(locations):
-        for keyword in shuffled(keywords):
-            
-            if location.lower() == "remote":
-                # Search for remote positions
-                url = f"https://www.linkedin.com/jobs/search/?keywords={keyword.replace(' ', '%20')}&f_WT=2"
-                searches.append({"url": url, "location": location, "keyword": keyword})
-            else:
-                url = f"https://www.linkedin.com/jobs/search/?keywords={keyword.replace(' ', '%20')}&location={location.replace(' ', '%20')}&distance=75&f_WT=1"
-                searches.append({"url": url, "location": location, "keyword": keyword})
-                url = f"https://www.linkedin.com/jobs/search/?keywords={keyword.replace(' ', '%20')}&location={location.replace(' ', '%20')}&distance=75&f_WT=3"
-                searches.append({"url": url, "location": location, "keyword": keyword})
-
-    return searches
+def get_searches(locations=None, keywords=None):
+    """The scan's searches in random order, planned by search_planner.py from *locations* and
+    *keywords* (default: the config loaded at import).
+    """
+    searches, _ = search_planner.plan(
+        locations if locations is not None else search_params["locations"],
+        keywords if keywords is not None else search_params["keywords"],
+    )
+    return shuffled(searches)
 
-def get_soup(url):
+def _get(url: str, stage: str, **kwargs) -> requests.Response:
+    """requests.get, timed and counted in the scan metrics under *stage* (see scan_metrics.STAGES)."""
+    start = time.perf_counter()
+    try:
+        resp = requests.get(url, **kwargs)
+    except requests.RequestException:
+        scan_metrics.record(stage, (time.perf_counter() - start) * 1000, ok=False)
+        raise
+    scan_metrics.record(stage, (time.perf_counter() - start) * 1000, ok=resp.status_code == HTTPStatus.OK)
+    if resp.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        scan_metrics.count("rate_limited")
+    return resp
+
+def get_soup(url, stage="search_page"):
     HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                   "(KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
     }
     soup = None
-    resp = requests.get(url, headers=HEADERS)
+    resp = _get(url, stage, headers=HEADERS)
     if resp.status_code == 200:
         soup =  BeautifulSoup(resp.text, 'html.parser')
     return soup
@@ -211,6 +238,19 @@ def extract_job_description(job_soup):
 
     return None
 
+def extract_date_posted(job_soup) -> Optional[str]:
+    """datePosted of the ld+json posting as a UTC 'YYYY-MM-DD HH:MM:SS' string, if the page has one."""
+    for script in job_soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string)
+            posted = datetime.fromisoformat(str(data["datePosted"]).replace("Z", "+00:00"))
+        except Exception:
+            continue
+        if posted.tzinfo is not None:
+            posted = posted.astimezone(timezone.utc).replace(tzinfo=None)
+        return posted.strftime("%Y-%m-%d %H:%M:%S")
+    return None
+
 def extract_job_title(job_soup):
     """Try several possible selectors / patterns to obtain the job title text from a LinkedIn job page."""
     # common places the title shows up on a full job page
@@ -276,7 +316,7 @@ def get_job_data(job):
     url = job["url"]
     location = job["location"]
     keyword = job["keyword"]
-    job_soup = get_soup(url)
+    job_soup = get_soup(url, stage="job_page")
     title = ""
     description = ""
 
@@ -302,13 +342,15 @@ def _fetch_and_update(job: dict) -> None:
 
     title = None # Initialize to None
     desc = None  # Initialize to None
+    posted_at = None
     linkedin_job_id = job["job_id"]
     job_url = job["url"]
 
-    soup = get_soup(job_url) # Use job_url consistently
+    soup = get_soup(job_url, stage="job_page") # Use job_url consistently
     if soup:
         title = extract_job_title(soup)
         desc  = extract_job_description(soup)
+        posted_at = extract_date_posted(soup)
 
     # ADDED BLOCK: Check exclusions against the full title
     if title and evaluate.contains_exclusions(title):
@@ -332,47 +374,103 @@ def _fetch_and_update(job: dict) -> None:
     if title is not None or desc is not None:
         database.update_details(linkedin_job_id, title, desc)
 
+    queue = _scan_queue
+    if queue is not None and desc and desc.strip():
+        # Evaluated by the scan's drain thread, most valuable jobs first
+        relevance_score = queue["score"](f"{title or ''}\n{desc}")
+        priority = evaluation_queue.base_priority(posted_at, job.get("keyword"), relevance_score, queue["settings"])
+        database.enqueue_evaluation(linkedin_job_id, priority, posted_at, relevance_score, job.get("search"))
+        return
+
+    _evaluate_and_record(linkedin_job_id, title, desc, job_url)
+    # For timing, uncomment if desired
+    # print(f"Job ID {linkedin_job_id}: Total _fetch_and_update took {time.time() - start_time_total:.2f}s")
+
+
+def _evaluate_and_record(
+    linkedin_job_id: int,
+    title: Optional[str],
+    desc: Optional[str],
+    job_url: str,
+    provider: Optional[str] = None,
+) -> str:
+    """
+    Evaluation half of _fetch_and_update: AI-evaluate a job whose details are already
+    stored, approve it if eligible and mark it analyzed. Makes no HTTP requests.
+    Returns the outcome: 'approved', 'rejected', 'duplicate', 'error' or 'skipped' (no description).
+    """
+    outcome = "skipped"
+
+    # Near-duplicate of an already analyzed posting: reuse its verdict instead of calling the LLM.
+    # The duplicate is linked to the canonical posting and shown collapsed under it on the Dashboard.
+    if desc and desc.strip():
+        canonical = dedupe.find_canonical(linkedin_job_id, title, desc)
+        if canonical is not None:
+            database.link_duplicate(linkedin_job_id, canonical["id"])
+            database.mark_job_as_analyzed(job_id=linkedin_job_id)
+            verdict = "approved" if canonical["approved_reason"] is not None else "rejected"
+            scan_metrics.count("duplicates")
+            sys.stdout.write(f"\n[DUPLICATE] Job ID: {linkedin_job_id} matches Job ID {canonical['job_id']} ({verdict}); reusing its evaluation.\n")
+            sys.stdout.flush()
+            return "duplicate"
+
     if desc and desc.strip():
         try:
             # For timing, uncomment if desired
             # ai_eval_start_time = time.time()
             
-            ai_response = analyze_job(job_description=desc) 
+            ai_start = time.perf_counter()
+            try:
+                ai_response, ai_metadata = analyze_job_detailed(job_description=desc, provider=provider)
+            except Exception as e:
+                scan_metrics.record("llm", (time.perf_counter() - ai_start) * 1000, ok=False)
+                failed_provider = provider or load().get("general", {}).get("ai_provider", "gemini")
+                database.insert_evaluation(linkedin_job_id, None, {"provider": failed_provider}, error=str(e))
+                raise
+            scan_metrics.record("llm", (time.perf_counter() - ai_start) * 1000)
+            database.insert_evaluation(linkedin_job_id, ai_response, ai_metadata)
             
             # For timing, uncomment if desired
             # print(f"Job ID {linkedin_job_id}: AI analysis took {time.time() - ai_eval_start_time:.2f}s")
 
+            outcome = "rejected"
             if ai_response.get("eligible"):
+                outcome = "approved"
+                scan_metrics.count("approved")
                 reasoning = ai_response.get("reasoning", "No reasoning provided by AI.")
                 
                 # Call approve_job once and store its result
                 was_newly_approved = database.approve_job(linkedin_job_id=linkedin_job_id, reason=reasoning)
 
                 if was_newly_approved:
+                    # Vectorize the job and score it against the resume (local, no LLM call)
+                    match_score = relevance.index_job(linkedin_job_id)
                     # Print details to console only if it was newly approved
                     output_message = (
                         f"\n[APPROVED] Job ID: {linkedin_job_id}\n"
                         f"  Title: {title if title else 'N/A - Title not found'}\n"
                         f"  URL: {job_url}\n"
+                        f"  Match: {match_score if match_score is not None else 0:.2f}\n"
                         f"  Reason: {reasoning}\n"
                     )
                     sys.stdout.write(output_message)
                     sys.stdout.flush()
         except Exception as e:
+            outcome = "error"
+            scan_metrics.count("errors")
             error_message = f"\nError during AI analysis or approval for job_id {linkedin_job_id}: {e}\n"
             sys.stdout.write(error_message)
             sys.stdout.flush()
 
     database.mark_job_as_analyzed(job_id=linkedin_job_id)
-    # For timing, uncomment if desired
-    # print(f"Job ID {linkedin_job_id}: Total _fetch_and_update took {time.time() - start_time_total:.2f}s")
+    return outcome
 
 
 
 def _safe_fetch(url: str) -> Optional[str]:
     delay = BASE_DELAY
     for _ in range(RETRIES):
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        r = _get(url, "guest_api", headers=HEADERS, timeout=15)
         if r.status_code == 200:
             return r.text
         if r.status_code in (429, 502, 503, 504):
@@ -400,9 +498,7 @@ def _fetch_guest(job_id: int) -> tuple[Optional[str], Optional[str]]:
 
 def _rowcount() -> int:
     """Returns the current count of discovered_jobs."""
-    # This function uses database.get_conn, ensure 'database' module is imported in scrape.py
-    with database.get_conn() as conn:
-        return conn.execute("SELECT COUNT(*) FROM discovered_jobs").fetchone()[0]
+    return database.count_discovered_jobs()
 
 def show_progress(idx: int, total: int, bar_len: int = 40) -> None:
     """Render a simple progress bar like  [██████------] 12/44 (27%)"""
@@ -434,19 +530,60 @@ def scrape_phase(stop_signal: List[bool]) -> tuple[int, int]:
     except Exception as e:
         print(f"WARN: Failed to reload config before scraping: {e}. Using potentially stale config.")
         # Optionally handle error more gracefully, e.g., stop if config is crucial and failed to load
+        locations, keywords = search_params["locations"], search_params["keywords"]
 
     start_total_db_rows = _rowcount()
-    searches = get_searches() # Assumes get_searches is defined in scrape.py
-    total_searches = len(searches)
+    searches = get_searches(locations, keywords) # Assumes get_searches is defined in scrape.py
 
     if not searches:
         print("No search criteria defined in config.toml or an issue occurred generating searches.")
         return 0, 0 # No new jobs, no links examined
 
-    print(f"Generated {total_searches} search permutations. Starting job processing...")
+    # Most productive searches first; low-yield ones sit out some scans (search_scheduler.py)
+    scheduler_settings = search_scheduler.get_settings()
+    searches, deferred = search_scheduler.plan(searches, scheduler_settings)
+    total_searches = len(searches)
+    print(f"Generated {total_searches + len(deferred)} search permutations; {total_searches} scheduled, "
+          f"{len(deferred)} deferred as low-yield. Starting job processing...")
     sys.stdout.flush()
 
     total_links_examined_this_run = 0
+    searches_run = [] # (search, its yield) for search_scheduler.record_scan
+    approvals: Dict[search_scheduler.Key, int] = {} # Per search that queued the approved job
+    approvals_lock = threading.Lock()
+    scan_started = time.perf_counter()
+    scan_metrics.start(MAX_WORKERS)
+    status = "interrupted" # Unless the search loop runs to the end or is stopped
+
+    # Fetched jobs are queued and evaluated by a drain thread, most valuable first (evaluation_queue.py).
+    # It also picks up jobs a previous scan queued but did not get to.
+    global _scan_queue
+    queue_settings = evaluation_queue.get_settings()
+    database.release_evaluation_claims(queue_settings["claim_timeout_minutes"])
+    _scan_queue = {"settings": queue_settings, "score": relevance.text_scorer()}
+    searching_done = threading.Event()
+    drain_stop = threading.Event()
+
+    def drain_should_stop() -> bool:
+        return drain_stop.is_set() or bool(stop_signal and stop_signal[0]) or database.should_stop_scan()
+
+    def evaluate_queued(row) -> str:
+        outcome = _evaluate_and_record(row["job_id"], row["title"], row["description"], row["url"])
+        # Credited to the job's own search, however long after that search its evaluation completes
+        if outcome == "approved" and row["search_keyword"] is not None:
+            key = (row["search_keyword"], row["search_location"], row["search_workplace"])
+            with approvals_lock:
+                approvals[key] = approvals.get(key, 0) + 1
+        return outcome
+
+    # Worker writes go through one group-commit writer thread for the duration of the scan
+    started_writer = database.start_writer()
+    drainer = threading.Thread(
+        target=evaluation_queue.drain,
+        args=(evaluate_queued, drain_should_stop, lambda: not searching_done.is_set(), queue_settings),
+        name="evaluation-drain",
+    )
+    drainer.start()
     try:
         for i, search in enumerate(searches, 1):
             # Check both the immediate signal and the persistent DB signal
@@ -454,11 +591,23 @@ def scrape_phase(stop_signal: List[bool]) -> tuple[int, int]:
                 sys.stdout.write("\nINFO: Scrape phase received stop signal. Terminating early.\n")
                 sys.stdout.flush()
                 database.set_stop_scan_flag(False) # Reset the flag after acknowledging stop
+                status = "stopped"
+                break
+            budget_reason = search_scheduler.budget_spent(scan_started, scheduler_settings)
+            if budget_reason:
+                sys.stdout.write(f"\nINFO: {budget_reason.capitalize()}; leaving {total_searches - i + 1} lower-priority search(es) for the next scan.\n")
+                sys.stdout.flush()
+                status = "completed"
                 break
 
+            before = scan_metrics.snapshot()
             links_on_page = process_search_page(search) or 0 # process_search_page is in scrape.py
+            after = scan_metrics.snapshot()
+            searches_run.append((search, {name: after[name] - before[name] for name in ("links", "new_jobs", "requests")}))
             total_links_examined_this_run += links_on_page
             show_progress(i, total_searches)
+        else:
+            status = "completed"
     except KeyboardInterrupt:
         sys.stdout.write("\n⚠️  Interrupted by user during scraping – finishing up current operations…\n")
         sys.stdout.flush()
@@ -466,14 +615,57 @@ def scrape_phase(stop_signal: List[bool]) -> tuple[int, int]:
         # Ensure a newline after the progress bar finishes or is interrupted
         sys.stdout.write("\n") 
         sys.stdout.flush()
+        _scan_queue = None
+        searching_done.set()
+        if status == "completed":
+            sys.stdout.write(f"Evaluating the remaining queued jobs ({database.count_evaluation_queue()})...\n")
+        else:
+            drain_stop.set() # Evaluations in flight finish; the rest stay queued for the next scan
+        sys.stdout.flush()
+        try:
+            drainer.join()
+        except KeyboardInterrupt:
+            drain_stop.set()
+            status = "interrupted"
+            sys.stdout.write("\n⚠️  Interrupted while evaluating – finishing evaluations in flight…\n")
+            sys.stdout.flush()
+            drainer.join()
+        if status == "completed" and ((stop_signal and stop_signal[0]) or database.should_stop_scan()):
+            database.set_stop_scan_flag(False) # Stop requested while the queue was draining
+            status = "stopped"
+        if started_writer:
+            database.stop_writer() # Commit anything still queued before counting
 
         end_total_db_rows = _rowcount()
         new_jobs_this_run = end_total_db_rows - start_total_db_rows
+        metrics = None
+        try:
+            metrics = scan_metrics.finish(status, new_jobs_this_run)
+        except Exception as e:
+            print(f"WARN: Could not record scan metrics: {e}")
+        try:
+            ran = {id(search) for search, _ in searches_run}
+            search_scheduler.record_scan(
+                searches_run, deferred + [s for s in searches if id(s) not in ran], approvals, scheduler_settings,
+            )
+        except Exception as e:
+            print(f"WARN: Could not record search yields: {e}")
+        try:
+            database.prune_search_results(search_planner.get_settings()["window_days"])
+        except Exception as e:
+            print(f"WARN: Could not prune search results: {e}")
+        try:
+            relevance.ensure_scores_current() # Batch rescore once the IDF has drifted, not per approval
+        except Exception as e:
+            print(f"WARN: Could not rescore relevance: {e}")
         
         print("──────────────── Scrape Phase Summary ────────────────")
         print(f"Links examined this run: {total_links_examined_this_run}")
         print(f"New jobs added to DB this run: {new_jobs_this_run}")
         print(f"Total discovered jobs in database: {end_total_db_rows}")
+        print(f"Jobs waiting for evaluation: {database.count_evaluation_queue()}")
+        if metrics:
+            print(f"Requests: {metrics['requests']} ({metrics['rate_limited']} rate-limited) in {metrics['duration_s']:.0f}s")
         print("──────────────────────────────────────────────────")
         sys.stdout.flush()
         return new_jobs_this_run, total_links_examined_this_run
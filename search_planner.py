@@ -0,0 +1,152 @@
+# search_planner.py
+# Builds each scan's search list (keyword x location x workplace filter) with
+# fewer redundant requests than the full grid.
+#
+# The full grid searches every keyword once remote (f_WT=2) and twice for every
+# other location, on-site (f_WT=1) and hybrid (f_WT=3).  The planner
+#
+#   * merges the on-site and hybrid filters into one search (f_WT=1,3), which
+#     LinkedIn accepts as a multi-select filter;
+#   * drops locations whose radius lies inside that of other configured
+#     locations.  Every search records which jobs it returned for its location
+#     (database.search_results); a location is redundant when at least
+#     overlap_threshold of the jobs it returned within the last window_days
+#     were also returned for locations that are kept.  Locations are kept
+#     greedily, those with the most distinct jobs first, and a location is only
+#     judged once min_observed_jobs of its results are on record.  A dropped
+#     location's results age out of the window, after which it is searched
+#     again and re-measured.
+#
+# Settings live in an optional [search_planner] section of config.toml.  Run
+# `python search_planner.py` for a plan report against today's grid.
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import load
+import database
+
+DEFAULT_PLANNER_SETTINGS = {
+    "merge_workplace": True,   # One f_WT=1,3 search instead of separate on-site and hybrid searches
+    "drop_overlapping": True,  # Skip locations whose results other locations already return
+    "overlap_threshold": 0.9,  # Share of a location's jobs found elsewhere that makes it redundant
+    "min_observed_jobs": 50,   # Results needed on record before a location can be dropped
+    "window_days": 30,         # Results older than this are not counted (and are pruned after a scan)
+    "distance": 75,            # Search radius in miles
+}
+
+REMOTE = "remote"
+ON_SITE, REMOTE_WT, HYBRID = "1", "2", "3"
+
+
+def get_settings() -> Dict[str, Any]:
+    """[search_planner] config values over the defaults."""
+    settings = dict(DEFAULT_PLANNER_SETTINGS)
+    settings.update(load().get("search_planner", {}))
+    return settings
+
+
+def search_url(keyword: str, location: str, workplace: str, distance: int) -> str:
+    """LinkedIn search URL; *workplace* is one f_WT value or several joined by commas."""
+    keywords = keyword.replace(' ', '%20')
+    f_wt = workplace.replace(",", "%2C")
+    if location.lower() == REMOTE:
+        return f"https://www.linkedin.com/jobs/search/?keywords={keywords}&f_WT={f_wt}"
+    return f"https://www.linkedin.com/jobs/search/?keywords={keywords}&location={location.replace(' ', '%20')}&distance={distance}&f_WT={f_wt}"
+
+
+def grid_size(locations: List[str], keywords: List[str]) -> int:
+    """Searches in the full grid: one per keyword for Remote, two for every other location."""
+    per_keyword = sum(1 if location.lower() == REMOTE else 2 for location in locations)
+    return per_keyword * len(keywords)
+
+
+def redundant_locations(locations: List[str], settings: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Configured locations whose observed results are covered by the kept ones:
+    location -> {'observed', 'coverage', 'covered_by'} (the kept locations sharing the most jobs first).
+    """
+    seen: Dict[str, set] = {}
+    for row in database.fetch_search_results(settings["window_days"]):
+        seen.setdefault(row["location"], set()).add(row["job_id"])
+    candidates = [location for location in dict.fromkeys(locations) if location.lower() != REMOTE]
+    kept: List[str] = []
+    covered: set = set()
+    redundant = {}
+    for location in sorted(candidates, key=lambda location: -len(seen.get(location, ()))):
+        jobs = seen.get(location, set())
+        coverage = len(jobs & covered) / len(jobs) if jobs else 0.0
+        if kept and len(jobs) >= settings["min_observed_jobs"] and coverage >= settings["overlap_threshold"]:
+            shared = sorted(kept, key=lambda other: -len(jobs & seen.get(other, set())))
+            redundant[location] = {
+                "observed": len(jobs),
+                "coverage": coverage,
+                "covered_by": [other for other in shared if jobs & seen.get(other, set())],
+            }
+            continue
+        kept.append(location)
+        covered |= jobs
+    return redundant
+
+
+def plan(
+    locations: List[str], keywords: List[str], settings: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """The scan's searches (url, location, keyword, workplace) and a report comparing them with the full grid."""
+    settings = settings or get_settings()
+    dropped = redundant_locations(locations, settings) if settings["drop_overlapping"] else {}
+    if settings["merge_workplace"]:
+        local_filters = [f"{ON_SITE},{HYBRID}"]
+    else:
+        local_filters = [ON_SITE, HYBRID]
+
+    searches = []
+    for location in dict.fromkeys(locations):
+        if location in dropped:
+            continue
+        filters = [REMOTE_WT] if location.lower() == REMOTE else local_filters
+        for keyword in dict.fromkeys(keywords):
+            for workplace in filters:
+                searches.append({
+                    "url": search_url(keyword, location, workplace, settings["distance"]),
+                    "location": location, "keyword": keyword, "workplace": workplace,
+                })
+
+    unique_keywords = len(dict.fromkeys(keywords))
+    local = sum(1 for location in dict.fromkeys(locations) if location.lower() != REMOTE)
+    report = {
+        "grid": grid_size(locations, keywords),
+        "merged": local * unique_keywords if settings["merge_workplace"] else 0,
+        "dropped": dropped,
+        "dropped_searches": len(dropped) * unique_keywords * (1 if settings["merge_workplace"] else 2),
+        "planned": len(searches),
+    }
+    return searches, report
+
+
+def main() -> None:
+    database.init_db()
+    config = load()
+    locations = config.get("search_parameters", {}).get("locations", [])
+    keywords = config.get("search_parameters", {}).get("keywords", [])
+    settings = get_settings()
+    searches, report = plan(locations, keywords, settings)
+
+    grid, planned = report["grid"], report["planned"]
+    print(f"Search plan for {len(keywords)} keyword(s) x {len(locations)} location(s), radius {settings['distance']} mi")
+    print(f"  Today's grid:                  {grid:5d} search requests per scan")
+    if settings["merge_workplace"]:
+        print(f"  On-site + hybrid merged:       {-report['merged']:5d}")
+    if settings["drop_overlapping"]:
+        print(f"  Overlapping locations dropped: {-report['dropped_searches']:5d}")
+    saving = f" ({1 - planned / grid:.0%} fewer)" if grid else ""
+    print(f"  Planned:                       {planned:5d} search requests per scan{saving}")
+    for location, info in report["dropped"].items():
+        print(f"  - {location}: {info['coverage']:.0%} of its {info['observed']} recent jobs are also found via "
+              f"{', '.join(info['covered_by'][:3]) or 'other locations'}")
+    if settings["drop_overlapping"] and not report["dropped"]:
+        print(f"  No location is redundant yet (a location needs {settings['min_observed_jobs']} recent jobs on record "
+              f"and {settings['overlap_threshold']:.0%} of them found elsewhere).")
+    print("Job-page requests are not counted; search_scheduler.py may defer low-yield searches further.")
+
+
+if __name__ == "__main__":
+    main()
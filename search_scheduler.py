@@ -0,0 +1,172 @@
+# search_scheduler.py
+# Orders each scan's searches by the yield they have had in past scans.
+#
+# Every search (keyword x location x workplace filter) keeps a record in the
+# search_yield table: how often it ran, the links, new jobs, approvals and
+# HTTP requests it produced, and its expected value, a decayed average of
+#
+#   (new jobs + approval_weight * approvals) / requests
+#
+# over its runs.  A scan runs searches never seen before first, then the rest
+# by priority (expected value plus explore_weight for every scan a search was
+# not run), stopping when the request or time budget is spent.  Searches whose
+# priority is below min_priority are deferred; their priority grows with every
+# scan they sit out, so a search that stops yielding is revisited less and
+# less often but never dropped.  Settings live in an optional [scheduler]
+# section of config.toml:
+#
+#   [scheduler]
+#   request_budget = 400   # HTTP requests per scan; 0 = no limit
+#   time_budget_minutes = 0
+#
+# Run `python search_scheduler.py` to print the next scan's plan.
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import load
+import database
+import scan_metrics
+import search_planner
+
+DEFAULT_SCHEDULER_SETTINGS = {
+    "request_budget": 0,         # HTTP requests per scan, retries included; 0 = no limit
+    "time_budget_minutes": 0,    # Scan duration; 0 = no limit
+    "approval_weight": 5.0,      # An approval is worth this many new jobs
+    "decay": 0.5,                # Weight of the latest run in the expected value
+    "explore_weight": 0.01,      # Priority gained for each scan a search is not run
+    "min_priority": 0.05,        # Searches below this are deferred; 0 runs every search every scan
+}
+
+Key = Tuple[str, str, str]
+
+
+def get_settings() -> Dict[str, Any]:
+    """[scheduler] config values over the defaults."""
+    settings = dict(DEFAULT_SCHEDULER_SETTINGS)
+    settings.update(load().get("scheduler", {}))
+    return settings
+
+
+def search_key(search: Dict[str, Any]) -> Key:
+    return (search["keyword"], search["location"], search["workplace"])
+
+
+def merged_record(parts: List[Dict[str, Any]], key: Key) -> Dict[str, Any]:
+    """One record for *key* from the records of the searches it replaces (the separate on-site and
+    hybrid searches of a merged f_WT=1,3 search): counts summed, expected value weighted by requests.
+    """
+    requests = sum(part["requests"] for part in parts)
+    if requests:
+        value = sum(part["expected_value"] * part["requests"] for part in parts) / requests
+    else:
+        value = sum(part["expected_value"] for part in parts) / len(parts)
+    run_at = [part["last_run_at"] for part in parts if part["last_run_at"] is not None]
+    return dict(
+        zip(("keyword", "location", "workplace"), key),
+        runs=max(part["runs"] for part in parts), skipped=min(part["skipped"] for part in parts),
+        expected_value=value, last_run_at=max(run_at) if run_at else None,
+        **{name: sum(part[name] for part in parts) for name in ("links", "new_jobs", "approved", "requests")},
+    )
+
+
+def load_records() -> Dict[Key, Dict[str, Any]]:
+    """search_yield records by search_key.  A merged on-site + hybrid search with no record of its
+    own starts from the history of the separate searches (search_planner merge_workplace).
+    """
+    records = {search_key(row): dict(row) for row in database.fetch_search_yields()}
+    merged = f"{search_planner.ON_SITE},{search_planner.HYBRID}"
+    for keyword, location, workplace in list(records):
+        if workplace not in (search_planner.ON_SITE, search_planner.HYBRID) or (keyword, location, merged) in records:
+            continue
+        parts = [records[(keyword, location, wt)] for wt in (search_planner.ON_SITE, search_planner.HYBRID)
+                 if (keyword, location, wt) in records]
+        records[(keyword, location, merged)] = merged_record(parts, (keyword, location, merged))
+    return records
+
+
+def priority(record: Optional[Dict[str, Any]], settings: Dict[str, Any]) -> float:
+    """Expected value of running a search now; searches that never ran come first."""
+    if record is None or not record["runs"]:
+        return float("inf")
+    return record["expected_value"] + settings["explore_weight"] * record["skipped"]
+
+
+def plan(searches: List[Dict[str, Any]], settings: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Splits *searches* into (to_run, deferred); to_run is ordered most valuable first.
+    Each search gets a 'priority' entry.  Ties keep the order of *searches*.
+    """
+    settings = settings or get_settings()
+    records = load_records()
+    for search in searches:
+        search["priority"] = priority(records.get(search_key(search)), settings)
+    ordered = sorted(searches, key=lambda search: -search["priority"])
+    to_run = [search for search in ordered if search["priority"] >= settings["min_priority"]]
+    deferred = [search for search in ordered if search["priority"] < settings["min_priority"]]
+    return to_run, deferred
+
+
+def budget_spent(started: float, settings: Dict[str, Any]) -> Optional[str]:
+    """Why the scan that started at perf_counter() *started* should launch no more searches, if it should not."""
+    requests = scan_metrics.snapshot().get("requests", 0)
+    if settings["request_budget"] and requests >= settings["request_budget"]:
+        return f"request budget of {settings['request_budget']} spent"
+    if settings["time_budget_minutes"] and time.perf_counter() - started >= settings["time_budget_minutes"] * 60:
+        return f"time budget of {settings['time_budget_minutes']} minutes spent"
+    return None
+
+
+def record_scan(
+    ran: List[Tuple[Dict[str, Any], Dict[str, int]]],
+    not_run: List[Dict[str, Any]],
+    approvals: Optional[Dict[Key, int]] = None,
+    settings: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Folds a scan into the yield records.  *ran* pairs each search that ran with its
+    links, new_jobs and requests; every search in *not_run* sits out one more scan.
+    *approvals* counts the jobs approved during the scan by the search that queued them,
+    which may be a search of an earlier scan.
+    """
+    settings = settings or get_settings()
+    approvals = approvals or {}
+    records = load_records()
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for search, outcome in ran:
+        key = search_key(search)
+        outcome = dict(outcome, approved=approvals.get(key, 0))
+        record = records.get(key) or dict(zip(database.SEARCH_YIELD_COLUMNS, key + (0, 0, 0, 0, 0, 0, 0.0, None)))
+        value = (outcome["new_jobs"] + settings["approval_weight"] * outcome["approved"]) / max(1, outcome["requests"])
+        if record["runs"]:
+            value = settings["decay"] * value + (1 - settings["decay"]) * record["expected_value"]
+        record.update(
+            runs=record["runs"] + 1, skipped=0, expected_value=value, last_run_at=now,
+            **{name: record[name] + outcome[name] for name in ("links", "new_jobs", "approved", "requests")},
+        )
+        rows.append(record)
+    for search in not_run:
+        record = records.get(search_key(search))
+        if record is not None and record["runs"]:
+            approved = record["approved"] + approvals.get(search_key(search), 0)
+            rows.append(dict(record, skipped=record["skipped"] + 1, approved=approved))
+    if rows:
+        database.save_search_yields(rows)
+
+
+def main() -> None:
+    database.init_db()
+    settings = get_settings()
+    search_params = load().get("search_parameters", {})
+    searches, _ = search_planner.plan(search_params.get("locations", []), search_params.get("keywords", []))
+    to_run, deferred = plan(searches, settings)
+    print(f"Next scan: {len(to_run)} searches, {len(deferred)} deferred.")
+    for label, searches in (("RUN", to_run), ("DEFER", deferred)):
+        for search in searches:
+            print(f"[{label:5}] {search['priority']:8.3f}  {search['keyword']} / {search['location']} (f_WT={search['workplace']})")
+    if settings["request_budget"] or settings["time_budget_minutes"]:
+        print("Searches run in this order until the request or time budget is spent.")
+
+
+if __name__ == "__main__":
+    main()
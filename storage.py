@@ -0,0 +1,162 @@
+# storage.py
+# The storage interface shared by the SQLite and PostgreSQL backends.
+#
+# Everything the scraper, the CLI tools and the Streamlit pages do with the
+# database goes through one of the OPERATIONS below, always as
+# database.<operation>.  database.py implements them on SQLite and
+# pg_database.py on PostgreSQL; database.py binds the names to the backend
+# chosen in an optional [storage] section of config.toml:
+#
+#   [storage]
+#   backend = "postgres"              # "sqlite" (default) or "postgres"
+#   dsn = "postgresql://jobfinder@localhost/jobfinder"
+#   pool_min = 1
+#   pool_max = 20
+#
+# The JOBFINDER_PG_DSN environment variable overrides dsn.
+
+import os
+from types import ModuleType
+from typing import Dict, Any, List
+
+from config import load
+
+BACKENDS = ("sqlite", "postgres")
+DSN_ENV_VAR = "JOBFINDER_PG_DSN"
+
+DEFAULT_STORAGE_SETTINGS = {
+    "backend": "sqlite",
+    "dsn": "",        # libpq connection string or URI (postgres only)
+    "pool_min": 1,    # Connections kept open per process
+    "pool_max": 20,   # Upper bound; scan workers, the writer and page reads share the pool
+}
+
+OPERATIONS = (
+    # Lifecycle
+    "init_db",
+    "checkpoint",
+    "data_version",
+    "backup_database",
+    "replace_database",
+    "start_writer",
+    "stop_writer",
+    # Discovered jobs
+    "upsert_discovered",
+    "insert_stub",
+    "insert_stubs",
+    "row_missing_details",
+    "update_details",
+    "get_description",
+    "mark_job_as_analyzed",
+    "fetch_unapproved",
+    "count_discovered_jobs",
+    # Approvals
+    "approve_job",
+    "upsert_approval",
+    "revoke_approval",
+    "clear_all_approved_jobs",
+    "mark_job_as_applied",
+    "delete_approved_job",
+    "archive_all_applied_jobs",
+    "mark_jobs_as_applied",
+    "archive_applied_jobs_by_id",
+    "delete_approved_jobs",
+    # Page queries
+    "fetch_pending_approved_page",
+    "count_pending_approved",
+    "fetch_applied_page",
+    "count_applied",
+    # Near-duplicates
+    "save_fingerprint",
+    "fetch_fingerprint_candidates",
+    "fetch_unfingerprinted_jobs",
+    "link_duplicate",
+    # Prompt metrics and evaluation records
+    "insert_prompt_metrics",
+    "fetch_prompt_metrics",
+    "insert_evaluation",
+    "fetch_evaluation_summary",
+    "fetch_evaluation_latencies",
+    "fetch_slowest_evaluations",
+    "fetch_job_evaluations",
+    # Re-evaluation
+    "count_reevaluation_candidates",
+    "fetch_reevaluation_chunk",
+    "create_reevaluation_run",
+    "fetch_resumable_reevaluation_run",
+    "fetch_reevaluation_run",
+    "fetch_latest_reevaluation_run",
+    "update_reevaluation_progress",
+    "set_reevaluation_status",
+    "request_reevaluation_cancel",
+    "reevaluation_cancel_requested",
+    # Relevance
+    "fetch_job_text",
+    "save_job_vector",
+    "fetch_relevance_df",
+    "count_job_vectors",
+    "fetch_unvectorized_approved_jobs",
+    "fetch_approved_job_vectors",
+    "update_relevance_scores",
+    "get_relevance_state",
+    "set_relevance_state",
+    # Statistics
+    "fetch_job_funnel",
+    "fetch_job_stats",
+    "rebuild_job_stats",
+    # Retention
+    "purge_rejected_descriptions",
+    "archive_applied_jobs",
+    "prune_evaluations",
+    "incremental_vacuum",
+    "merge_search_index",
+    "database_size",
+    # Corpus export
+    "iter_job_export",
+    # Scan metrics
+    "create_scan_run",
+    "finish_scan_run",
+    "fetch_scan_runs",
+    "fetch_scan_stage_metrics",
+    # Search scheduling
+    "fetch_search_yields",
+    "save_search_yields",
+    # Search results (search planner)
+    "record_search_results",
+    "fetch_search_results",
+    "prune_search_results",
+    # Evaluation queue
+    "enqueue_evaluation",
+    "claim_evaluations",
+    "release_evaluation_claims",
+    "count_evaluation_queue",
+    "fetch_evaluation_queue",
+    # Scan control
+    "set_stop_scan_flag",
+    "should_stop_scan",
+    # Query plans
+    "check_query_plans",
+)
+
+# Backend-specific values bound alongside the operations
+ATTRIBUTES = (
+    "EXPECTED_QUERY_INDEXES",
+)
+
+
+def get_settings() -> Dict[str, Any]:
+    """[storage] config values over the defaults, with the DSN taken from the environment if set."""
+    settings = dict(DEFAULT_STORAGE_SETTINGS)
+    try:
+        settings.update(load().get("storage", {}))
+    except Exception as e:
+        print(f"WARN: Could not read [storage] settings, using SQLite: {e}")
+    settings["dsn"] = os.environ.get(DSN_ENV_VAR) or settings["dsn"]
+    if settings["backend"] not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {settings['backend']!r}; expected one of {', '.join(BACKENDS)}")
+    return settings
+
+
+def missing_operations(module: ModuleType) -> List[str]:
+    """Interface names *module* does not implement."""
+    return [name for name in OPERATIONS + ATTRIBUTES if not hasattr(module, name)]
@@ -1,6 +1,8 @@
 # utils.py
+import math
 import sys
 from pathlib import Path
+from typing import List
 
 def get_application_path() -> Path:
     """
@@ -27,6 +29,15 @@ DB_PATH = APP_ROOT / "database.db" # Assuming database.db is also in the root
 
 # Removed .env file creation logic as it's no longer central to API key management.
 
+def percentile(values: List[float], pct: float) -> float:
+    """The *pct*th percentile of *values*, interpolated between neighbouring ranks; 0.0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
 # Test (optional, run python utils.py to see the paths)
 if __name__ == '__main__':
     print(f"Application Root: {APP_ROOT}")